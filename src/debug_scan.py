@@ -1,38 +1,47 @@
+import sys
 from pathlib import Path
 
-from photo_sorter.scanning.filesystem_scanner import list_photo_paths
-from photo_sorter.scanning.image_analyzer import build_photo_infos
+from photo_sorter.scanning.filesystem_scanner import list_photo_entries
 from photo_sorter.scanning.sorting import sort_photos_by_taken_date
-from photo_sorter.deduplication.hashing import (
-    annotate_photos_with_file_hash,
-    annotate_photos_with_perceptual_hash,
-)
+from photo_sorter.pipeline.single_pass import SinglePassStats, analyze_photo_paths
+from photo_sorter.pipeline.profiling import PipelineProfiler
 from photo_sorter.deduplication.grouping import (
     find_exact_duplicate_groups,
     find_near_duplicate_groups,
     hamming_distance_hex,
 )
-from photo_sorter.quality.analysis import (
-    annotate_photos_with_quality,
-    find_potential_trash_photos,
-)
+from photo_sorter.quality.analysis import find_potential_trash_photos
 
 if __name__ == "__main__":
-    # Test directory
-    photos_folder = Path("/home/adrian/Desktop/projects/k_test_mix")
+    # Test directory (for scripted/cron use see "python -m photo_sorter --help")
+    if len(sys.argv) != 2:
+        print(f"Usage: python {sys.argv[0]} PHOTOS_FOLDER", file=sys.stderr)
+        raise SystemExit(2)
+    photos_folder = Path(sys.argv[1])
 
     print(f"Scanning folder: {photos_folder}")
 
-    # 1) Collect paths to image files
-    paths = list_photo_paths(photos_folder)
+    # Stage timings are printed at the end
+    profiler = PipelineProfiler()
+
+    # 1) Collect paths (and stat results) of image files
+    with profiler.stage("discover") as stage:
+        paths = list_photo_entries(photos_folder)
+        stage.add(items=len(paths))
     print(f"Found {len(paths)} photo files.")
 
     if not paths:
         print("No photo files found. Exiting.")
         raise SystemExit(0)
 
-    # 2) Build PhotoInfo list based on file metadata (EXIF + mtime)
-    photos = build_photo_infos(paths)
+    # 2) Build PhotoInfo list in a single pass per photo:
+    #    EXIF (or mtime), file hash, pHash, blur and brightness from one decode
+    analysis_stats = SinglePassStats()
+    with profiler.stage("analyse") as stage:
+        photos = analyze_photo_paths(paths, analysis_stats)
+        stage.add(items=len(photos), bytes_read=analysis_stats.bytes_read)
+    profiler.add_analysis_stats(analysis_stats)
+    print(f"Single-pass analysis: {analysis_stats.summary()}")
 
     # 3) Sort photos by date (ascending - oldest first)
     photos_sorted = sort_photos_by_taken_date(photos, descending=False)
@@ -47,9 +56,7 @@ if __name__ == "__main__":
 
         print(f"- {taken_at_str} | {photo.size_bytes:>8} B | {photo.path}")
 
-    # 4) Compute file hash for all photos
-    annotate_photos_with_file_hash(photos_sorted)
-
+    # 4) File hashes were computed by the single-pass analysis
     print("\n=== TEST FILE HASHES (first 5) ===")
     for photo in photos_sorted[:5]:
         print(f"{photo.path}")
@@ -59,9 +66,7 @@ if __name__ == "__main__":
         )
         print(f"  file_hash: {hash_preview}")
 
-    # 4b) Compute perceptual hash (pHash) for all photos
-    annotate_photos_with_perceptual_hash(photos_sorted)
-
+    # 4b) Perceptual hashes (pHash) were computed by the single-pass analysis
     print("\n=== TEST PERCEPTUAL HASHES (first 5) ===")
     for photo in photos_sorted[:5]:
         print(f"{photo.path}")
@@ -69,11 +74,12 @@ if __name__ == "__main__":
         print(f"  perceptual_hash: {ph}")
     
     # === QUALITY ANALYSIS (Stage 4) ===
-    # 1) Compute quality metrics for all photos
-    annotate_photos_with_quality(photos_sorted)
+    # 1) Quality metrics were computed by the single-pass analysis
 
     # 2) Find potential trash photos based on blur/brightness
-    trash_photos = find_potential_trash_photos(photos_sorted)
+    with profiler.stage("trash") as stage:
+        trash_photos = find_potential_trash_photos(photos_sorted)
+        stage.add(items=len(photos_sorted))
 
     print("\n=== POTENTIAL TRASH PHOTOS (by quality) ===")
     print(f"Total photos: {len(photos_sorted)}")
@@ -89,7 +95,9 @@ if __name__ == "__main__":
         print(f"  is_potential_trash: {photo.is_potential_trash}")
 
     # 5) Find groups of identical duplicates by file_hash
-    duplicate_groups = find_exact_duplicate_groups(photos_sorted)
+    with profiler.stage("exact_groups") as stage:
+        duplicate_groups = find_exact_duplicate_groups(photos_sorted)
+        stage.add(items=len(photos_sorted))
 
     total_groups = len(duplicate_groups)
     total_photos_in_groups = sum(len(g) for g in duplicate_groups)
@@ -108,7 +116,9 @@ if __name__ == "__main__":
             print(f"  - {photo.path}")
 
     # 6) Near-duplicate groups based on perceptual_hash
-    near_duplicate_groups = find_near_duplicate_groups(photos_sorted, max_distance=5)
+    with profiler.stage("near_groups") as stage:
+        near_duplicate_groups = find_near_duplicate_groups(photos_sorted, max_distance=5)
+        stage.add(items=len(photos_sorted))
 
     total_near_groups = len(near_duplicate_groups)
     total_near_photos = sum(len(g) for g in near_duplicate_groups)
@@ -134,3 +144,6 @@ if __name__ == "__main__":
             print(f"  - {photo.path}")
             print(f"    pHash:    {photo.perceptual_hash}")
             print(f"    distance: {distance}")
+
+    print("\n=== STAGE TIMINGS ===")
+    print(profiler.report().format_table())
@@ -1,4 +1,4 @@
-from photo_sorter.gui import run
+from photo_sorter.gui import main as run
 
 
 def main():
@@ -9,4 +9,4 @@ def main():
 if __name__ == "__main__":
 
 
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,4 @@
+from photo_sorter.cli import main
+
+# "python -m photo_sorter ..." runs the headless command-line runner
+raise SystemExit(main())
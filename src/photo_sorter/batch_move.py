@@ -0,0 +1,375 @@
+from __future__ import annotations
+
+import errno
+import json
+import os
+import shutil
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, TextIO, Tuple
+
+
+# Journal of all batch moves into a folder, kept inside that folder
+JOURNAL_FILE_NAME = ".photo_sorter_moves.ndjson"
+
+# Concurrent copies when source and destination are on different devices
+DEFAULT_COPY_WORKERS = 8
+
+# Journal lines are flushed to disk at least this often
+_JOURNAL_FLUSH_EVERY = 256
+
+
+@dataclass
+class MoveResult:
+    """
+    Outcome of a batch move (or undo).
+    moved holds (source, destination) pairs in the order they were done.
+    """
+
+    batch_id: str
+    moved: List[Tuple[Path, Path]] = field(default_factory=list)
+    skipped: List[Path] = field(default_factory=list)
+    failed: List[Tuple[Path, str]] = field(default_factory=list)
+    copied: int = 0  # moves done as copy + delete (cross-device)
+
+    @property
+    def moved_count(self) -> int:
+        return len(self.moved)
+
+    def summary(self) -> str:
+        return (
+            f"{len(self.moved)} moved ({self.copied} copied across devices), "
+            f"{len(self.skipped)} skipped, {len(self.failed)} failed"
+        )
+
+
+def unique_destination_name(name: str, taken: Set[str]) -> str:
+    """
+    Return name, or name with a "__trash_N" suffix before the extension,
+    whichever is not in taken (casefolded names - safe on case-insensitive
+    filesystems). The returned name is added to taken.
+    """
+    candidate = name
+    if candidate.casefold() in taken:
+        stem, suffix = os.path.splitext(name)
+        counter = 1
+        while True:
+            candidate = f"{stem}__trash_{counter}{suffix}"
+            if candidate.casefold() not in taken:
+                break
+            counter += 1
+
+    taken.add(candidate.casefold())
+    return candidate
+
+
+def plan_moves(sources: Iterable[Path], dest_dir: Path) -> List[Tuple[Path, Path]]:
+    """
+    Pair every source with its destination in dest_dir.
+
+    dest_dir is listed once and name collisions (with existing files and
+    within the batch) are resolved in memory, instead of probing exists()
+    for every candidate name. Sources already inside dest_dir are left out.
+    """
+    try:
+        taken = {name.casefold() for name in os.listdir(dest_dir)}
+    except FileNotFoundError:
+        taken = set()
+
+    plan = []
+    for src in sources:
+        src = Path(src)
+        if src.parent == dest_dir:
+            continue
+        plan.append((src, dest_dir / unique_destination_name(src.name, taken)))
+
+    return plan
+
+
+# errno values of os.link on filesystems without hard links (FAT, some network shares)
+_NO_HARD_LINK_ERRNOS = {errno.EPERM, errno.ENOTSUP, errno.EOPNOTSUPP}
+
+# Move symlinks themselves, like os.rename does, where the platform allows it
+_LINK_KWARGS = {"follow_symlinks": False} if os.link in os.supports_follow_symlinks else {}
+
+
+def _link_then_unlink(src: Path, dst: Path) -> None:
+    """
+    Rename src to dst on the same device, failing with FileExistsError if
+    dst exists - os.rename would silently replace a file that appeared
+    there after planning. Where hard links aren't supported, dst is checked
+    right before os.rename instead (a much smaller window, not zero).
+    """
+    try:
+        os.link(src, dst, **_LINK_KWARGS)
+    except OSError as exc:
+        if exc.errno not in _NO_HARD_LINK_ERRNOS:
+            raise
+        if os.path.lexists(dst):
+            raise FileExistsError(errno.EEXIST, os.strerror(errno.EEXIST), str(dst)) from None
+        os.rename(src, dst)
+        return
+
+    try:
+        os.unlink(src)
+    except FileNotFoundError:
+        # Removed by someone else meanwhile - dst is now the only copy
+        pass
+    except BaseException:
+        # Keep the source, don't leave an unjournaled second name behind
+        os.unlink(dst)
+        raise
+
+
+def _move_no_replace(src: Path, dst: Path, resolve_conflicts: bool) -> Path:
+    """
+    Move src to dst (same device) without replacing anything, and return
+    the destination used. If dst appeared since planning, either the next
+    free "__trash_N" name is taken (resolve_conflicts) or FileExistsError
+    is raised.
+    """
+    stem, suffix = os.path.splitext(dst.name)
+    candidate = dst
+    counter = 0
+    while True:
+        try:
+            _link_then_unlink(src, candidate)
+            return candidate
+        except FileExistsError:
+            if not resolve_conflicts:
+                raise
+            counter += 1
+            candidate = dst.with_name(f"{stem}__trash_{counter}{suffix}")
+
+
+def _copy_then_delete(src: Path, dst: Path, resolve_conflicts: bool) -> Path:
+    """
+    Cross-device move: copy to a temporary name next to dst, move it into
+    place (so dst is never half-written, and never replaces a file) and only
+    then delete the source. If the source can't be deleted, dst is removed
+    again, so a failed move leaves no unjournaled copy. Returns the
+    destination used (see _move_no_replace).
+    """
+    tmp = dst.with_name(f".{dst.name}.{uuid.uuid4().hex[:8]}.part")
+    try:
+        shutil.copy2(src, tmp)
+        dst = _move_no_replace(tmp, dst, resolve_conflicts)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
+    try:
+        src.unlink()
+    except FileNotFoundError:
+        # Removed by someone else meanwhile - dst is now the only copy
+        pass
+    except BaseException:
+        dst.unlink(missing_ok=True)
+        raise
+    return dst
+
+
+class _Journal:
+    """
+    Append-only NDJSON journal. One line per completed move:
+        {"op": "move", "batch": ..., "src": ..., "dst": ..., "time": ...}
+    and one line when a batch is undone:
+        {"op": "undo", "batch": ..., "time": ...}
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._file: Optional[TextIO] = None
+        self._unflushed = 0
+
+    def __enter__(self) -> "_Journal":
+        self._file = self.path.open("a", encoding="utf-8")
+        return self
+
+    def write(self, record: Dict[str, str]) -> None:
+        assert self._file is not None
+        record["time"] = datetime.now().isoformat(timespec="seconds")
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+        self._unflushed += 1
+        if self._unflushed >= _JOURNAL_FLUSH_EVERY:
+            self._file.flush()
+            self._unflushed = 0
+
+    def __exit__(self, *exc_info: object) -> None:
+        assert self._file is not None
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+
+
+def _run_moves(
+    plan: List[Tuple[Path, Path]],
+    result: MoveResult,
+    journal: _Journal,
+    copy_workers: int,
+    op: str,
+    resolve_conflicts: bool,
+) -> None:
+    """
+    Execute planned (src, dst) moves: a hard link + unlink for same-device
+    moves (metadata operations only), concurrent copy + delete for the rest.
+    An existing file is never replaced: a destination that appeared since
+    planning gets the next free name (resolve_conflicts) or the move fails.
+    Every completed move is written to the journal with its actual destination.
+    """
+    cross_device: List[Tuple[Path, Path]] = []
+
+    for src, dst in plan:
+        try:
+            dst = _move_no_replace(src, dst, resolve_conflicts)
+        except FileNotFoundError:
+            # File disappeared since the scan
+            result.skipped.append(src)
+            continue
+        except OSError as exc:
+            if exc.errno == errno.EXDEV:
+                cross_device.append((src, dst))
+            else:
+                result.failed.append((src, str(exc)))
+            continue
+
+        result.moved.append((src, dst))
+        journal.write({"op": op, "batch": result.batch_id, "src": str(src), "dst": str(dst)})
+
+    if not cross_device:
+        return
+
+    # Copies are I/O bound (network shares, USB disks) - run them side by side
+    with ThreadPoolExecutor(max_workers=copy_workers) as executor:
+        futures = [
+            (src, executor.submit(_copy_then_delete, src, dst, resolve_conflicts))
+            for src, dst in cross_device
+        ]
+
+        for src, future in futures:
+            try:
+                dst = future.result()
+            except FileNotFoundError:
+                result.skipped.append(src)
+                continue
+            except OSError as exc:
+                result.failed.append((src, str(exc)))
+                continue
+
+            result.moved.append((src, dst))
+            result.copied += 1
+            journal.write({"op": op, "batch": result.batch_id, "src": str(src), "dst": str(dst)})
+
+
+def move_files(
+    sources: Iterable[Path],
+    dest_dir: Path,
+    copy_workers: int = DEFAULT_COPY_WORKERS,
+    journal_path: Optional[Path] = None,
+) -> MoveResult:
+    """
+    Move files into dest_dir as one journaled batch.
+
+    Name collisions get a "__trash_N" suffix (see plan_moves). Every
+    completed move is appended to the journal (dest_dir/JOURNAL_FILE_NAME
+    by default), so the whole batch can be reverted with undo_batch().
+    Missing sources are skipped, other errors are collected in failed -
+    one bad file doesn't stop the batch.
+    """
+    dest_dir = Path(dest_dir)
+    dest_dir.mkdir(parents=True, exist_ok=True)
+    if journal_path is None:
+        journal_path = dest_dir / JOURNAL_FILE_NAME
+
+    result = MoveResult(batch_id=uuid.uuid4().hex)
+    plan = plan_moves(sources, dest_dir)
+
+    with _Journal(journal_path) as journal:
+        _run_moves(plan, result, journal, copy_workers, "move", resolve_conflicts=True)
+
+    return result
+
+
+def read_journal(journal_path: Path) -> Dict[str, List[Tuple[Path, Path]]]:
+    """
+    Return the batches of a journal that were not undone yet, oldest first:
+    batch id -> (source, destination) pairs in the order they were moved.
+    Files already restored by a partial undo are left out.
+    Damaged lines (e.g. cut off by a crash) are ignored.
+    """
+    # batch id -> {destination: source}, in move order
+    batches: Dict[str, Dict[Path, Path]] = {}
+
+    try:
+        with Path(journal_path).open(encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+
+                batch = record.get("batch")
+                op = record.get("op")
+                if op == "move":
+                    batches.setdefault(batch, {})[Path(record["dst"])] = Path(record["src"])
+                elif op == "restore":
+                    # A restore moves a batch's destination back to its source
+                    batches.get(batch, {}).pop(Path(record["src"]), None)
+                elif op == "undo":
+                    batches.pop(batch, None)
+    except FileNotFoundError:
+        pass
+
+    return {
+        batch: [(src, dst) for dst, src in moves.items()]
+        for batch, moves in batches.items()
+        if moves
+    }
+
+
+def undo_batch(
+    journal_path: Path,
+    batch_id: Optional[str] = None,
+    copy_workers: int = DEFAULT_COPY_WORKERS,
+) -> MoveResult:
+    """
+    Move the files of a batch (default: the last one not undone yet) back
+    to where they came from, in one pass over the journal.
+
+    Files whose original path is taken again (or that fail to move back)
+    are left where they are and reported in failed. The restores are
+    journaled as "restore" lines, and the batch is marked as undone only
+    when nothing failed - otherwise it stays in read_journal() with the
+    files still to restore, so undo_batch() can be run again.
+    """
+    batches = read_journal(journal_path)
+    if batch_id is None:
+        if not batches:
+            return MoveResult(batch_id="")
+        batch_id = next(reversed(batches))
+
+    moves = batches.get(batch_id, [])
+    result = MoveResult(batch_id=batch_id)
+
+    plan: List[Tuple[Path, Path]] = []
+    for src, dst in reversed(moves):
+        if src.exists():
+            # Never overwrite a file that appeared at the original path
+            result.failed.append((dst, f"Original path is taken: {src}"))
+            continue
+        plan.append((dst, src))
+
+    with _Journal(Path(journal_path)) as journal:
+        for parent in {original.parent for _, original in plan}:
+            parent.mkdir(parents=True, exist_ok=True)
+
+        # Never overwrite a file that appeared at an original path meanwhile
+        _run_moves(plan, result, journal, copy_workers, "restore", resolve_conflicts=False)
+        if not result.failed:
+            journal.write({"op": "undo", "batch": batch_id})
+
+    return result
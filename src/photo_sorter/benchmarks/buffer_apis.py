@@ -0,0 +1,138 @@
+"""
+Path-based vs buffer-based analysis functions: identical results, fewer reads.
+
+    python -m photo_sorter.benchmarks.buffer_apis
+    python -m photo_sorter.benchmarks.buffer_apis ~/Pictures/sample --decode-scale 2
+
+Every photo is analysed with the path functions (compute_file_hash,
+compute_perceptual_hash, compute_blur_score_for_path,
+compute_brightness_score_for_path - each reads the file itself) and with
+their *_for_buffer variants fed from one read as bytes, a memoryview and an
+mmap. Any difference is listed and the exit code is 1. Without a folder, a
+small corpus from benchmarks.corpus is generated in a temporary directory.
+"""
+from __future__ import annotations
+
+import argparse
+import mmap
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from photo_sorter.benchmarks.corpus import ensure_corpus
+from photo_sorter.buffers import ImageBuffer
+from photo_sorter.deduplication.hashing import (
+    compute_file_hash,
+    compute_file_hash_for_buffer,
+    compute_perceptual_hash,
+    compute_perceptual_hash_for_buffer,
+)
+from photo_sorter.quality.analysis import (
+    compute_blur_score_for_buffer,
+    compute_blur_score_for_path,
+    compute_brightness_score_for_buffer,
+    compute_brightness_score_for_path,
+)
+from photo_sorter.scanning.filesystem_scanner import list_photo_paths
+
+# (file hash, pHash, blur, brightness)
+Results = Tuple[Optional[str], Optional[str], Optional[float], Optional[float]]
+
+
+def analyze_path(path: Path, decode_scale: int) -> Results:
+    return (
+        compute_file_hash(path),
+        compute_perceptual_hash(path, decode_scale),
+        compute_blur_score_for_path(path, decode_scale),
+        compute_brightness_score_for_path(path, decode_scale),
+    )
+
+
+def analyze_buffer(data: ImageBuffer, decode_scale: int) -> Results:
+    return (
+        compute_file_hash_for_buffer(data),
+        compute_perceptual_hash_for_buffer(data, decode_scale),
+        compute_blur_score_for_buffer(data, decode_scale),
+        compute_brightness_score_for_buffer(data, decode_scale),
+    )
+
+
+def _with_bytes(path: Path, decode_scale: int) -> Results:
+    return analyze_buffer(path.read_bytes(), decode_scale)
+
+
+def _with_memoryview(path: Path, decode_scale: int) -> Results:
+    # A view into a larger buffer, as a batch reader would hand out
+    data = path.read_bytes()
+    padded = bytearray(b"\0" * 16 + data + b"\0" * 16)
+    with memoryview(padded)[16:16 + len(data)] as view:
+        return analyze_buffer(view, decode_scale)
+
+
+def _with_mmap(path: Path, decode_scale: int) -> Results:
+    with path.open("rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        return analyze_buffer(mapped, decode_scale)
+
+
+VARIANTS: Dict[str, Callable[[Path, int], Results]] = {
+    "bytes": _with_bytes,
+    "memoryview": _with_memoryview,
+    "mmap": _with_mmap,
+}
+
+
+def compare(paths: List[Path], decode_scale: int = 1) -> Tuple[List[str], Dict[str, float]]:
+    """
+    Return the mismatches between the path functions and every buffer
+    variant, and the seconds each took for all paths.
+    """
+    mismatches = []
+    seconds: Dict[str, float] = {}
+
+    start = time.perf_counter()
+    expected = [analyze_path(path, decode_scale) for path in paths]
+    seconds["path"] = time.perf_counter() - start
+
+    for name, analyze in VARIANTS.items():
+        start = time.perf_counter()
+        results = [analyze(path, decode_scale) for path in paths]
+        seconds[name] = time.perf_counter() - start
+
+        for path, want, got in zip(paths, expected, results):
+            if want != got:
+                mismatches.append(f"{name}: {path.name}: {got} != {want}")
+
+    return mismatches, seconds
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("folder", type=Path, nargs="?", default=None, help="Photos to compare (default: generated)")
+    parser.add_argument("--count", type=int, default=60, help="Generated photos (without a folder)")
+    parser.add_argument("--limit", type=int, default=200, help="Compare at most this many photos of the folder")
+    parser.add_argument("--decode-scale", type=int, default=1, choices=(1, 2, 4, 8))
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        folder = args.folder
+        if folder is None:
+            folder = Path(tmp)
+            ensure_corpus(folder, args.count)
+        paths = list_photo_paths(folder)[: args.limit]
+        if not paths:
+            parser.error("no photos to compare")
+
+        mismatches, seconds = compare(paths, args.decode_scale)
+
+    print(f"{len(paths)} photos, decode scale 1/{args.decode_scale}")
+    for name, value in seconds.items():
+        print(f"  {name:<12}{value:>8.3f} s")
+    for mismatch in mismatches:
+        print(f"MISMATCH {mismatch}")
+    print(f"{len(mismatches)} mismatches")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
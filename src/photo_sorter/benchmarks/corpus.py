@@ -0,0 +1,258 @@
+"""
+Deterministic synthetic photo corpus for benchmarks.
+
+    python -m photo_sorter.benchmarks.corpus OUT_DIR --count 500 --seed 0
+
+The same count and seed always give the same files. Besides ordinary
+photos the corpus has planted cases with a known right answer, listed in
+OUT_DIR/manifest.json:
+ - exact duplicates (byte copies),
+ - near duplicates (re-encoded at a lower JPEG quality, or downscaled to 3/4),
+ - potential trash (heavily blurred, too dark, overexposed),
+ - EXIF capture dates (JPEG APP1 and PNG eXIf, some files without).
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import shutil
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageEnhance, ImageFilter
+
+# Bump when generated files change - reused corpus folders are then rebuilt
+CORPUS_VERSION = 1
+
+MANIFEST_FILE_NAME = "manifest.json"
+
+# Image sizes (width, height), drawn at random for every photo
+IMAGE_SIZES = (
+    (640, 480),
+    (800, 600),
+    (1024, 768),
+    (1280, 960),
+    (1600, 1200),
+    (768, 1024),
+)
+
+# What a generated photo is; every kind but "original" is planted
+KINDS = (
+    "original",
+    "exact_copy",
+    "reencoded",
+    "resized",
+    "blurred",
+    "dark",
+    "overexposed",
+)
+
+# Share of each planted kind in the corpus (the rest are originals)
+_PLANTED_SHARES = {
+    "exact_copy": 0.08,
+    "reencoded": 0.08,
+    "resized": 0.08,
+    "blurred": 0.05,
+    "dark": 0.05,
+    "overexposed": 0.05,
+}
+
+_EXIF_DATETIME_ORIGINAL = 0x9003
+_EXIF_IFD = 0x8769
+
+
+@dataclass
+class CorpusManifest:
+    """
+    What was planted in a corpus. File names are relative to the corpus folder.
+    """
+
+    version: int
+    seed: int
+    count: int
+    kinds: Dict[str, str] = field(default_factory=dict)  # file name -> kind
+    taken_at: Dict[str, Optional[str]] = field(default_factory=dict)  # EXIF date (ISO) or None
+    exact_groups: List[List[str]] = field(default_factory=list)
+    near_groups: List[List[str]] = field(default_factory=list)  # original + its variants
+    trash: List[str] = field(default_factory=list)
+
+    def save(self, folder: Path) -> None:
+        (folder / MANIFEST_FILE_NAME).write_text(json.dumps(asdict(self), indent=1), encoding="utf-8")
+
+    @classmethod
+    def load(cls, folder: Path) -> Optional["CorpusManifest"]:
+        try:
+            data = json.loads((folder / MANIFEST_FILE_NAME).read_text(encoding="utf-8"))
+            return cls(**data)
+        except (OSError, ValueError, TypeError):
+            return None
+
+
+def _render_scene(rng: np.random.Generator, size: Tuple[int, int]) -> Image.Image:
+    """
+    A photo-like picture: smooth gradient background, random shapes and
+    sensor-like noise, so blur, brightness and pHash behave
+    roughly like on real photos.
+    """
+    width, height = size
+    # Gradient rendered small and scaled up - much cheaper than per-pixel maths
+    corners = rng.uniform(50, 210, size=(2, 2, 3)).astype(np.uint8)
+    img = Image.fromarray(corners, "RGB").resize((width, height), Image.BILINEAR)
+
+    draw = ImageDraw.Draw(img)
+    for _ in range(int(rng.integers(8, 20))):
+        x0, x1 = sorted(rng.integers(0, width, 2))
+        y0, y1 = sorted(rng.integers(0, height, 2))
+        colour = tuple(int(c) for c in rng.integers(20, 235, 3))
+        if rng.random() < 0.5:
+            draw.ellipse((x0, y0, x1 + 8, y1 + 8), fill=colour)
+        else:
+            draw.rectangle((x0, y0, x1 + 8, y1 + 8), fill=colour)
+
+    # Sensor-like noise, the same on all channels (uniform, std ~7)
+    noise = rng.integers(-12, 13, (height, width, 1), dtype=np.int16)
+    pixels = np.asarray(img, dtype=np.int16) + noise
+    return Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8), "RGB")
+
+
+def _exif_bytes(taken_at: Optional[datetime]) -> bytes:
+    if taken_at is None:
+        return b""
+    exif = Image.Exif()
+    exif.get_ifd(_EXIF_IFD)[_EXIF_DATETIME_ORIGINAL] = taken_at.strftime("%Y:%m:%d %H:%M:%S")
+    return exif.tobytes()
+
+
+def _save(img: Image.Image, path: Path, taken_at: Optional[datetime], quality: int = 90) -> None:
+    exif = _exif_bytes(taken_at)
+    if path.suffix == ".png":
+        img.save(path, "PNG", exif=exif, compress_level=1)
+    else:
+        img.save(path, "JPEG", exif=exif, quality=quality)
+
+
+def _plan_kinds(count: int, rng: random.Random) -> List[str]:
+    kinds: List[str] = []
+    for kind, share in _PLANTED_SHARES.items():
+        kinds.extend([kind] * int(count * share))
+    kinds.extend(["original"] * (count - len(kinds)))
+    rng.shuffle(kinds)
+    return kinds
+
+
+def generate_corpus(folder: Path, count: int, seed: int = 0) -> CorpusManifest:
+    """
+    Write count photos into folder (created if needed) and return the manifest
+    (also saved as folder/manifest.json).
+
+    Exact copies and near duplicates are derived from earlier originals; if
+    no original exists yet when one is due, an original is written instead.
+    Trash images are degraded versions of scenes not used anywhere else.
+    """
+    folder.mkdir(parents=True, exist_ok=True)
+    rng = random.Random(seed)
+    manifest = CorpusManifest(version=CORPUS_VERSION, seed=seed, count=count)
+
+    start = datetime(2012, 1, 1)
+    originals: List[str] = []
+    near_of: Dict[str, List[str]] = {}
+    exact_of: Dict[str, List[str]] = {}
+
+    for i, kind in enumerate(_plan_kinds(count, rng)):
+        if kind in ("exact_copy", "reencoded", "resized") and not originals:
+            kind = "original"
+
+        # Same seed -> same scene, whatever happened before
+        scene_rng = np.random.default_rng([seed, i])
+        png = rng.random() < 0.2 and kind not in ("reencoded", "resized")
+        name = f"photo_{i:06d}{'.png' if png else '.jpg'}"
+        path = folder / name
+        taken_at: Optional[datetime] = None
+        if rng.random() < 0.85:
+            taken_at = start + timedelta(seconds=rng.randrange(10 * 365 * 86400))
+
+        if kind == "exact_copy":
+            source = rng.choice(originals)
+            name = f"photo_{i:06d}{Path(source).suffix}"
+            path = folder / name
+            shutil.copyfile(folder / source, path)
+            exact_of.setdefault(source, [source]).append(name)
+            taken_at_text = manifest.taken_at[source]
+        elif kind in ("reencoded", "resized"):
+            source = rng.choice(originals)
+            with Image.open(folder / source) as src:
+                img = src.convert("RGB")
+            if kind == "resized":
+                img = img.resize((img.width * 3 // 4, img.height * 3 // 4), Image.LANCZOS)
+                _save(img, path, taken_at, quality=85)
+            else:
+                _save(img, path, taken_at, quality=70)
+            near_of.setdefault(source, [source]).append(name)
+            taken_at_text = taken_at.isoformat() if taken_at else None
+        else:
+            img = _render_scene(scene_rng, IMAGE_SIZES[rng.randrange(len(IMAGE_SIZES))])
+            if kind == "blurred":
+                img = img.filter(ImageFilter.GaussianBlur(radius=8))
+            elif kind == "dark":
+                img = ImageEnhance.Brightness(img).enhance(0.15)
+            elif kind == "overexposed":
+                # Washed out: everything squeezed into the top of the range
+                img = img.point(lambda v: 200 + v // 4)
+            _save(img, path, taken_at)
+            taken_at_text = taken_at.isoformat() if taken_at else None
+
+            if kind == "original":
+                originals.append(name)
+            else:
+                manifest.trash.append(name)
+
+        manifest.kinds[name] = kind
+        manifest.taken_at[name] = taken_at_text
+
+    manifest.exact_groups = list(exact_of.values())
+    manifest.near_groups = list(near_of.values())
+    manifest.save(folder)
+    return manifest
+
+
+def ensure_corpus(folder: Path, count: int, seed: int = 0) -> CorpusManifest:
+    """
+    Reuse the corpus in folder if it was generated with the same count, seed
+    and CORPUS_VERSION, otherwise (re)generate it.
+    """
+    manifest = CorpusManifest.load(folder)
+    if (
+        manifest is not None
+        and manifest.version == CORPUS_VERSION
+        and manifest.count == count
+        and manifest.seed == seed
+        and all((folder / name).exists() for name in manifest.kinds)
+    ):
+        return manifest
+
+    if folder.exists():
+        shutil.rmtree(folder)
+    return generate_corpus(folder, count, seed)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("folder", type=Path, help="Output folder")
+    parser.add_argument("--count", type=int, default=200, help="Number of photos")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    args = parser.parse_args(argv)
+
+    manifest = ensure_corpus(args.folder, args.count, args.seed)
+    kinds: Dict[str, int] = {}
+    for kind in manifest.kinds.values():
+        kinds[kind] = kinds.get(kind, 0) + 1
+    print(f"{manifest.count} photos in {args.folder}: " + ", ".join(f"{n} {k}" for k, n in sorted(kinds.items())))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,138 @@
+"""
+Header-only EXIF date reader vs the Pillow path (Image.open + _getexif).
+
+    python -m photo_sorter.benchmarks.exif_dates ~/Pictures
+    python -m photo_sorter.benchmarks.exif_dates --synthetic 3000
+
+Both readers run over the same files; the dates they return are compared
+and any difference is listed. --synthetic generates small JPEG/PNG files
+with a mix of EXIF layouts (date tags in IFD0 or the Exif IFD, big/little
+endian, embedded thumbnail, no EXIF) in a temporary folder.
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+from io import BytesIO
+from pathlib import Path
+from typing import Callable, List, Optional
+
+from PIL import Image
+
+from photo_sorter.scanning.filesystem_scanner import list_photo_paths
+from photo_sorter.scanning.image_analyzer import _exif_datetime_from_image, _get_exif_datetime
+
+
+def _pil_exif_datetime(path: Path) -> Optional[datetime]:
+    # The previous implementation of _get_exif_datetime
+    try:
+        with Image.open(path) as img:
+            return _exif_datetime_from_image(img)
+    except Exception:
+        return None
+
+
+def generate_exif_corpus(folder: Path, count: int, seed: int = 0) -> List[Path]:
+    """
+    Write count small photos with varied EXIF date layouts into folder.
+    """
+    rng = random.Random(seed)
+    start = datetime(2015, 1, 1)
+    thumbnail = BytesIO()
+    Image.new("RGB", (160, 120), (90, 120, 150)).save(thumbnail, "JPEG", quality=90)
+    paths = []
+
+    for i in range(count):
+        img = Image.new("RGB", (64, 48), (rng.randrange(256), 80, 160))
+        exif = Image.Exif()
+        taken = (start + timedelta(seconds=rng.randrange(300_000_000))).strftime("%Y:%m:%d %H:%M:%S")
+
+        layout = i % 5
+        if layout == 0:
+            exif[0x0132] = taken  # DateTime in IFD0 only
+        elif layout in (1, 2):
+            exif[0x0132] = "2000:01:01 00:00:00"
+            exif.get_ifd(0x8769)[0x9003] = taken  # DateTimeOriginal in the Exif IFD
+            exif.get_ifd(0x8769)[0x9004] = taken
+        elif layout == 3:
+            exif.get_ifd(0x8769)[0x9004] = taken  # only DateTimeDigitized
+            exif[0x010F] = "Camera maker " * 20  # push data further into the segment
+
+        if layout == 4:
+            exif_bytes = b""  # no EXIF at all
+        else:
+            exif_bytes = exif.tobytes()
+            if layout == 2 and len(exif_bytes) + len(thumbnail.getvalue()) < 60_000:
+                # Big segment: the date is behind the first read
+                exif_bytes = exif_bytes + b"\x00" * 8000
+
+        if i % 7 == 0:
+            path = folder / f"img{i:05d}.png"
+            img.save(path, "PNG", exif=exif_bytes)
+        else:
+            path = folder / f"img{i:05d}.jpg"
+            img.save(path, "JPEG", exif=exif_bytes)
+        paths.append(path)
+
+    return paths
+
+
+def _time_reader(reader: Callable[[Path], Optional[datetime]], paths: List[Path]):
+    start = time.perf_counter()
+    results = [reader(path) for path in paths]
+    return results, time.perf_counter() - start
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("folder", type=Path, nargs="?", help="Folder with photos")
+    parser.add_argument("--synthetic", type=int, default=0, help="Generate this many files instead")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per reader (best is shown)")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.synthetic:
+            paths = generate_exif_corpus(Path(tmp), args.synthetic)
+        elif args.folder is not None:
+            paths = list_photo_paths(args.folder)
+        else:
+            parser.error("give a folder or --synthetic N")
+
+        if not paths:
+            print("No photos found")
+            return 1
+
+        timings = {}
+        for name, reader in (("pillow", _pil_exif_datetime), ("header", _get_exif_datetime)):
+            best = None
+            for _ in range(args.repeat):
+                results, elapsed = _time_reader(reader, paths)
+                best = elapsed if best is None else min(best, elapsed)
+            timings[name] = (results, best)
+
+        pil_results, pil_time = timings["pillow"]
+        header_results, header_time = timings["header"]
+
+        with_date = sum(1 for dt in header_results if dt is not None)
+        print(f"{len(paths)} files, {with_date} with an EXIF date")
+        print(f"pillow: {pil_time:.3f} s ({len(paths) / pil_time:,.0f} files/s)")
+        print(f"header: {header_time:.3f} s ({len(paths) / header_time:,.0f} files/s)")
+        print(f"speedup: {pil_time / header_time:.1f}x")
+
+        mismatches = [
+            (path, old, new)
+            for path, old, new in zip(paths, pil_results, header_results)
+            if old != new
+        ]
+        for path, old, new in mismatches[:20]:
+            print(f"MISMATCH {path}: pillow={old} header={new}")
+        print(f"{len(mismatches)} mismatches")
+
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
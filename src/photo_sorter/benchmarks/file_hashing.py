@@ -0,0 +1,137 @@
+"""
+File hashing throughput in MB/s per algorithm, read method and buffer size.
+
+    python -m photo_sorter.benchmarks.file_hashing
+    python -m photo_sorter.benchmarks.file_hashing ~/Pictures/sample --threads 1 4 8
+
+Without a folder, --count random files of --file-mb MB are generated in a
+temporary directory. Every file is read once before timing, so the numbers
+are for a warm OS page cache - they show the cost of hashing and copying,
+not of the disk. 8 KiB was the buffer size before DEFAULT_HASH_BUFFER_SIZE.
+The thread runs hash whole files in parallel with the fastest method, like
+annotate_photos_with_file_hash(threads=N).
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple
+
+from photo_sorter.deduplication.hashing import (
+    FILE_HASH_ALGORITHMS,
+    compute_file_hash,
+)
+from photo_sorter.scanning.filesystem_scanner import list_photo_paths
+
+DEFAULT_BUFFER_SIZES = (8 * 1024, 64 * 1024, 1024 * 1024, 4 * 1024 * 1024)
+
+
+def _generate_files(folder: Path, count: int, file_mb: float) -> List[Path]:
+    paths = []
+    for i in range(count):
+        path = folder / f"random_{i:04d}.bin"
+        path.write_bytes(os.urandom(int(file_mb * 1_000_000)))
+        paths.append(path)
+    return paths
+
+
+def _best_seconds(func: Callable[[], object], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def measure(
+    paths: List[Path],
+    buffer_sizes: Tuple[int, ...] = DEFAULT_BUFFER_SIZES,
+    threads: Tuple[int, ...] = (1,),
+    repeat: int = 3,
+) -> List[Tuple[str, str, str, float]]:
+    """
+    Return (algorithm, method, buffer or thread count, MB/s) rows.
+    """
+    total_mb = sum(path.stat().st_size for path in paths) / 1e6
+    for path in paths:
+        path.read_bytes()  # warm the page cache
+
+    rows = []
+    for algorithm in FILE_HASH_ALGORITHMS:
+        best_method, best_rate = "read", 0.0
+
+        for method in ("read", "mmap"):
+            for buffer_size in buffer_sizes:
+                seconds = _best_seconds(
+                    lambda: [compute_file_hash(p, buffer_size, algorithm, method) for p in paths],
+                    repeat,
+                )
+                rate = total_mb / seconds
+                rows.append((algorithm, method, f"{buffer_size // 1024} KiB", rate))
+                if rate > best_rate:
+                    best_method, best_rate = method, rate
+
+        seconds = _best_seconds(
+            lambda: [compute_file_hash(p, algorithm=algorithm, method="file_digest") for p in paths],
+            repeat,
+        )
+        rows.append((algorithm, "file_digest", "256 KiB", total_mb / seconds))
+
+        for count in threads:
+            if count <= 1:
+                continue
+            with ThreadPoolExecutor(max_workers=count) as executor:
+                seconds = _best_seconds(
+                    lambda: list(
+                        executor.map(lambda p: compute_file_hash(p, algorithm=algorithm, method=best_method), paths)
+                    ),
+                    repeat,
+                )
+            rows.append((algorithm, f"{best_method} threads", f"{count} threads", total_mb / seconds))
+
+    return rows
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("folder", type=Path, nargs="?", default=None, help="Photos to hash (default: random files)")
+    parser.add_argument("--count", type=int, default=20, help="Generated files (without a folder)")
+    parser.add_argument("--file-mb", type=float, default=8.0, help="Size of generated files in MB")
+    parser.add_argument("--limit", type=int, default=200, help="Hash at most this many photos of the folder")
+    parser.add_argument(
+        "--buffer-kib",
+        type=int,
+        nargs="+",
+        default=[size // 1024 for size in DEFAULT_BUFFER_SIZES],
+        help="Buffer sizes in KiB",
+    )
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 4], help="Thread counts to try")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs (best is kept)")
+    args = parser.parse_args(argv)
+
+    buffer_sizes = tuple(kib * 1024 for kib in args.buffer_kib)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.folder is not None:
+            paths = list_photo_paths(args.folder)[: args.limit]
+        else:
+            paths = _generate_files(Path(tmp), args.count, args.file_mb)
+        if not paths:
+            parser.error("no files to hash")
+
+        total_mb = sum(path.stat().st_size for path in paths) / 1e6
+        print(f"{len(paths)} files, {total_mb:.1f} MB")
+        print(f"{'algorithm':<10}{'method':<16}{'buffer':>12}{'MB/s':>10}")
+        for algorithm, method, setting, rate in measure(paths, buffer_sizes, tuple(args.threads), args.repeat):
+            print(f"{algorithm:<10}{method:<16}{setting:>12}{rate:>10.0f}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,198 @@
+"""
+Scaling benchmark for near-duplicate grouping on synthetic 64-bit pHashes.
+
+    python -m photo_sorter.benchmarks.near_duplicates
+    python -m photo_sorter.benchmarks.near_duplicates --sizes 10000 100000 --max-distance 8
+    python -m photo_sorter.benchmarks.near_duplicates --sizes 1000000 5000000 --index-max-size 0 --lsh-bands 16
+
+The lsh column is the approximate LSH banding mode; its recall is measured
+on --recall-sample hashes against exact Hamming distances to all hashes.
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import time
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+
+from photo_sorter.deduplication.grouping import (
+    _find_near_duplicate_groups_by_scan,
+    find_near_duplicate_groups,
+)
+from photo_sorter.deduplication.index import find_near_duplicate_components
+from photo_sorter.deduplication.lsh import (
+    DEFAULT_BAND_BITS,
+    DEFAULT_NUM_BANDS,
+    candidate_probability,
+    find_near_duplicate_components_lsh,
+    measure_lsh_recall,
+)
+from photo_sorter.deduplication.packed import (
+    find_near_duplicate_components_packed,
+    pack_hex_hashes,
+)
+from photo_sorter.scanning.models import PhotoInfo
+
+
+HASH_BITS = 64
+
+
+def generate_synthetic_hashes(
+    count: int,
+    seed: int = 0,
+    cluster_fraction: float = 0.3,
+    max_cluster_size: int = 6,
+    max_flips: int = 4,
+) -> List[int]:
+    """
+    Deterministic synthetic pHashes: mostly unrelated random hashes plus
+    clusters of near duplicates (a random centre with a few flipped bits),
+    roughly like a photo library with bursts and re-encoded copies.
+    """
+    rng = random.Random(seed)
+    hashes: List[int] = []
+
+    while len(hashes) < count:
+        centre = rng.getrandbits(HASH_BITS)
+        hashes.append(centre)
+
+        if rng.random() < cluster_fraction:
+            for _ in range(rng.randint(1, max_cluster_size - 1)):
+                value = centre
+                for bit in rng.sample(range(HASH_BITS), rng.randint(0, max_flips)):
+                    value ^= 1 << bit
+                hashes.append(value)
+
+    hashes = hashes[:count]
+    rng.shuffle(hashes)
+    return hashes
+
+
+def _to_photos(hashes: List[int]) -> List[PhotoInfo]:
+    return [
+        PhotoInfo(
+            path=Path(f"synthetic/{i}.jpg"),
+            file_name=f"{i}.jpg",
+            size_bytes=0,
+            taken_at=None,
+            perceptual_hash=f"{value:016x}",
+        )
+        for i, value in enumerate(hashes)
+    ]
+
+
+def verify_against_scan(size: int, max_distance: int, seed: int) -> bool:
+    """
+    Check that the indexed grouping returns exactly the same groups
+    (same members in the same order) as the original O(n^2) scan.
+    """
+    photos = _to_photos(generate_synthetic_hashes(size, seed=seed))
+    indexed = find_near_duplicate_groups(photos, max_distance=max_distance)
+    scanned = _find_near_duplicate_groups_by_scan(photos, max_distance)
+    return indexed == scanned
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--max-distance", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--verify-size",
+        type=int,
+        default=2_000,
+        help="Size of the corpus compared against the O(n^2) scan (0 = skip)",
+    )
+    parser.add_argument(
+        "--scan-max-size",
+        type=int,
+        default=20_000,
+        help="Also time the O(n^2) scan for sizes up to this value",
+    )
+    parser.add_argument(
+        "--numpy-max-size",
+        type=int,
+        default=100_000,
+        help="Also time the blockwise NumPy all-pairs kernel for sizes up to this value",
+    )
+    parser.add_argument(
+        "--index-max-size",
+        type=int,
+        default=1_000_000,
+        help="Time the exact multi-index grouping for sizes up to this value",
+    )
+    parser.add_argument("--lsh-bands", type=int, default=DEFAULT_NUM_BANDS, help="LSH bands")
+    parser.add_argument("--lsh-band-bits", type=int, default=DEFAULT_BAND_BITS, help="pHash bits per LSH band")
+    parser.add_argument(
+        "--recall-sample",
+        type=int,
+        default=1_000,
+        help="Hashes the LSH recall is measured on (0 = skip)",
+    )
+    args = parser.parse_args(argv)
+
+    if args.verify_size:
+        same = verify_against_scan(args.verify_size, args.max_distance, args.seed)
+        print(f"Verification on {args.verify_size} hashes: {'identical' if same else 'MISMATCH'}")
+        if not same:
+            return 1
+
+    expected = candidate_probability(args.max_distance, HASH_BITS, args.lsh_bands, args.lsh_band_bits)
+    print(
+        f"LSH: {args.lsh_bands} bands of {args.lsh_band_bits} bits - a pair at distance "
+        f"{args.max_distance} becomes a candidate with probability {expected:.3f}"
+    )
+    print(
+        f"{'hashes':>10} {'index [s]':>10} {'numpy [s]':>10} {'scan [s]':>10}"
+        f" {'lsh [s]':>10} {'lsh recall':>11} {'groups':>8} {'in groups':>10}"
+    )
+
+    for size in args.sizes:
+        hashes = generate_synthetic_hashes(size, seed=args.seed)
+
+        index_col = "-"
+        if size <= args.index_max_size:
+            start = time.perf_counter()
+            find_near_duplicate_components(hashes, HASH_BITS, args.max_distance)
+            index_col = f"{time.perf_counter() - start:.2f}"
+
+        numpy_col = "-"
+        if size <= args.numpy_max_size:
+            packed = pack_hex_hashes([f"{value:016x}" for value in hashes])
+            start = time.perf_counter()
+            find_near_duplicate_components_packed(packed, args.max_distance)
+            numpy_col = f"{time.perf_counter() - start:.2f}"
+
+        scan_col = "-"
+        if size <= args.scan_max_size:
+            photos = _to_photos(hashes)
+            start = time.perf_counter()
+            _find_near_duplicate_groups_by_scan(photos, args.max_distance)
+            scan_col = f"{time.perf_counter() - start:.2f}"
+
+        packed = np.array(hashes, dtype=np.uint64).reshape(-1, 1)
+        start = time.perf_counter()
+        components = find_near_duplicate_components_lsh(
+            packed, args.max_distance, args.lsh_bands, args.lsh_band_bits
+        )
+        lsh_time = time.perf_counter() - start
+
+        recall_col = "-"
+        if args.recall_sample:
+            recall = measure_lsh_recall(packed, components, args.max_distance, args.recall_sample, args.seed)
+            recall_col = f"{recall.recall:.4f}"
+
+        in_groups = sum(len(c) for c in components)
+        print(
+            f"{size:>10} {index_col:>10} {numpy_col:>10} {scan_col:>10}"
+            f" {lsh_time:>10.2f} {recall_col:>11} {len(components):>8} {in_groups:>10}"
+        )
+
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,140 @@
+"""
+Memory benchmark of photo collections: dict-based dataclasses vs slotted PhotoInfo vs PhotoTable.
+
+    python -m photo_sorter.benchmarks.photo_memory
+    python -m photo_sorter.benchmarks.photo_memory --sizes 100000 1000000
+
+Synthetic photos (realistic paths, dates, SHA-256 and pHash hex strings,
+scores) are built in three layouts and the memory each retains is measured
+with tracemalloc, which also sees NumPy's buffers. "dict dataclass" is the
+PhotoInfo layout before __slots__. The grouping and trash functions are
+timed on the list and on the table as well.
+"""
+from __future__ import annotations
+
+import argparse
+import gc
+import random
+import time
+import tracemalloc
+from dataclasses import MISSING, field, fields, make_dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from photo_sorter.deduplication.grouping import (
+    find_exact_duplicate_groups,
+    find_near_duplicate_groups,
+)
+from photo_sorter.quality.analysis import find_potential_trash_photos
+from photo_sorter.scanning.models import PhotoInfo
+from photo_sorter.scanning.photo_table import PhotoTable
+
+# PhotoInfo as it was before __slots__ (a regular dataclass with a __dict__)
+DictPhotoInfo = make_dataclass(
+    "DictPhotoInfo",
+    [
+        (f.name, f.type) if f.default is MISSING else (f.name, f.type, field(default=f.default))
+        for f in fields(PhotoInfo)
+    ],
+)
+
+PHOTOS_PER_DIR = 200
+EXACT_DUPLICATE_SHARE = 0.05
+
+
+def generate_photos(count: int, seed: int = 0, factory: Callable[..., Any] = PhotoInfo) -> Iterator[Any]:
+    """
+    Yield count synthetic, fully analysed photos made by factory (every
+    string is a separate object, as after a real scan).
+    """
+    rng = random.Random(seed)
+    start = datetime(2010, 1, 1)
+    digest = rng.randbytes(32)
+
+    for i in range(count):
+        # About one photo an hour, PHOTOS_PER_DIR per event folder
+        taken_at = start + timedelta(seconds=i * 3600 + rng.randrange(3600))
+        folder = f"/home/user/Pictures/{taken_at.year}/event-{i // PHOTOS_PER_DIR:05d}"
+        name = f"IMG_{i:07d}.JPG"
+        if rng.random() >= EXACT_DUPLICATE_SHARE:
+            digest = rng.randbytes(32)
+
+        yield factory(
+            path=Path(folder, name),
+            file_name=name,
+            size_bytes=rng.randrange(500_000, 8_000_000),
+            taken_at=taken_at if rng.random() < 0.9 else None,
+            file_hash=digest.hex(),
+            perceptual_hash=f"{rng.getrandbits(64):016x}",
+            blur_score=rng.uniform(0.0, 2000.0),
+            brightness_score=rng.uniform(0.0, 255.0),
+        )
+
+
+def _retained_bytes(build: Callable[[], Any]) -> Tuple[int, Any]:
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        result = build()
+        gc.collect()
+        return tracemalloc.get_traced_memory()[0] - before, result
+    finally:
+        tracemalloc.stop()
+
+
+def _seconds(func: Callable[[], Any]) -> float:
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def measure(count: int, seed: int = 0) -> Dict[str, Dict[str, float]]:
+    """
+    Retained bytes per photo of each layout and seconds of the
+    grouping/trash functions on the slotted list and on the table.
+    """
+    results: Dict[str, Dict[str, float]] = {}
+
+    size, photos = _retained_bytes(lambda: list(generate_photos(count, seed, DictPhotoInfo)))
+    results["dict dataclass"] = {"bytes_per_photo": size / count}
+    del photos
+
+    size, photos = _retained_bytes(lambda: list(generate_photos(count, seed)))
+    results["slotted PhotoInfo"] = {"bytes_per_photo": size / count}
+
+    size, table = _retained_bytes(lambda: PhotoTable.from_photos(generate_photos(count, seed)))
+    results["PhotoTable"] = {"bytes_per_photo": size / count}
+
+    for name, collection in (("slotted PhotoInfo", photos), ("PhotoTable", table)):
+        results[name]["exact_groups_s"] = _seconds(lambda: find_exact_duplicate_groups(collection))
+        results[name]["near_groups_s"] = _seconds(lambda: find_near_duplicate_groups(collection))
+        results[name]["trash_s"] = _seconds(lambda: find_potential_trash_photos(collection))
+
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    for count in args.sizes:
+        results = measure(count, args.seed)
+        print(f"\n{count} photos")
+        print(f"  {'layout':<20}{'B/photo':>9}{'MiB':>9}{'exact [s]':>11}{'near [s]':>10}{'trash [s]':>11}")
+        for layout, data in results.items():
+            timings = "".join(
+                f"{data[key]:>{width}.3f}" if key in data else f"{'-':>{width}}"
+                for key, width in (("exact_groups_s", 11), ("near_groups_s", 10), ("trash_s", 11))
+            )
+            per_photo = data["bytes_per_photo"]
+            print(f"  {layout:<20}{per_photo:>9.0f}{per_photo * count / 2**20:>9.1f}{timings}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
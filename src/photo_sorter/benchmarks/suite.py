@@ -0,0 +1,362 @@
+"""
+Benchmark suite: every pipeline stage on synthetic corpora of several sizes.
+
+    python -m photo_sorter.benchmarks.suite --sizes 100 500 --save-baseline baseline.json
+    python -m photo_sorter.benchmarks.suite --sizes 100 500 --baseline baseline.json
+
+Corpora come from benchmarks.corpus (deterministic, with planted duplicates,
+trash and EXIF dates) and are kept in --corpus-dir between runs. Every stage
+runs --repeat times and the best time is reported, so the numbers are for a
+warm OS page cache. Besides timings the suite checks the results against
+what was planted (exact groups, near-duplicate and trash recall, EXIF dates),
+and the trash verdicts of reduced decodes against full-resolution ones,
+so a faster but wrong change shows up too.
+
+With --baseline, stages more than --tolerance slower than the baseline and
+any drop in accuracy are reported as regressions (exit code 1). Baselines
+are only comparable on the same machine.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import PIL
+
+from photo_sorter.benchmarks.corpus import CorpusManifest, ensure_corpus
+from photo_sorter.deduplication.grouping import (
+    find_exact_duplicate_groups,
+    find_near_duplicate_groups,
+)
+from photo_sorter.deduplication.hashing import (
+    annotate_photos_with_file_hash,
+    annotate_photos_with_perceptual_hash,
+)
+from photo_sorter.pipeline.single_pass import analyze_photo_paths
+from photo_sorter.quality.analysis import (
+    DECODE_SCALES,
+    annotate_photos_with_quality,
+    find_potential_trash_photos,
+)
+from photo_sorter.quality.batch import annotate_photos_with_quality_batched
+from photo_sorter.scanning.filesystem_scanner import list_photo_entries
+from photo_sorter.scanning.image_analyzer import build_photo_infos
+from photo_sorter.scanning.models import PhotoInfo
+
+# Bump when stages or checks change meaning - older baselines are then refused
+SUITE_VERSION = 1
+
+DEFAULT_SIZES = (100, 500)
+
+# Stages in run order. The step-by-step stages (exif .. quality) are what
+# analyze_photo_paths replaces in one pass; both are kept to compare.
+# quality_batched is quality.batch's engine at its default batch and working size.
+STAGES = (
+    "walk",
+    "exif",
+    "file_hash",
+    "phash",
+    "quality",
+    "quality_batched",
+    "single_pass",
+    "exact_groups",
+    "near_groups",
+    "trash",
+)
+
+
+def _best_time(func: Callable[[], Any], repeat: int) -> Tuple[float, Any]:
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def _fresh(photos: List[PhotoInfo]) -> List[PhotoInfo]:
+    # Copies without the fields the annotate_* stages fill in (they skip filled ones)
+    return [PhotoInfo(p.path, p.file_name, p.size_bytes, p.taken_at) for p in photos]
+
+
+def time_stages(
+    folder: Path, repeat: int, workers: Optional[int]
+) -> Tuple[Dict[str, float], List[PhotoInfo], List[PhotoInfo]]:
+    """
+    Time every stage on the photos in folder; returns seconds per stage,
+    the photos analysed by the single-pass stage and the photos scored by
+    the batched quality stage.
+    """
+    seconds: Dict[str, float] = {}
+
+    def quality_batched(photos: List[PhotoInfo]) -> List[PhotoInfo]:
+        annotate_photos_with_quality_batched(photos, workers)
+        return photos
+
+    seconds["walk"], entries = _best_time(lambda: list_photo_entries(folder), repeat)
+    seconds["exif"], base = _best_time(lambda: build_photo_infos(entries, workers), repeat)
+    seconds["file_hash"], _ = _best_time(
+        lambda: annotate_photos_with_file_hash(_fresh(base), workers), repeat
+    )
+    seconds["phash"], _ = _best_time(
+        lambda: annotate_photos_with_perceptual_hash(_fresh(base), workers), repeat
+    )
+    seconds["quality"], _ = _best_time(
+        lambda: annotate_photos_with_quality(_fresh(base), workers), repeat
+    )
+    seconds["quality_batched"], batched = _best_time(lambda: quality_batched(_fresh(base)), repeat)
+    seconds["single_pass"], photos = _best_time(
+        lambda: analyze_photo_paths(entries, workers=workers), repeat
+    )
+    seconds["exact_groups"], _ = _best_time(lambda: find_exact_duplicate_groups(photos), repeat)
+    seconds["near_groups"], _ = _best_time(lambda: find_near_duplicate_groups(photos), repeat)
+    seconds["trash"], _ = _best_time(lambda: find_potential_trash_photos(photos), repeat)
+
+    return seconds, photos, batched
+
+
+def check_trash(manifest: CorpusManifest, photos: List[PhotoInfo]) -> Dict[str, float]:
+    """
+    Recall and precision of find_potential_trash_photos on photos with
+    quality scores against the planted trash (1.0 = all right).
+    """
+    trash = {p.file_name for p in find_potential_trash_photos(photos)}
+    planted_trash = set(manifest.trash)
+    found = len(trash & planted_trash)
+    return {
+        "trash_recall": found / len(planted_trash) if planted_trash else 1.0,
+        # Share of flagged photos that really are planted trash
+        "trash_precision": found / len(trash) if trash else 1.0,
+    }
+
+
+def check_accuracy(manifest: CorpusManifest, photos: List[PhotoInfo]) -> Dict[str, float]:
+    """
+    Compare analysed photos with what was planted in the corpus (1.0 = all right).
+    """
+    by_name = {photo.file_name: photo for photo in photos}
+
+    found_exact = sorted(sorted(p.file_name for p in group) for group in find_exact_duplicate_groups(photos))
+    exact_ok = found_exact == sorted(sorted(group) for group in manifest.exact_groups)
+
+    near_groups = [{p.file_name for p in group} for group in find_near_duplicate_groups(photos)]
+    near_found = sum(
+        1 for planted in manifest.near_groups if any(set(planted) <= group for group in near_groups)
+    )
+
+    dates_ok = 0
+    for name, taken_at in manifest.taken_at.items():
+        photo = by_name.get(name)
+        if taken_at is None or photo is None or photo.taken_at is None:
+            dates_ok += taken_at is None
+        else:
+            dates_ok += photo.taken_at.isoformat() == taken_at
+
+    def ratio(part: int, whole: int) -> float:
+        return part / whole if whole else 1.0
+
+    return {
+        "exact_groups": 1.0 if exact_ok else 0.0,
+        "near_recall": ratio(near_found, len(manifest.near_groups)),
+        **check_trash(manifest, photos),
+        "exif_dates": ratio(dates_ok, len(manifest.taken_at)),
+    }
+
+
+def check_reduced_decode(folder: Path, reference: List[PhotoInfo], workers: Optional[int]) -> Dict[str, float]:
+    """
+    Share of photos whose trash verdict at every reduced decode scale is
+    the one of the full-resolution reference (1.0 = all the same), so a
+    blur normalisation that drifts from the threshold fails the suite.
+    """
+    entries = list_photo_entries(folder)
+    reference_trash = {p.file_name for p in find_potential_trash_photos(reference)}
+
+    agreement = {}
+    for scale in DECODE_SCALES[1:]:
+        photos = analyze_photo_paths(entries, workers=workers, decode_scale=scale)
+        trash = {p.file_name for p in find_potential_trash_photos(photos)}
+        same = sum((p.file_name in trash) == (p.file_name in reference_trash) for p in photos)
+        agreement[f"trash_agree_scale{scale}"] = same / len(photos) if photos else 1.0
+    return agreement
+
+
+def _environment() -> Dict[str, Any]:
+    try:
+        import cv2
+
+        cv2_version = cv2.__version__
+    except ImportError:  # pragma: no cover
+        cv2_version = None
+
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "pillow": PIL.__version__,
+        "opencv": cv2_version,
+    }
+
+
+def run_suite(
+    sizes: List[int],
+    corpus_dir: Path,
+    repeat: int = 3,
+    workers: Optional[int] = 1,
+    seed: int = 0,
+) -> Dict[str, Any]:
+    """
+    Run all stages on corpora of the given sizes and return the results
+    (JSON-serialisable, the format of baseline files).
+    """
+    results: Dict[str, Any] = {
+        "suite_version": SUITE_VERSION,
+        "seed": seed,
+        "workers": workers,
+        "repeat": repeat,
+        "environment": _environment(),
+        "sizes": {},
+    }
+
+    for size in sizes:
+        folder = corpus_dir / f"corpus-{size}-seed{seed}"
+        manifest = ensure_corpus(folder, size, seed)
+        seconds, photos, batched = time_stages(folder, repeat, workers)
+        results["sizes"][str(size)] = {
+            "stages": {
+                stage: {"seconds": seconds[stage], "files_per_s": size / seconds[stage] if seconds[stage] else None}
+                for stage in STAGES
+            },
+            "accuracy": {
+                **check_accuracy(manifest, photos),
+                **check_reduced_decode(folder, photos, workers),
+                # A faster batched engine must flag the same trash
+                **{f"quality_batched_{check}": value for check, value in check_trash(manifest, batched).items()},
+            },
+        }
+
+    return results
+
+
+def compare_with_baseline(
+    results: Dict[str, Any],
+    baseline: Dict[str, Any],
+    tolerance: float,
+    min_delta: float = 0.002,
+) -> List[str]:
+    """
+    Return the regressions of results against baseline: stages slower by
+    more than tolerance (0.1 = 10 %) and by at least min_delta seconds
+    (timer noise on sub-millisecond stages is no regression), and accuracy
+    values that went down. Sizes or stages missing from either side are skipped.
+    """
+    regressions = []
+
+    for size, current in results["sizes"].items():
+        old = baseline.get("sizes", {}).get(size)
+        if old is None:
+            continue
+
+        for stage, timing in current["stages"].items():
+            old_timing = old["stages"].get(stage)
+            if old_timing is None or not old_timing["seconds"]:
+                continue
+            ratio = timing["seconds"] / old_timing["seconds"]
+            if ratio > 1.0 + tolerance and timing["seconds"] - old_timing["seconds"] >= min_delta:
+                regressions.append(
+                    f"{size} files, {stage}: {timing['seconds']:.4f} s vs "
+                    f"{old_timing['seconds']:.4f} s ({ratio:.2f}x)"
+                )
+
+        for check, value in current["accuracy"].items():
+            old_value = old["accuracy"].get(check)
+            if old_value is not None and value < old_value:
+                regressions.append(f"{size} files, accuracy {check}: {value:.3f} vs {old_value:.3f}")
+
+    return regressions
+
+
+def format_results(results: Dict[str, Any], baseline: Optional[Dict[str, Any]] = None) -> str:
+    lines = []
+    for size, data in results["sizes"].items():
+        old = (baseline or {}).get("sizes", {}).get(size)
+        lines.append(f"\n{size} files")
+        lines.append(f"  {'stage':<16}{'seconds':>10}{'files/s':>12}{'vs baseline':>13}")
+        for stage, timing in data["stages"].items():
+            versus = ""
+            if old is not None and stage in old["stages"] and old["stages"][stage]["seconds"]:
+                versus = f"{timing['seconds'] / old['stages'][stage]['seconds']:.2f}x"
+            files_per_s = timing["files_per_s"] or 0.0
+            lines.append(f"  {stage:<16}{timing['seconds']:>10.4f}{files_per_s:>12,.0f}{versus:>13}")
+        accuracy = ", ".join(f"{check} {value:.3f}" for check, value in data["accuracy"].items())
+        lines.append(f"  accuracy: {accuracy}")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES), help="Corpus sizes")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per stage (best is kept)")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes (0 = one per CPU core)")
+    parser.add_argument("--seed", type=int, default=0, help="Corpus seed")
+    parser.add_argument(
+        "--corpus-dir",
+        type=Path,
+        default=Path(tempfile.gettempdir()) / "photo_sorter_bench",
+        help="Where corpora are generated and kept between runs",
+    )
+    parser.add_argument("--output", type=Path, default=None, help="Write the results as JSON")
+    parser.add_argument("--save-baseline", type=Path, default=None, help="Store the results as a baseline")
+    parser.add_argument("--baseline", type=Path, default=None, help="Compare with this baseline")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.10,
+        help="Allowed slowdown against the baseline (default: 0.10 = 10%%)",
+    )
+    parser.add_argument(
+        "--min-delta",
+        type=float,
+        default=0.002,
+        help="Ignore slowdowns smaller than this many seconds (default: 0.002)",
+    )
+    args = parser.parse_args(argv)
+
+    baseline = None
+    if args.baseline is not None:
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+        if baseline.get("suite_version") != SUITE_VERSION:
+            parser.error(f"{args.baseline} was made by another suite version")
+
+    results = run_suite(args.sizes, args.corpus_dir, args.repeat, args.workers or None, args.seed)
+    print(format_results(results, baseline))
+
+    for path in (args.output, args.save_baseline):
+        if path is not None:
+            path.write_text(json.dumps(results, indent=2) + "\n", encoding="utf-8")
+
+    if baseline is None:
+        return 0
+
+    regressions = compare_with_baseline(results, baseline, args.tolerance, args.min_delta)
+    if baseline.get("environment") != results["environment"]:
+        print("\nNote: the baseline was recorded in a different environment", file=sys.stderr)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    print(f"\n{len(regressions)} regressions (tolerance {args.tolerance:.0%})")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import io
+import mmap
+from typing import BinaryIO, Union
+
+import numpy as np
+
+# File contents already in memory: read with read_bytes(), a slice of a
+# larger buffer (memoryview) or a memory-mapped file. The *_for_buffer
+# functions take any of these, so one read feeds hashing, EXIF and decoding.
+ImageBuffer = Union[bytes, bytearray, memoryview, mmap.mmap]
+
+
+class BufferReader(io.RawIOBase):
+    """
+    Read-only, seekable file object over a buffer, for readers that want a
+    file (Image.open, the EXIF reader) - io.BytesIO would copy a memoryview
+    or mmap first. Only the chunks that are read get copied.
+    """
+
+    def __init__(self, data: ImageBuffer) -> None:
+        super().__init__()
+        self._view = memoryview(data).cast("B")
+        self._position = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        start = self._position
+        size = max(0, min(len(buffer), len(self._view) - start))
+        buffer[:size] = self._view[start:start + size]
+        self._position = start + size
+        return size
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self._position
+        elif whence == io.SEEK_END:
+            offset += len(self._view)
+        elif whence != io.SEEK_SET:
+            raise ValueError(f"Invalid whence {whence}")
+        if offset < 0:
+            raise ValueError(f"Negative seek position {offset}")
+        self._position = offset
+        return offset
+
+    def tell(self) -> int:
+        return self._position
+
+    def close(self) -> None:
+        # Releases the view, so an mmap can be closed afterwards
+        if not self.closed:
+            self._view.release()
+        super().close()
+
+
+def open_buffer(data: ImageBuffer) -> BinaryIO:
+    """
+    A file object reading data without copying it up front. bytes go into
+    an io.BytesIO, which shares an immutable bytes object until written to;
+    anything else is wrapped in a BufferReader.
+    """
+    if isinstance(data, bytes):
+        return io.BytesIO(data)
+    return BufferReader(data)
+
+
+def buffer_as_array(data: ImageBuffer) -> np.ndarray:
+    """
+    The bytes of data as a 1-D uint8 array sharing its memory (for
+    cv2.imdecode). An mmap can't be closed while the array is alive.
+    """
+    return np.frombuffer(data, dtype=np.uint8)
@@ -0,0 +1,624 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import time
+from contextlib import closing
+from pathlib import Path
+from typing import Any, Dict, List, Optional, TextIO
+
+from photo_sorter.batch_move import (
+    DEFAULT_COPY_WORKERS,
+    JOURNAL_FILE_NAME,
+    MoveResult,
+    move_files,
+    plan_moves,
+    undo_batch,
+)
+from photo_sorter.deduplication.clusters import CLUSTER_MODES, describe_near_duplicate_group
+from photo_sorter.deduplication.exact import ExactDuplicateStats
+from photo_sorter.deduplication.grouping import NEAR_DUPLICATE_METHODS
+from photo_sorter.deduplication.packed import PackedHashLibrary
+from photo_sorter.deduplication.hashing import FILE_HASH_ALGORITHM, FILE_HASH_ALGORITHMS
+from photo_sorter.pipeline.backend import run_exact_duplicate_pipeline, run_trash_pipeline
+from photo_sorter.pipeline.cache import default_cache_path
+from photo_sorter.pipeline.prefetch import DEFAULT_MAX_BUFFERED_BYTES
+from photo_sorter.pipeline.profiling import NULL_PROFILER, PipelineProfiler, ProfileReport
+from photo_sorter.pipeline.progress import STAGE_ANALYSE, ProgressReporter
+from photo_sorter.pipeline.single_pass import SinglePassStats, analyze_photo_path
+from photo_sorter.pipeline.streaming import ExactGroupUpdate, StreamEvent, stream_backend_pipeline
+from photo_sorter.quality.analysis import (
+    DECODE_SCALES,
+    DEFAULT_BLUR_THRESHOLD,
+    DEFAULT_BRIGHTNESS_TOO_BRIGHT,
+    DEFAULT_BRIGHTNESS_TOO_DARK,
+)
+from photo_sorter.quality.batch import DEFAULT_WORKING_SIZE
+from photo_sorter.scanning.filesystem_scanner import TRASH_PREVIEW_DIR_NAME
+from photo_sorter.scanning.models import PhotoInfo
+
+
+# Record types written by each subcommand (the "type" field of every record)
+COMMAND_RECORDS = {
+    "scan": {"photo", "trash", "exact_group", "near_group"},
+    "dedupe": {"exact_group", "near_group"},
+    "trash": {"trash"},
+    "move": {"trash"},
+    "similar": {"similar"},
+}
+
+EXIT_OK = 0
+EXIT_INTERRUPTED = 130
+
+
+def photo_to_record(photo: PhotoInfo, file_hash_algorithm: str = FILE_HASH_ALGORITHM) -> Dict[str, Any]:
+    """
+    JSON-serialisable form of a PhotoInfo. file_hash_algorithm is written
+    next to the digest - digests of different algorithms never match.
+    """
+    return {
+        "path": str(photo.path),
+        "file_name": photo.file_name,
+        "size_bytes": photo.size_bytes,
+        "taken_at": photo.taken_at.isoformat() if photo.taken_at is not None else None,
+        "file_hash": photo.file_hash,
+        "file_hash_algorithm": file_hash_algorithm,
+        "perceptual_hash": photo.perceptual_hash,
+        "blur_score": photo.blur_score,
+        "brightness_score": photo.brightness_score,
+        "is_potential_trash": photo.is_potential_trash,
+        "width": photo.width,
+        "height": photo.height,
+    }
+
+
+def stats_to_record(stats: SinglePassStats) -> Dict[str, Any]:
+    return {
+        "photos": stats.photos,
+        "bytes_read": stats.bytes_read,
+        "reads": stats.reads,
+        "decodes": stats.decodes,
+        "decode_failures": stats.decode_failures,
+        "cache_hits": stats.cache_hits,
+    }
+
+
+def exact_stats_to_record(stats: ExactDuplicateStats) -> Dict[str, Any]:
+    return {
+        "files": stats.files,
+        "total_bytes": stats.total_bytes,
+        "bytes_read": stats.bytes_read,
+        "size_candidates": stats.size_candidates,
+        "partial_hashed": stats.partial_hashed,
+        "full_hashed": stats.full_hashed,
+    }
+
+
+def move_result_to_record(kind: str, result: MoveResult) -> Dict[str, Any]:
+    return {
+        "type": kind,
+        "batch_id": result.batch_id,
+        "moved": [{"src": str(src), "dst": str(dst)} for src, dst in result.moved],
+        "skipped": [str(path) for path in result.skipped],
+        "failed": [{"path": str(path), "error": error} for path, error in result.failed],
+        "copied": result.copied,
+    }
+
+
+class RecordWriter:
+    """
+    Writes records as NDJSON (one JSON object per line, flushed right away,
+    so consumers can act on groups while the scan is still running) or, with
+    as_json=True, collects them and writes one JSON document at close():
+    {"records": [...]}.
+    """
+
+    def __init__(self, out: TextIO, as_json: bool = False) -> None:
+        self.out = out
+        self.as_json = as_json
+        self._records: List[Dict[str, Any]] = []
+
+    def write(self, record: Dict[str, Any]) -> None:
+        if self.as_json:
+            self._records.append(record)
+            return
+
+        self.out.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.out.flush()
+
+    def close(self) -> None:
+        if self.as_json:
+            json.dump({"records": self._records}, self.out, ensure_ascii=False, indent=2)
+            self.out.write("\n")
+        self.out.flush()
+
+
+def _print_progress(event: StreamEvent) -> None:
+    print(f"\r{event.data.describe()}", end="", file=sys.stderr, flush=True)
+
+
+def _stream_scan(
+    args: argparse.Namespace,
+    writer: RecordWriter,
+    collect: Optional[List[PhotoInfo]] = None,
+) -> List[PhotoInfo]:
+    """
+    Run the streaming pipeline and write the records the subcommand wants.
+    Returns the potential trash photos; all analysed photos are appended to
+    collect if given.
+    """
+    wanted = COMMAND_RECORDS[args.command]
+    reporter = ProgressReporter(_print_progress if args.progress else None)
+    trash: List[PhotoInfo] = []
+    counts = {"photos": 0, "trash": 0, "exact_groups": 0, "near_groups": 0}
+    exact_ids = set()
+    started = time.perf_counter()
+    profiling = args.profile or args.profile_json is not None
+    profiler = PipelineProfiler() if profiling else NULL_PROFILER
+
+    events = stream_backend_pipeline(
+        args.root,
+        use_cache=not args.no_cache,
+        cache_path=args.cache,
+        workers=args.workers or None,
+        max_distance=args.max_distance,
+        scan_threads=args.scan_threads,
+        decode_scale=args.decode_scale,
+        blur_threshold=args.blur_threshold,
+        brightness_too_dark=args.too_dark,
+        brightness_too_bright=args.too_bright,
+        profiler=profiler,
+        file_hash_algorithm=args.hash_algorithm,
+        read_ahead=args.read_ahead,
+        max_buffered_bytes=args.read_buffer_mb * 1024 * 1024,
+        near_method=args.near_method,
+        near_mode=args.near_mode,
+        near_max_diameter=args.near_max_diameter,
+    )
+
+    # closing(): on Ctrl+C, stop the worker pool and close the cache
+    with closing(events):
+        for event in events:
+            if event.kind == "photo":
+                if collect is not None:
+                    collect.append(event.data)
+                counts["photos"] += 1
+                reporter.update(STAGE_ANALYSE, counts["photos"])
+                if "photo" in wanted:
+                    writer.write({"type": "photo", **photo_to_record(event.data, args.hash_algorithm)})
+
+            elif event.kind == "trash":
+                trash.append(event.data)
+                counts["trash"] += 1
+                if "trash" in wanted:
+                    writer.write({"type": "trash", **photo_to_record(event.data, args.hash_algorithm)})
+
+            elif event.kind == "exact_group":
+                update: ExactGroupUpdate = event.data
+                exact_ids.add(update.group_id)
+                counts["exact_groups"] = len(exact_ids)
+                if "exact_group" in wanted:
+                    # Sent again whenever the group grows - the latest line per id wins
+                    writer.write(
+                        {
+                            "type": "exact_group",
+                            "group_id": update.group_id,
+                            "file_hash": update.file_hash,
+                            "file_hash_algorithm": args.hash_algorithm,
+                            "paths": [str(p.path) for p in update.photos],
+                        }
+                    )
+
+            elif event.kind == "near_groups":
+                counts["near_groups"] = len(event.data)
+                if "near_group" in wanted:
+                    for group_id, group in enumerate(event.data):
+                        # Precomputed for reviewers: the one to keep and the most typical one
+                        cluster = describe_near_duplicate_group(group)
+                        writer.write(
+                            {
+                                "type": "near_group",
+                                "group_id": group_id,
+                                "paths": [str(p.path) for p in group],
+                                "best": str(cluster.best.path),
+                                "medoid": str(cluster.medoid.path),
+                                "diameter": cluster.diameter,
+                            }
+                        )
+
+            elif event.kind == "done":
+                if args.progress:
+                    reporter.update(STAGE_ANALYSE, counts["photos"], counts["photos"], force=True)
+                    print(file=sys.stderr)
+                writer.write(
+                    {
+                        "type": "summary",
+                        "root": str(args.root),
+                        "file_hash_algorithm": args.hash_algorithm,
+                        **counts,
+                        "elapsed_s": round(time.perf_counter() - started, 3),
+                        "analysis": stats_to_record(event.data),
+                    }
+                )
+
+    if profiling:
+        _write_profile(args, writer, profiler.report())
+
+    return trash
+
+
+def _run_similar(args: argparse.Namespace, writer: RecordWriter) -> None:
+    """
+    similar: the photos of the library that look like args.photo, closest
+    first - the library's pHashes are packed once and compared in one
+    vectorised query (PackedHashLibrary).
+    """
+    photos: List[PhotoInfo] = []
+    _stream_scan(args, writer, collect=photos)
+
+    target = args.photo.expanduser().resolve()
+    query = next((photo for photo in photos if photo.path == target), None)
+    if query is None:
+        # A photo from outside the folder - analyse it on its own
+        query = analyze_photo_path(target, decode_scale=args.decode_scale)
+
+    library = PackedHashLibrary(photos)
+    for photo, distance in library.query_photo(query, args.max_distance):
+        writer.write(
+            {
+                "type": "similar",
+                "query": str(target),
+                "path": str(photo.path),
+                "distance": distance,
+            }
+        )
+
+
+def _run_exact_dedupe(args: argparse.Namespace, writer: RecordWriter) -> None:
+    """
+    dedupe --exact-only: exact groups from staged hashing, nothing decoded.
+    """
+    started = time.perf_counter()
+    profiling = args.profile or args.profile_json is not None
+    profiler = PipelineProfiler() if profiling else NULL_PROFILER
+
+    summary = run_exact_duplicate_pipeline(
+        args.root,
+        workers=args.workers or None,
+        scan_threads=args.scan_threads,
+        file_hash_algorithm=args.hash_algorithm,
+        profiler=profiler,
+    )
+
+    for group_id, group in enumerate(summary["exact_groups"]):
+        writer.write(
+            {
+                "type": "exact_group",
+                "group_id": group_id,
+                "file_hash": group[0].file_hash,
+                "file_hash_algorithm": args.hash_algorithm,
+                "paths": [str(p.path) for p in group],
+            }
+        )
+
+    stats: ExactDuplicateStats = summary["exact_stats"]
+    print(stats.summary(), file=sys.stderr)
+    writer.write(
+        {
+            "type": "summary",
+            "root": str(args.root),
+            "file_hash_algorithm": args.hash_algorithm,
+            "photos": len(summary["photos"]),
+            "exact_groups": len(summary["exact_groups"]),
+            "elapsed_s": round(time.perf_counter() - started, 3),
+            "exact_hashing": exact_stats_to_record(stats),
+        }
+    )
+
+    if profiling:
+        _write_profile(args, writer, profiler.report())
+
+
+def _run_quality_trash(args: argparse.Namespace, writer: RecordWriter) -> None:
+    """
+    trash --quality-only: blur and brightness from the batched quality
+    engine at a reduced working resolution, no hashes computed.
+    """
+    started = time.perf_counter()
+    profiling = args.profile or args.profile_json is not None
+    profiler = PipelineProfiler() if profiling else NULL_PROFILER
+
+    summary = run_trash_pipeline(
+        args.root,
+        workers=args.workers or None,
+        scan_threads=args.scan_threads,
+        decode_scale=args.decode_scale,
+        blur_threshold=args.blur_threshold,
+        brightness_too_dark=args.too_dark,
+        brightness_too_bright=args.too_bright,
+        profiler=profiler,
+    )
+
+    for photo in summary["potential_trash"]:
+        writer.write({"type": "trash", **photo_to_record(photo, args.hash_algorithm)})
+
+    writer.write(
+        {
+            "type": "summary",
+            "root": str(args.root),
+            "photos": len(summary["photos"]),
+            "trash": len(summary["potential_trash"]),
+            "elapsed_s": round(time.perf_counter() - started, 3),
+        }
+    )
+
+    if profiling:
+        _write_profile(args, writer, profiler.report())
+
+
+def _write_profile(args: argparse.Namespace, writer: RecordWriter, report: ProfileReport) -> None:
+    if args.profile:
+        print(report.format_table(), file=sys.stderr)
+        writer.write({"type": "profile", **report.to_dict()})
+    if args.profile_json is not None:
+        args.profile_json.write_text(report.to_json() + "\n", encoding="utf-8")
+
+
+def _run_move(args: argparse.Namespace, writer: RecordWriter) -> None:
+    trash = _stream_scan(args, writer)
+    trash_dir = args.root / TRASH_PREVIEW_DIR_NAME
+    sources = [photo.path for photo in trash]
+
+    if args.dry_run:
+        writer.write(
+            {
+                "type": "move_plan",
+                "moves": [
+                    {"src": str(src), "dst": str(dst)}
+                    for src, dst in plan_moves(sources, trash_dir)
+                ],
+            }
+        )
+        return
+
+    result = move_files(sources, trash_dir, copy_workers=args.copy_workers)
+    writer.write(move_result_to_record("move", result))
+
+
+def _run_undo(args: argparse.Namespace, writer: RecordWriter) -> None:
+    journal = args.root / TRASH_PREVIEW_DIR_NAME / JOURNAL_FILE_NAME
+    result = undo_batch(journal, args.batch, copy_workers=args.copy_workers)
+    writer.write(move_result_to_record("undo", result))
+
+
+def _add_scan_options(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("root", type=Path, help="Folder with photos")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=0,
+        help="Analysis processes (1 = sequential, 0 = one per CPU core; default: 0)",
+    )
+    parser.add_argument(
+        "--scan-threads",
+        type=int,
+        default=1,
+        help="Threads listing directories in parallel (helps on network shares)",
+    )
+    parser.add_argument(
+        "--cache",
+        type=Path,
+        default=None,
+        help=f"Analysis cache database (default: {default_cache_path()})",
+    )
+    parser.add_argument("--no-cache", action="store_true", help="Don't use the analysis cache")
+    parser.add_argument(
+        "--read-ahead",
+        type=int,
+        default=0,
+        metavar="N",
+        help="Read up to N files ahead while others are decoded (0 = off; "
+        "helps on spinning disks and network shares)",
+    )
+    parser.add_argument(
+        "--read-buffer-mb",
+        type=int,
+        default=DEFAULT_MAX_BUFFERED_BYTES // (1024 * 1024),
+        metavar="MB",
+        help="With --read-ahead, file contents held in memory at most "
+        f"(default: {DEFAULT_MAX_BUFFERED_BYTES // (1024 * 1024)})",
+    )
+    parser.add_argument(
+        "--decode-scale",
+        type=int,
+        choices=DECODE_SCALES,
+        default=1,
+        help="Analyse JPEGs at 1/N resolution - faster, slightly less precise",
+    )
+    parser.add_argument(
+        "--hash-algorithm",
+        choices=FILE_HASH_ALGORITHMS,
+        default=FILE_HASH_ALGORITHM,
+        help=f"File hash for exact duplicates - blake2b is faster (default: {FILE_HASH_ALGORITHM})",
+    )
+    parser.add_argument(
+        "--max-distance",
+        type=int,
+        default=5,
+        help="Maximum pHash Hamming distance of near duplicates (default: 5)",
+    )
+    parser.add_argument(
+        "--near-method",
+        choices=NEAR_DUPLICATE_METHODS,
+        default="index",
+        help="Near-duplicate engine: index (default), numpy, or lsh - approximate, "
+        "for libraries of millions of photos",
+    )
+    parser.add_argument(
+        "--near-mode",
+        choices=CLUSTER_MODES,
+        default="components",
+        help="How near pairs become groups: components (default, chains of similar photos "
+        "form one group), diameter (groups capped by --near-max-diameter) or medoid "
+        "(every member within --max-distance of the group's centre)",
+    )
+    parser.add_argument(
+        "--near-max-diameter",
+        type=int,
+        default=None,
+        metavar="D",
+        help="With --near-mode diameter, largest pHash distance within a group "
+        "(default: --max-distance)",
+    )
+    parser.add_argument(
+        "--blur-threshold",
+        type=float,
+        default=DEFAULT_BLUR_THRESHOLD,
+        help=f"Blur scores below this are potential trash (default: {DEFAULT_BLUR_THRESHOLD})",
+    )
+    parser.add_argument(
+        "--too-dark",
+        type=float,
+        default=DEFAULT_BRIGHTNESS_TOO_DARK,
+        help=f"Brightness below this is potential trash (default: {DEFAULT_BRIGHTNESS_TOO_DARK})",
+    )
+    parser.add_argument(
+        "--too-bright",
+        type=float,
+        default=DEFAULT_BRIGHTNESS_TOO_BRIGHT,
+        help=f"Brightness above this is potential trash (default: {DEFAULT_BRIGHTNESS_TOO_BRIGHT})",
+    )
+    parser.add_argument("--progress", action="store_true", help="Show progress on stderr")
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Time every stage: table on stderr plus a \"profile\" record",
+    )
+    parser.add_argument(
+        "--profile-json",
+        type=Path,
+        default=None,
+        metavar="PATH",
+        help="Write the stage timings as JSON to PATH",
+    )
+
+
+def _add_output_options(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--format",
+        choices=("ndjson", "json"),
+        default="ndjson",
+        help="ndjson: one record per line as soon as it is known (default); "
+        "json: one document at the end",
+    )
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m photo_sorter",
+        description="Find duplicate and low-quality photos without the GUI. "
+        "Results are written to stdout as NDJSON records with a \"type\" field.",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    scan = subparsers.add_parser(
+        "scan", help="Analyse a folder: photo, trash, exact_group, near_group and summary records"
+    )
+    dedupe = subparsers.add_parser("dedupe", help="Only exact and near duplicate groups")
+    trash = subparsers.add_parser("trash", help="Only potential trash photos")
+    move = subparsers.add_parser(
+        "move", help=f"Move potential trash to {TRASH_PREVIEW_DIR_NAME}/ (journaled, see undo)"
+    )
+    undo = subparsers.add_parser("undo", help=f"Undo the last move to {TRASH_PREVIEW_DIR_NAME}/")
+    similar = subparsers.add_parser(
+        "similar", help="Photos of the folder that look like one photo (similar records, closest first)"
+    )
+
+    for sub in (scan, dedupe, trash, move, similar):
+        _add_scan_options(sub)
+
+    similar.add_argument("--photo", type=Path, required=True, help="Photo to look for")
+
+    undo.add_argument("root", type=Path, help="Folder that was passed to move")
+    undo.add_argument("--batch", default=None, help="Batch id to undo (default: the last one)")
+
+    dedupe.add_argument(
+        "--exact-only",
+        action="store_true",
+        help="Only exact duplicates, found by size and partial hashes without decoding "
+        "(reads a fraction of the files; bytes read are reported on stderr)",
+    )
+    trash.add_argument(
+        "--quality-only",
+        action="store_true",
+        help="Only score blur and brightness, on images shrunk to %dx%d by the batched "
+        "quality engine (no hashes; EXIF, --no-cache and --read-ahead are not used). "
+        "Blur scores are scaled to full resolution like --decode-scale does, so photos "
+        "near --blur-threshold may be classified differently"
+        % DEFAULT_WORKING_SIZE,
+    )
+    move.add_argument(
+        "--dry-run", action="store_true", help="Only write the planned moves (move_plan record)"
+    )
+    for sub in (move, undo):
+        sub.add_argument(
+            "--copy-workers",
+            type=int,
+            default=DEFAULT_COPY_WORKERS,
+            help=f"Parallel copies when moving across devices (default: {DEFAULT_COPY_WORKERS})",
+        )
+
+    for sub in (scan, dedupe, trash, move, undo, similar):
+        _add_output_options(sub)
+
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Headless command-line runner (for servers, cron jobs, scripts):
+        python -m photo_sorter scan|dedupe|trash|move|undo|similar ROOT [options]
+    Returns the process exit code.
+    """
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    args.root = args.root.expanduser().resolve()
+    if not args.root.is_dir():
+        parser.error(f"not a directory: {args.root}")
+    if args.command != "undo" and args.workers < 0:
+        parser.error("--workers must be >= 0")
+    if args.command == "similar" and not args.photo.expanduser().is_file():
+        parser.error(f"not a file: {args.photo}")
+
+    writer = RecordWriter(sys.stdout, as_json=args.format == "json")
+    try:
+        if args.command == "move":
+            _run_move(args, writer)
+        elif args.command == "undo":
+            _run_undo(args, writer)
+        elif args.command == "similar":
+            _run_similar(args, writer)
+        elif args.command == "dedupe" and args.exact_only:
+            _run_exact_dedupe(args, writer)
+        elif args.command == "trash" and args.quality_only:
+            _run_quality_trash(args, writer)
+        else:
+            _stream_scan(args, writer)
+        writer.close()
+    except KeyboardInterrupt:
+        return EXIT_INTERRUPTED
+    except BrokenPipeError:
+        # Consumer stopped reading (e.g. "| head") - not an error. Point stdout
+        # at devnull so the interpreter doesn't fail flushing it on exit.
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+        return EXIT_OK
+
+    return EXIT_OK
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,310 @@
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Sequence, Set, Tuple, Union
+
+import numpy as np
+
+from photo_sorter.deduplication.grouping import hamming_distance_hex
+from photo_sorter.deduplication.index import MultiIndexHashTable
+from photo_sorter.deduplication.lsh import find_near_duplicate_pairs_lsh
+from photo_sorter.deduplication.packed import (
+    find_pairs_within_distance,
+    pack_hex_hashes,
+    popcount64,
+)
+from photo_sorter.deduplication.union_find import UnionFind
+from photo_sorter.scanning.models import PhotoInfo
+from photo_sorter.scanning.photo_table import PhotoRow, PhotoTable
+
+# How near pairs (pHash distance <= max_distance) are joined into groups:
+#  - "components": every chain of near pairs is one group (A~B~C~D even if
+#    A and D are far apart) - the groups of find_near_duplicate_groups,
+#  - "diameter": pairs are merged closest first, but only while no two
+#    photos of the merged group are more than max_diameter apart,
+#  - "medoid": the photo with the most near neighbours becomes the centre
+#    of a group with all its still unassigned neighbours, and so on - every
+#    member is within max_distance of its centre.
+CLUSTER_MODES = ("components", "diameter", "medoid")
+
+# Where the near pairs come from (see NEAR_DUPLICATE_METHODS in grouping)
+PAIR_METHODS = ("index", "numpy", "lsh")
+
+# Members compared at once when computing medoids and diameters
+_DISTANCE_BLOCK_SIZE = 256
+
+# (rows, cols) -> matrix of pHash distances between those candidates
+DistanceFunction = Callable[[Sequence[int], Sequence[int]], np.ndarray]
+
+
+@dataclass
+class NearDuplicateCluster:
+    """A near-duplicate group with representatives computed once for review."""
+
+    photos: List[PhotoInfo]  # in input order
+    best: PhotoInfo  # the one to keep, see choose_best_photo
+    medoid: PhotoInfo  # smallest total pHash distance to the others - the most typical one
+    diameter: int  # largest pHash distance between two members
+
+
+def photo_quality_key(photo: PhotoInfo) -> Tuple[int, float, int]:
+    """
+    Sort key ranking photos as keepers: most pixels first (a downscaled copy
+    never wins), then the sharpest (highest blur_score), then the biggest
+    file. Unknown values rank lowest.
+    """
+    pixels = photo.width * photo.height if photo.width and photo.height else 0
+    blur = photo.blur_score if photo.blur_score is not None else -math.inf
+    return pixels, blur, photo.size_bytes
+
+
+def choose_best_photo(photos: Sequence[PhotoInfo]) -> PhotoInfo:
+    """
+    The photo of a group to keep (highest photo_quality_key; the first one
+    on ties).
+    """
+    return max(photos, key=photo_quality_key)
+
+
+def _near_pairs(
+    packed: np.ndarray,
+    max_distance: int,
+    method: str,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    All pairs i < j within max_distance as (left, right, distance) arrays.
+    """
+    if method == "lsh":
+        left, right = find_near_duplicate_pairs_lsh(packed, max_distance)
+    elif method == "numpy":
+        batches = list(find_pairs_within_distance(packed, max_distance))
+        if batches:
+            left = np.concatenate([rows for rows, _ in batches])
+            right = np.concatenate([cols for _, cols in batches])
+        else:
+            left = right = np.empty(0, dtype=np.int64)
+    else:
+        words = packed.shape[1]
+        hashes = [
+            sum(int(word) << (64 * (words - 1 - k)) for k, word in enumerate(row))
+            for row in packed.tolist()
+        ]
+        index = MultiIndexHashTable(words * 64, max_distance, expected_size=len(hashes))
+        for i, value in enumerate(hashes):
+            index.add(i, value)
+        found = [(i, j) for i, value in enumerate(hashes) for j in index.query(value) if j > i]
+        pairs = np.array(found, dtype=np.int64).reshape(-1, 2)
+        left, right = pairs[:, 0], pairs[:, 1]
+
+    distances = popcount64(packed[left] ^ packed[right]).sum(axis=1)
+    return left, right, distances
+
+
+def _packed_distances(packed: np.ndarray) -> DistanceFunction:
+    def distances(rows: Sequence[int], cols: Sequence[int]) -> np.ndarray:
+        return popcount64(packed[rows][:, None, :] ^ packed[cols][None, :, :]).sum(axis=2)
+
+    return distances
+
+
+def _hex_distances(hashes: List[str]) -> DistanceFunction:
+    # Mixed hash lengths: compared on truncated prefixes, like hamming_distance_hex
+    def distances(rows: Sequence[int], cols: Sequence[int]) -> np.ndarray:
+        matrix = [[hamming_distance_hex(hashes[i], hashes[j]) for j in cols] for i in rows]
+        return np.array(matrix, dtype=np.int64).reshape(len(rows), len(cols))
+
+    return distances
+
+
+def _near_pairs_by_scan(
+    hashes: List[str],
+    max_distance: int,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    All pairs i < j within max_distance, comparing every pair of hashes
+    (O(n^2)) - for mixed hash lengths, like find_near_duplicate_groups.
+    """
+    found = []
+    for i in range(len(hashes)):
+        for j in range(i + 1, len(hashes)):
+            distance = hamming_distance_hex(hashes[i], hashes[j])
+            if distance <= max_distance:
+                found.append((i, j, distance))
+    pairs = np.array(found, dtype=np.int64).reshape(-1, 3)
+    return pairs[:, 0], pairs[:, 1], pairs[:, 2]
+
+
+def _medoid_and_diameter(distance: DistanceFunction, members: List[int]) -> Tuple[int, int]:
+    """
+    (position in members of the medoid, diameter) of one group, computed
+    blockwise so groups of thousands stay in bounded memory.
+    """
+    totals = np.zeros(len(members), dtype=np.int64)
+    diameter = 0
+    for start in range(0, len(members), _DISTANCE_BLOCK_SIZE):
+        distances = distance(members[start:start + _DISTANCE_BLOCK_SIZE], members)
+        totals[start:start + len(distances)] = distances.sum(axis=1)
+        diameter = max(diameter, int(distances.max()))
+    return int(np.argmin(totals)), diameter
+
+
+def _groups_by_diameter(
+    n: int,
+    distance: DistanceFunction,
+    left: np.ndarray,
+    right: np.ndarray,
+    distances: np.ndarray,
+    max_diameter: int,
+) -> List[List[int]]:
+    """
+    Merge pairs closest first (like single linkage), refusing any merge
+    that would put two photos more than max_diameter apart.
+    """
+    union_find = UnionFind(n)
+    members: Dict[int, List[int]] = {}
+    # Root pairs whose merge was refused - groups only grow, so it stays refused
+    refused: Set[Tuple[int, int]] = set()
+
+    for k in np.argsort(distances, kind="stable").tolist():
+        root_a = union_find.find(int(left[k]))
+        root_b = union_find.find(int(right[k]))
+        key = (min(root_a, root_b), max(root_a, root_b))
+        if root_a == root_b or key in refused:
+            continue
+
+        group_a = members.get(root_a, [root_a])
+        group_b = members.get(root_b, [root_b])
+        if distance(group_a, group_b).max() > max_diameter:
+            refused.add(key)
+            continue
+
+        root = union_find.union(root_a, root_b)
+        members.pop(root_a, None)
+        members.pop(root_b, None)
+        members[root] = group_a + group_b
+
+    return union_find.groups(min_size=2)
+
+
+def _groups_by_medoid(
+    n: int,
+    left: np.ndarray,
+    right: np.ndarray,
+) -> List[List[int]]:
+    """
+    Greedy star clustering: the unassigned photo with the most near
+    neighbours takes all its unassigned neighbours, until none are left.
+    """
+    # Neighbour lists in CSR form (both directions of every pair)
+    sources = np.concatenate([left, right])
+    targets = np.concatenate([right, left])
+    order = np.argsort(sources, kind="stable")
+    targets = targets[order].tolist()
+    degree = np.bincount(sources, minlength=n)
+    starts = np.concatenate([[0], np.cumsum(degree)]).tolist()
+
+    union_find = UnionFind(n)
+    assigned = [False] * n
+    # Most neighbours first, lower index first on ties
+    for centre in np.argsort(-degree, kind="stable").tolist():
+        if degree[centre] == 0:
+            break
+        if assigned[centre]:
+            continue
+        assigned[centre] = True
+        for other in targets[starts[centre]:starts[centre + 1]]:
+            if not assigned[other]:
+                assigned[other] = True
+                union_find.union(centre, other)
+
+    return union_find.groups(min_size=2)
+
+
+def _hash_distances(hashes: List[str]) -> DistanceFunction:
+    if len({len(h) for h in hashes}) != 1:
+        # Mixed hash sizes: truncated prefixes pair by pair, exactly like
+        # find_near_duplicate_groups (padding would change the distances)
+        return _hex_distances(hashes)
+    return _packed_distances(pack_hex_hashes(hashes))
+
+
+def describe_near_duplicate_group(photos: Sequence[PhotoInfo]) -> NearDuplicateCluster:
+    """
+    Best photo, medoid and diameter of a group found elsewhere (e.g. by
+    find_near_duplicate_groups or the incremental grouper of the streaming
+    pipeline). All photos must have a perceptual_hash.
+    """
+    hashes: List[str] = [p.perceptual_hash for p in photos]  # type: ignore[misc]
+    medoid, diameter = _medoid_and_diameter(_hash_distances(hashes), list(range(len(photos))))
+    return NearDuplicateCluster(list(photos), choose_best_photo(photos), photos[medoid], diameter)
+
+
+def find_near_duplicate_clusters(
+    photos: Union[List[PhotoInfo], PhotoTable],
+    max_distance: int = 5,
+    mode: str = "components",
+    max_diameter: Optional[int] = None,
+    method: str = "index",
+) -> List[NearDuplicateCluster]:
+    """
+    Near-duplicate groups built with union-find, each with its best photo,
+    medoid and diameter precomputed.
+
+    :param photos: Photos with perceptual_hash (others are skipped), or a PhotoTable.
+    :param max_distance: Maximum pHash Hamming distance of a near pair.
+    :param mode: How pairs become groups, see CLUSTER_MODES. "diameter"
+                 and "medoid" stop the chaining that makes "components"
+                 groups of burst shots grow without bound.
+    :param max_diameter: Largest distance between two members in
+                         "diameter" mode (default: max_distance).
+    :param method: How near pairs are found, see PAIR_METHODS.
+    :return: Groups of at least 2 photos, members in input order, groups
+             ordered by their first member.
+    """
+    if mode not in CLUSTER_MODES:
+        raise ValueError(f"Unknown mode {mode!r}, expected one of {CLUSTER_MODES}")
+    if method not in PAIR_METHODS:
+        raise ValueError(f"Unknown method {method!r}, expected one of {PAIR_METHODS}")
+
+    candidates: Sequence[PhotoInfo]
+    if isinstance(photos, PhotoTable):
+        rows = np.flatnonzero(photos.column("has_perceptual_hash"))
+        candidates = [PhotoRow(photos, i) for i in rows.tolist()]
+        if not candidates or max_distance < 0:
+            return []
+        packed = photos.column("perceptual_hash")[rows].reshape(-1, 1)
+        distance = _packed_distances(packed)
+        left, right, distances = _near_pairs(packed, max_distance, method)
+    else:
+        candidates = [p for p in photos if p.perceptual_hash]
+        if not candidates or max_distance < 0:
+            return []
+        hashes: List[str] = [p.perceptual_hash for p in candidates]  # type: ignore[misc]
+        if len({len(h) for h in hashes}) != 1:
+            # Mixed hash sizes: truncated prefixes pair by pair, exactly like
+            # find_near_duplicate_groups (padding would change the distances)
+            distance = _hex_distances(hashes)
+            left, right, distances = _near_pairs_by_scan(hashes, max_distance)
+        else:
+            packed = pack_hex_hashes(hashes)
+            distance = _packed_distances(packed)
+            left, right, distances = _near_pairs(packed, max_distance, method)
+
+    if mode == "diameter":
+        limit = max_distance if max_diameter is None else max_diameter
+        groups = _groups_by_diameter(len(candidates), distance, left, right, distances, limit)
+    elif mode == "medoid":
+        groups = _groups_by_medoid(len(candidates), left, right)
+    else:
+        union_find = UnionFind(len(candidates))
+        for i, j in zip(left.tolist(), right.tolist()):
+            union_find.union(i, j)
+        groups = union_find.groups(min_size=2)
+
+    clusters = []
+    for group in groups:
+        members = [candidates[i] for i in group]
+        medoid, diameter = _medoid_and_diameter(distance, group)
+        clusters.append(NearDuplicateCluster(members, choose_best_photo(members), members[medoid], diameter))
+    return clusters
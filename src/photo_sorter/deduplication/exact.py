@@ -0,0 +1,199 @@
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from photo_sorter.deduplication.grouping import find_exact_duplicate_groups
+from photo_sorter.deduplication.hashing import (
+    FILE_HASH_ALGORITHM,
+    compute_file_hash,
+    new_file_hasher,
+)
+from photo_sorter.parallel import map_ordered
+from photo_sorter.scanning.models import PhotoInfo
+
+
+# Bytes hashed at the start and at the end of a file in the partial-hash stage
+PARTIAL_HASH_EDGE_BYTES = 64 * 1024
+
+
+@dataclass
+class ExactDuplicateStats:
+    """
+    Work done by find_exact_duplicate_groups_staged, stage by stage.
+    """
+
+    files: int = 0
+    total_bytes: int = 0
+    bytes_read: int = 0
+    size_candidates: int = 0  # files sharing their size with another file
+    partial_hashed: int = 0
+    full_hashed: int = 0
+
+    @property
+    def read_fraction(self) -> float:
+        """Fraction of all bytes that had to be read (0.0 - 1.0)."""
+        if self.total_bytes == 0:
+            return 0.0
+        return self.bytes_read / self.total_bytes
+
+    def summary(self) -> str:
+        """
+        Human readable one-line summary.
+        """
+        return (
+            f"{self.files} files, {self.size_candidates} with a shared size, "
+            f"{self.partial_hashed} partially hashed, {self.full_hashed} fully hashed, "
+            f"read {self.bytes_read} of {self.total_bytes} B ({self.read_fraction:.1%})"
+        )
+
+
+def _partial_hash_task(
+    task: Tuple[Path, int, str],
+) -> Optional[Tuple[str, Optional[str], int]]:
+    """
+    Hash the first and last edge_bytes of a file.
+
+    Returns (partial_hash, full_hash, bytes_read). When the file is small enough
+    for both edges to cover it completely, full_hash is the hash of the
+    whole file (same as compute_file_hash), otherwise None.
+    Returns None if the file disappeared or can't be read.
+    """
+    path, edge_bytes, algorithm = task
+
+    try:
+        with path.open("rb") as f:
+            # The current size - the file may have shrunk since the scan
+            size = os.fstat(f.fileno()).st_size
+            if size <= 2 * edge_bytes:
+                data = f.read()
+                hasher = new_file_hasher(algorithm)
+                hasher.update(data)
+                full_hash = hasher.hexdigest()
+                # The whole content identifies the file - reuse it as partial key
+                return full_hash, full_hash, len(data)
+
+            head = f.read(edge_bytes)
+            f.seek(size - edge_bytes)
+            tail = f.read(edge_bytes)
+    except OSError:
+        return None
+
+    hasher = new_file_hasher(algorithm)
+    hasher.update(head)
+    hasher.update(tail)
+    return hasher.hexdigest(), None, len(head) + len(tail)
+
+
+def _full_hash_task(task: Tuple[Path, str]) -> Optional[str]:
+    path, algorithm = task
+    try:
+        return compute_file_hash(path, algorithm=algorithm)
+    except OSError:
+        # If file disappeared or can't be read - leave as None
+        return None
+
+
+def _group_by(photos: List[PhotoInfo], keys: List[object]) -> List[List[PhotoInfo]]:
+    """
+    Group photos by the key at the same position, keeping only groups with 2+ photos.
+    """
+    groups: Dict[object, List[PhotoInfo]] = {}
+    for photo, key in zip(photos, keys):
+        groups.setdefault(key, []).append(photo)
+    return [group for group in groups.values() if len(group) >= 2]
+
+
+def find_exact_duplicate_groups_staged(
+    photos: List[PhotoInfo],
+    stats: Optional[ExactDuplicateStats] = None,
+    edge_bytes: int = PARTIAL_HASH_EDGE_BYTES,
+    workers: Optional[int] = 1,
+    algorithm: str = FILE_HASH_ALGORITHM,
+) -> List[List[PhotoInfo]]:
+    """
+    Finds groups of exact duplicates reading as little data as possible:
+
+    1. group by size_bytes - a file with a unique size has no duplicate,
+    2. within size collisions hash only the first and last edge_bytes,
+    3. compute the full hash only for files whose partial hashes collide.
+
+    Returns the same groups, in the same order, as
+    find_exact_duplicate_groups(photos) with every file_hash computed.
+    file_hash is filled in for the fully hashed files; hashes that are
+    already set are reused and their size buckets skip the partial stage.
+
+    :param stats: Optional counters, e.g. to report bytes read vs total bytes.
+    :param workers: Worker processes for hashing (1 = sequential).
+    :param algorithm: File hash algorithm (see FILE_HASH_ALGORITHMS); hashes
+                      already set must have been computed with the same one.
+    """
+    new_file_hasher(algorithm)  # unknown algorithm -> ValueError before any work
+    if stats is None:
+        stats = ExactDuplicateStats()
+
+    stats.files += len(photos)
+    stats.total_bytes += sum(photo.size_bytes for photo in photos)
+
+    # Stage 1: size buckets
+    size_buckets = _group_by(photos, [photo.size_bytes for photo in photos])
+
+    partial_todo: List[PhotoInfo] = []
+    full_todo: List[PhotoInfo] = []
+
+    for bucket in size_buckets:
+        stats.size_candidates += len(bucket)
+        unhashed = [photo for photo in bucket if photo.file_hash is None]
+
+        if len(unhashed) < len(bucket):
+            # Some hashes are known already - partial keys can't be compared
+            # with them, so hash the rest of the bucket fully.
+            full_todo.extend(unhashed)
+        else:
+            partial_todo.extend(bucket)
+
+    # Stage 2: partial hashes (first + last edge_bytes) within size buckets
+    partial_results = map_ordered(
+        _partial_hash_task,
+        [(photo.path, edge_bytes, algorithm) for photo in partial_todo],
+        workers,
+    )
+
+    partial_photos: List[PhotoInfo] = []
+    partial_keys: List[object] = []
+
+    for photo, result in zip(partial_todo, partial_results):
+        if result is None:
+            continue
+
+        partial_hash, full_hash, bytes_read = result
+        stats.partial_hashed += 1
+        stats.bytes_read += bytes_read
+
+        if full_hash is not None:
+            photo.file_hash = full_hash
+
+        partial_photos.append(photo)
+        partial_keys.append((photo.size_bytes, partial_hash))
+
+    for group in _group_by(partial_photos, partial_keys):
+        full_todo.extend(photo for photo in group if photo.file_hash is None)
+
+    # Stage 3: full hashes for the survivors
+    full_hashes = map_ordered(
+        _full_hash_task, [(photo.path, algorithm) for photo in full_todo], workers
+    )
+
+    for photo, file_hash in zip(full_todo, full_hashes):
+        if file_hash is None:
+            continue
+        photo.file_hash = file_hash
+        stats.full_hashed += 1
+        stats.bytes_read += photo.size_bytes
+
+    # Final grouping by full hash, over the candidates in original order
+    candidate_ids = {id(photo) for bucket in size_buckets for photo in bucket}
+    candidates = [photo for photo in photos if id(photo) in candidate_ids]
+    return find_exact_duplicate_groups(candidates)
@@ -1,5 +1,19 @@
 from typing import List, Dict
+
+import numpy as np
+
+from photo_sorter.deduplication.index import find_near_duplicate_components
+from photo_sorter.deduplication.lsh import (
+    DEFAULT_BAND_BITS,
+    DEFAULT_NUM_BANDS,
+    find_near_duplicate_components_lsh,
+)
+from photo_sorter.deduplication.packed import (
+    find_near_duplicate_components_packed,
+    pack_hex_hashes,
+)
 from photo_sorter.scanning.models import PhotoInfo
+from photo_sorter.scanning.photo_table import PhotoTable, PhotoRow
 
 
 def _group_photos_by_file_hash(photos: List[PhotoInfo]) -> Dict[str, List[PhotoInfo]]:
@@ -26,7 +40,13 @@ def find_exact_duplicate_groups(photos: List[PhotoInfo]) -> List[List[PhotoInfo]
     Finds groups of exact duplicates based on file_hash.
     Returns lists of PhotoInfo where each inner list is a group of
     identical files (same hash), with size of at least 2.
+
+    A PhotoTable is grouped on its digest column directly (same groups
+    and order, as PhotoRow views).
     """
+    if isinstance(photos, PhotoTable):
+        return _find_exact_duplicate_groups_in_table(photos)
+
     grouped = _group_photos_by_file_hash(photos)
     duplicate_groups: List[List[PhotoInfo]] = []
 
@@ -37,6 +57,27 @@ def find_exact_duplicate_groups(photos: List[PhotoInfo]) -> List[List[PhotoInfo]
     return duplicate_groups
 
 
+def _find_exact_duplicate_groups_in_table(table: PhotoTable) -> List[List[PhotoRow]]:
+    rows = np.flatnonzero(table.column("has_file_hash"))
+    if len(rows) == 0:
+        return []
+
+    # Cheap prefilter on the first 8 digest bytes: only rows sharing them
+    # with another row can be duplicates, the rest never leave NumPy
+    digests = table.column("file_hash")
+    prefixes = np.ascontiguousarray(digests[rows, :8]).view(np.uint64).ravel()
+    _, inverse, counts = np.unique(prefixes, return_inverse=True, return_counts=True)
+    candidates = rows[counts[inverse.ravel()] >= 2]
+
+    # Full digests of the few candidates, grouped like _group_photos_by_file_hash
+    # (groups in order of first occurrence, members in input order)
+    grouped: Dict[bytes, List[PhotoRow]] = {}
+    for i in candidates.tolist():
+        grouped.setdefault(digests[i].tobytes(), []).append(PhotoRow(table, i))
+
+    return [items for items in grouped.values() if len(items) >= 2]
+
+
 def hamming_distance_hex(hash1: str, hash2: str) -> int:
     """
     Computes Hamming distance between two hex-encoded hashes.
@@ -55,9 +96,16 @@ def hamming_distance_hex(hash1: str, hash2: str) -> int:
     return (n1 ^ n2).bit_count()
 
 
+# Engines available in find_near_duplicate_groups
+NEAR_DUPLICATE_METHODS = ("index", "numpy", "lsh")
+
+
 def find_near_duplicate_groups(
     photos: List[PhotoInfo],
     max_distance: int = 5,
+    method: str = "index",
+    num_bands: int = DEFAULT_NUM_BANDS,
+    band_bits: int = DEFAULT_BAND_BITS,
 ) -> List[List[PhotoInfo]]:
     """
     Finds groups of near-duplicate photos based on perceptual_hash.
@@ -67,8 +115,83 @@ def find_near_duplicate_groups(
     Implementation:
      - takes only photos with perceptual_hash != None,
      - builds groups as connected components by distance threshold.
+
+    method:
+     - "index": neighbours are looked up in a multi-index hash table instead
+       of scanning all photos, with the same groups (and order) as the scan,
+     - "numpy": blockwise all-pairs XOR/popcount over packed uint64 hashes
+       plus union-find. Same groups, but members are in input order.
+     - "lsh": approximate, for millions of hashes - only pairs sharing one
+       of num_bands keys of band_bits random pHash bits are compared
+       (deduplication.lsh). A missed pair can split a group; measure the
+       recall with lsh.measure_lsh_recall. Members are in input order.
+
+    A PhotoTable's uint64 pHash column is used as is (no hex parsing).
     """
+    if method not in NEAR_DUPLICATE_METHODS:
+        raise ValueError(f"Unknown method {method!r}, expected one of {NEAR_DUPLICATE_METHODS}")
+
+    if isinstance(photos, PhotoTable):
+        return _find_near_duplicate_groups_in_table(photos, max_distance, method, num_bands, band_bits)
+
     candidates: List[PhotoInfo] = [p for p in photos if p.perceptual_hash]
+
+    if not candidates or max_distance < 0:
+        # Negative distance never matches anything
+        return []
+
+    hash_lengths = {len(p.perceptual_hash) for p in candidates}  # type: ignore[arg-type]
+    if len(hash_lengths) != 1:
+        # Mixed hash sizes are compared on truncated prefixes pair by pair,
+        # which an index over full hashes can't reproduce - use the plain scan.
+        return _find_near_duplicate_groups_by_scan(candidates, max_distance)
+
+    if method in ("numpy", "lsh"):
+        packed = pack_hex_hashes([p.perceptual_hash for p in candidates])  # type: ignore[misc]
+        if method == "lsh":
+            components = find_near_duplicate_components_lsh(packed, max_distance, num_bands, band_bits)
+        else:
+            components = find_near_duplicate_components_packed(packed, max_distance)
+    else:
+        (hash_length,) = hash_lengths
+        hashes = [int(p.perceptual_hash, 16) for p in candidates]  # type: ignore[arg-type]
+        components = find_near_duplicate_components(hashes, hash_length * 4, max_distance)
+
+    return [[candidates[i] for i in component] for component in components]
+
+
+def _find_near_duplicate_groups_in_table(
+    table: PhotoTable,
+    max_distance: int,
+    method: str,
+    num_bands: int,
+    band_bits: int,
+) -> List[List[PhotoRow]]:
+    rows = np.flatnonzero(table.column("has_perceptual_hash"))
+    if len(rows) == 0 or max_distance < 0:
+        return []
+
+    hashes = table.column("perceptual_hash")[rows]
+    if method == "numpy":
+        components = find_near_duplicate_components_packed(hashes.reshape(-1, 1), max_distance)
+    elif method == "lsh":
+        components = find_near_duplicate_components_lsh(hashes.reshape(-1, 1), max_distance, num_bands, band_bits)
+    else:
+        components = find_near_duplicate_components(hashes.tolist(), 64, max_distance)
+
+    rows = rows.tolist()
+    return [[PhotoRow(table, rows[i]) for i in component] for component in components]
+
+
+def _find_near_duplicate_groups_by_scan(
+    candidates: List[PhotoInfo],
+    max_distance: int,
+) -> List[List[PhotoInfo]]:
+    """
+    Reference implementation of find_near_duplicate_groups: BFS comparing
+    every popped photo with all candidates (O(n^2)). Used for hashes of mixed
+    lengths and to verify the indexed version in benchmarks.
+    """
     n = len(candidates)
 
     if n == 0:
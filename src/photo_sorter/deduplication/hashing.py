@@ -1,70 +1,235 @@
 import hashlib
+import mmap
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Optional
+from typing import List, Optional, Tuple
 
 from PIL import Image  # used for opening images
 import imagehash       # library for perceptual hash
 
+from photo_sorter.buffers import ImageBuffer, open_buffer
+from photo_sorter.parallel import map_ordered
 from photo_sorter.scanning.models import PhotoInfo
 
 
-def compute_file_hash(path: Path, chunk_size: int = 8192) -> str:
+# Algorithm identifiers - change them whenever the hash output changes,
+# so persisted results (analysis cache) computed with the old one are invalidated.
+FILE_HASH_ALGORITHM = "sha256"
+PERCEPTUAL_HASH_ALGORITHM = "phash-8"
+
+# Selectable file hash algorithms. Only equality of digests matters (exact
+# duplicates), so any of them works. blake2b (with a 32-byte digest, the
+# same size as SHA-256) is faster on CPUs without SHA instructions; with
+# SHA-NI / ARMv8 SHA2 sha256 wins - measure with benchmarks/file_hashing.py.
+# The algorithm is part of the analysis cache key, so switching never mixes
+# digests of different algorithms.
+FILE_HASH_ALGORITHMS = ("sha256", "blake2b")
+
+# How compute_file_hash reads the file:
+#  - "read": readinto() one reused buffer of chunk_size bytes,
+#  - "mmap": map the file and hash chunk_size slices of the mapping,
+#  - "file_digest": hashlib.file_digest (Python 3.11+, fixed 256 KiB buffer).
+# "auto" is "read": mmap is up to ~10% faster on a warm page cache, but a file
+# truncated while it is mapped kills the process with SIGBUS.
+FILE_HASH_METHODS = ("auto", "read", "mmap", "file_digest")
+
+# Large reads mean few syscalls, and hashlib releases the GIL while hashing
+# chunks this big, so several threads hash in parallel
+DEFAULT_HASH_BUFFER_SIZE = 1024 * 1024
+
+
+def new_file_hasher(algorithm: str = FILE_HASH_ALGORITHM) -> "hashlib._Hash":
+    """
+    Return a fresh hashlib object for one of FILE_HASH_ALGORITHMS.
+    """
+    if algorithm == "sha256":
+        return hashlib.sha256()
+    if algorithm == "blake2b":
+        return hashlib.blake2b(digest_size=32)
+    raise ValueError(f"Unknown file hash algorithm {algorithm!r}, expected one of {FILE_HASH_ALGORITHMS}")
+
+
+def compute_file_hash_for_buffer(
+    data: ImageBuffer,
+    algorithm: str = FILE_HASH_ALGORITHM,
+) -> str:
+    """
+    Hash of bytes already in memory (bytes, memoryview or mmap, hashed in
+    place) - the same value compute_file_hash returns for a file with this content.
+    """
+    hasher = new_file_hasher(algorithm)
+    hasher.update(data)
+    return hasher.hexdigest()
+
+
+def compute_file_hash(
+    path: Path,
+    chunk_size: int = DEFAULT_HASH_BUFFER_SIZE,
+    algorithm: str = FILE_HASH_ALGORITHM,
+    method: str = "auto",
+) -> str:
     """
-    Computes SHA-256 hash for a file.
-    Works in chunks (chunk_size) to support large files.
+    Computes the hash of a file (SHA-256 by default, see FILE_HASH_ALGORITHMS).
+    Works in chunks (chunk_size) to support large files; method picks
+    how the file is read (FILE_HASH_METHODS) - all give the same digest.
+    Contents that are already in memory: compute_file_hash_for_buffer.
     """
-    sha = hashlib.sha256()
+    if method not in FILE_HASH_METHODS:
+        raise ValueError(f"Unknown method {method!r}, expected one of {FILE_HASH_METHODS}")
+
+    hasher = new_file_hasher(algorithm)
 
     with path.open("rb") as f:
-        while True:
-            chunk = f.read(chunk_size)
-            if not chunk:
-                break
-            sha.update(chunk)
+        if method == "file_digest" and hasattr(hashlib, "file_digest"):
+            return hashlib.file_digest(f, lambda: hasher).hexdigest()
+
+        if method == "mmap":
+            try:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                # Empty files can't be mapped - nothing to hash
+                return hasher.hexdigest()
+            with mapped, memoryview(mapped) as view:
+                for start in range(0, len(view), chunk_size):
+                    hasher.update(view[start:start + chunk_size])
+            return hasher.hexdigest()
+
+        # One buffer reused for every chunk - no allocation per read
+        buffer = bytearray(chunk_size)
+        with memoryview(buffer) as view:
+            while True:
+                size = f.readinto(buffer)
+                if not size:
+                    break
+                hasher.update(view[:size])
+
+    return hasher.hexdigest()
 
-    return sha.hexdigest()
+
+def perceptual_hash_algorithm(decode_scale: int = 1) -> str:
+    """
+    Identifier of the pHash computed from a 1/decode_scale resolution decode.
+    """
+    if decode_scale == 1:
+        return PERCEPTUAL_HASH_ALGORITHM
+    return f"{PERCEPTUAL_HASH_ALGORITHM}@1/{decode_scale}"
 
 
-def compute_perceptual_hash(path: Path) -> Optional[str]:
+def compute_perceptual_hash(path: Path, decode_scale: int = 1) -> Optional[str]:
     """
     Computes perceptual hash (pHash) for an image file.
     Returns hex string or None if file cannot be read.
+    See compute_perceptual_hash_for_buffer.
     """
     try:
-        with Image.open(path) as img:
-            ph = imagehash.phash(img)  # can experiment later with ahash, dhash, whash
-            return str(ph)  # hex format by default (e.g. 'ff8f0f00...')
+        data = path.read_bytes()
+    except OSError:
+        return None
+    return compute_perceptual_hash_for_buffer(data, decode_scale)
+
+
+def compute_perceptual_hash_for_buffer(data: ImageBuffer, decode_scale: int = 1) -> Optional[str]:
+    """
+    Computes perceptual hash (pHash) for the contents of an image file
+    already in memory (bytes, memoryview or mmap - not copied up front).
+    Returns hex string or None if the image cannot be decoded.
+
+    decode_scale > 1 lets the JPEG decoder produce a 1/decode_scale image
+    straight from the DCT coefficients (pHash shrinks it to 32x32 anyway).
+    Other formats are decoded at full size.
+    """
+    try:
+        with open_buffer(data) as f, Image.open(f) as img:
+            if decode_scale > 1:
+                img.draft("L", (img.width // decode_scale, img.height // decode_scale))
+            return compute_perceptual_hash_for_image(img)
     except Exception:
         # Error reading file / format - return None
         return None
 
 
-def annotate_photos_with_file_hash(photos: List[PhotoInfo]) -> List[PhotoInfo]:
+def compute_perceptual_hash_for_image(img: Image.Image) -> str:
+    """
+    Computes perceptual hash (pHash) for an already opened PIL image.
+    pHash works on grayscale internally, so passing an image that was
+    already converted to mode "L" gives the same hash without another decode.
+    """
+    ph = imagehash.phash(img)  # can experiment later with ahash, dhash, whash
+    return str(ph)  # hex format by default (e.g. 'ff8f0f00...')
+
+
+def _compute_perceptual_hash_task(task: Tuple[Path, int]) -> Optional[str]:
+    path, decode_scale = task
+    return compute_perceptual_hash(path, decode_scale)
+
+
+def _compute_file_hash_or_none(task: Tuple[Path, str]) -> Optional[str]:
+    """
+    compute_file_hash for use in a worker process or thread:
+    a file that disappeared gives None instead of an exception.
     """
-    Adds SHA-256 hash to each PhotoInfo in the list (in-place).
+    path, algorithm = task
+    try:
+        return compute_file_hash(path, algorithm=algorithm)
+    except FileNotFoundError:
+        # If file disappeared - leave as None
+        return None
+
+
+def annotate_photos_with_file_hash(
+    photos: List[PhotoInfo],
+    workers: Optional[int] = 1,
+    algorithm: str = FILE_HASH_ALGORITHM,
+    threads: int = 1,
+) -> List[PhotoInfo]:
+    """
+    Adds the file hash (SHA-256 by default, see FILE_HASH_ALGORITHMS)
+    to each PhotoInfo in the list (in-place).
     Computes file hash for each photo and saves it in the file_hash field.
     Works in-place on the list passed as argument, returning the same list
     for convenience in chaining.
+
+    workers > 1 hashes files in a process pool (None = one per CPU core);
+    results are merged back in list order.
+    threads > 1 hashes in a thread pool instead - reads and hashlib release
+    the GIL, so threads scale too, without process startup and pickling.
     """
-    for photo in photos:
-        # Don't recompute if hash already exists
-        if photo.file_hash is None:
-            try:
-                photo.file_hash = compute_file_hash(photo.path)
-            except FileNotFoundError:
-                # If file disappeared - leave as None
-                photo.file_hash = None
+    new_file_hasher(algorithm)  # unknown algorithm -> ValueError before any work
+
+    # Don't recompute if hash already exists
+    todo = [photo for photo in photos if photo.file_hash is None]
+    tasks = [(p.path, algorithm) for p in todo]
+
+    hashes: List[Optional[str]]
+    if threads > 1 and len(tasks) > 1:
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            hashes = list(executor.map(_compute_file_hash_or_none, tasks))
+    else:
+        hashes = map_ordered(_compute_file_hash_or_none, tasks, workers)
+
+    for photo, file_hash in zip(todo, hashes):
+        photo.file_hash = file_hash
 
     return photos
 
-def annotate_photos_with_perceptual_hash(photos: List[PhotoInfo]) -> List[PhotoInfo]:
+def annotate_photos_with_perceptual_hash(
+    photos: List[PhotoInfo],
+    workers: Optional[int] = 1,
+    decode_scale: int = 1,
+) -> List[PhotoInfo]:
     """
     Adds perceptual hash (pHash) to each PhotoInfo in the list (in-place).
     Computes perceptual hash for each photo and saves it in the perceptual_hash field.
     Works in-place but returns the list for convenience.
+
+    workers > 1 computes hashes in a process pool (None = one per CPU core).
+    decode_scale > 1 decodes JPEGs at reduced resolution (see compute_perceptual_hash).
     """
-    for photo in photos:
-        if photo.perceptual_hash is None:
-            photo.perceptual_hash = compute_perceptual_hash(photo.path)
+    todo = [photo for photo in photos if photo.perceptual_hash is None]
+    tasks = [(p.path, decode_scale) for p in todo]
+    hashes = map_ordered(_compute_perceptual_hash_task, tasks, workers)
+
+    for photo, perceptual_hash in zip(todo, hashes):
+        photo.perceptual_hash = perceptual_hash
 
     return photos
\ No newline at end of file
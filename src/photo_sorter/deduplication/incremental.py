@@ -0,0 +1,183 @@
+from __future__ import annotations
+
+from typing import Dict, List, Optional, Set
+
+from photo_sorter.deduplication.index import MultiIndexHashTable
+from photo_sorter.scanning.models import PhotoInfo
+
+
+class IncrementalExactGrouper:
+    """
+    Builds exact duplicate groups (same file_hash) one photo at a time,
+    so groups can be reported while photos are still being analysed.
+    Photos can also be removed again (incremental rescans).
+    """
+
+    def __init__(self) -> None:
+        self._by_hash: Dict[str, List[PhotoInfo]] = {}
+
+    def add(self, photo: PhotoInfo) -> Optional[List[PhotoInfo]]:
+        """
+        Add a photo. Returns its duplicate group if the photo created or
+        extended one (the returned list keeps growing with later photos),
+        otherwise None.
+        """
+        if not photo.file_hash:
+            # No hash - e.g. file disappeared or wasn't computed
+            return None
+
+        group = self._by_hash.setdefault(photo.file_hash, [])
+        group.append(photo)
+        return group if len(group) >= 2 else None
+
+    def remove(self, photo: PhotoInfo) -> None:
+        """
+        Remove a previously added photo (matched by identity).
+        """
+        if not photo.file_hash:
+            return
+
+        group = self._by_hash.get(photo.file_hash)
+        if group is None:
+            return
+
+        group[:] = [p for p in group if p is not photo]
+        if not group:
+            del self._by_hash[photo.file_hash]
+
+    def groups(self) -> List[List[PhotoInfo]]:
+        """
+        All current groups with at least 2 photos, in order of first appearance.
+        """
+        return [group for group in self._by_hash.values() if len(group) >= 2]
+
+
+class IncrementalNearGrouper:
+    """
+    Maintains near-duplicate groups (connected components of pHashes within
+    max_distance) while photos are added and removed one at a time.
+
+    Neighbours of a new photo are found in a multi-index hash table and their
+    components are merged (smaller sets into the bigger one). Removing a photo
+    only re-splits the component it belonged to - components are closed under
+    the distance relation, so no other photo can be affected.
+
+    The groups are the same as find_near_duplicate_groups returns for the
+    current photos (hashes of equal length); members are in the order the
+    photos were added.
+    """
+
+    def __init__(self, max_distance: int = 5, expected_size: int = 100_000) -> None:
+        self.max_distance = max_distance
+        self.expected_size = expected_size
+
+        self._next_item = 0
+        self._items: Dict[int, int] = {}  # id(photo) -> item
+        self._photos: Dict[int, PhotoInfo] = {}  # item -> photo
+        self._values: Dict[int, int] = {}  # item -> hash as int
+        self._item_bits: Dict[int, int] = {}  # item -> hash length in bits
+        self._component: Dict[int, Set[int]] = {}  # item -> shared set of its component
+
+        # One index per hash length - hashes of different sizes aren't compared
+        self._indexes: Dict[int, MultiIndexHashTable] = {}
+
+    def __len__(self) -> int:
+        return len(self._photos)
+
+    def add(self, photo: PhotoInfo) -> None:
+        """
+        Add a photo and merge it with the groups of all photos within max_distance.
+        """
+        if not photo.perceptual_hash or self.max_distance < 0:
+            return
+
+        bits = len(photo.perceptual_hash) * 4
+        value = int(photo.perceptual_hash, 16)
+
+        index = self._indexes.get(bits)
+        if index is None:
+            index = MultiIndexHashTable(bits, self.max_distance, self.expected_size)
+            self._indexes[bits] = index
+
+        item = self._next_item
+        self._next_item += 1
+        self._items[id(photo)] = item
+        self._photos[item] = photo
+        self._values[item] = value
+        self._item_bits[item] = bits
+
+        component = {item}
+        for other in index.query(value):
+            other_component = self._component[other]
+            if other_component is component:
+                continue
+
+            # Merge the smaller set into the bigger one
+            if len(other_component) > len(component):
+                component, other_component = other_component, component
+
+            component.update(other_component)
+            for member in other_component:
+                self._component[member] = component
+
+        self._component[item] = component
+        index.add(item, value)
+
+    def remove(self, photo: PhotoInfo) -> None:
+        """
+        Remove a previously added photo (matched by identity) and split its
+        group if the photo was connecting parts of it.
+        """
+        item = self._items.pop(id(photo), None)
+        if item is None:
+            return
+
+        bits = self._item_bits.pop(item)
+        self._indexes[bits].remove(item)
+        del self._photos[item]
+        del self._values[item]
+
+        component = self._component.pop(item)
+        component.discard(item)
+        self._split_component(component, self._indexes[bits])
+
+    def _split_component(self, members: Set[int], index: MultiIndexHashTable) -> None:
+        """
+        Recompute connected components among the given members (BFS using
+        the index, restricted to the members).
+        """
+        unvisited = set(members)
+
+        while unvisited:
+            start = unvisited.pop()
+            component = {start}
+            frontier = [start]
+
+            while frontier:
+                current = frontier.pop()
+                for other in index.query(self._values[current]):
+                    if other in unvisited:
+                        unvisited.discard(other)
+                        component.add(other)
+                        frontier.append(other)
+
+            for member in component:
+                self._component[member] = component
+
+    def groups(self) -> List[List[PhotoInfo]]:
+        """
+        All current groups with at least 2 photos, ordered by their oldest member.
+        """
+        seen: Set[int] = set()
+        groups: List[List[PhotoInfo]] = []
+
+        # Items are increasing, so iterating in insertion order gives a stable result
+        for item in self._photos:
+            component = self._component[item]
+            if id(component) in seen or len(component) < 2:
+                continue
+
+            seen.add(id(component))
+            groups.append([self._photos[i] for i in sorted(component)])
+
+        return groups
@@ -0,0 +1,183 @@
+from __future__ import annotations
+
+import math
+from itertools import combinations
+from typing import Dict, List, Sequence, Set, Tuple
+
+
+def _choose_num_blocks(bits: int, max_distance: int, expected_size: int) -> int:
+    """
+    Choose how many substrings (blocks) the hash is split into.
+
+    Blocks of about log2(n) bits keep buckets small (~1 entry each) while
+    the number of probed neighbours per block stays low (Norouzi et al.,
+    "Fast Search in Hamming Space with Multi-Index Hashing"). More than
+    max_distance + 1 blocks never helps - the search radius is already 0.
+    """
+    block_bits = max(1.0, math.log2(max(expected_size, 2)))
+    num_blocks = round(bits / block_bits)
+    return max(1, min(num_blocks, max_distance + 1, bits))
+
+
+def _block_layout(bits: int, num_blocks: int) -> List[Tuple[int, int]]:
+    """
+    Split `bits` into num_blocks (shift, width) pairs of (almost) equal width.
+    """
+    base, extra = divmod(bits, num_blocks)
+    layout: List[Tuple[int, int]] = []
+    shift = 0
+
+    for k in range(num_blocks):
+        width = base + (1 if k < extra else 0)
+        layout.append((shift, width))
+        shift += width
+
+    return layout
+
+
+def _flip_masks(width: int, radius: int) -> List[int]:
+    """
+    All XOR masks over `width` bits with at most `radius` bits set
+    (including the zero mask).
+    """
+    masks = [0]
+    for r in range(1, min(radius, width) + 1):
+        for positions in combinations(range(width), r):
+            mask = 0
+            for pos in positions:
+                mask |= 1 << pos
+            masks.append(mask)
+    return masks
+
+
+class MultiIndexHashTable:
+    """
+    Exact Hamming-radius search over integer hashes with multi-index hashing.
+
+    Every hash is split into m blocks and stored in m tables keyed by the
+    block value. By the pigeonhole principle, two hashes within distance d
+    differ by at most d // m bits in at least one block, so probing each table
+    with all block values within that radius finds every true neighbour.
+    Candidates are then verified with a full XOR + popcount.
+
+    Entries can be added and removed at any time, which allows both
+    incremental grouping and "visited" bookkeeping in a BFS.
+    """
+
+    def __init__(self, bits: int, max_distance: int, expected_size: int = 0) -> None:
+        if bits <= 0:
+            raise ValueError("bits must be positive")
+        if max_distance < 0:
+            raise ValueError("max_distance must be >= 0")
+
+        self.bits = bits
+        self.max_distance = max_distance
+
+        num_blocks = _choose_num_blocks(bits, max_distance, expected_size)
+        self._layout = _block_layout(bits, num_blocks)
+        radius = max_distance // num_blocks
+        self._masks = [_flip_masks(width, radius) for _, width in self._layout]
+
+        self._tables: List[Dict[int, Set[int]]] = [{} for _ in self._layout]
+        self._hashes: Dict[int, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._hashes)
+
+    def __contains__(self, item_id: int) -> bool:
+        return item_id in self._hashes
+
+    def _blocks(self, value: int) -> List[int]:
+        return [(value >> shift) & ((1 << width) - 1) for shift, width in self._layout]
+
+    def add(self, item_id: int, value: int) -> None:
+        """
+        Insert a hash under the given id (ids must be unique).
+        """
+        if item_id in self._hashes:
+            raise KeyError(f"Duplicate id: {item_id}")
+
+        self._hashes[item_id] = value
+        for table, block in zip(self._tables, self._blocks(value)):
+            bucket = table.get(block)
+            if bucket is None:
+                table[block] = {item_id}
+            else:
+                bucket.add(item_id)
+
+    def remove(self, item_id: int) -> None:
+        """
+        Remove the hash stored under the given id.
+        """
+        value = self._hashes.pop(item_id)
+        for table, block in zip(self._tables, self._blocks(value)):
+            bucket = table[block]
+            bucket.discard(item_id)
+            if not bucket:
+                del table[block]
+
+    def query(self, value: int) -> List[int]:
+        """
+        Return ids of all stored hashes within max_distance of value
+        (in no particular order).
+        """
+        candidates: Set[int] = set()
+
+        for table, block, masks in zip(self._tables, self._blocks(value), self._masks):
+            for mask in masks:
+                bucket = table.get(block ^ mask)
+                if bucket:
+                    candidates.update(bucket)
+
+        hashes = self._hashes
+        max_distance = self.max_distance
+        return [
+            item_id
+            for item_id in candidates
+            if (hashes[item_id] ^ value).bit_count() <= max_distance
+        ]
+
+
+def find_near_duplicate_components(
+    hashes: Sequence[int],
+    bits: int,
+    max_distance: int,
+) -> List[List[int]]:
+    """
+    Connected components (size >= 2) of the "distance <= max_distance" graph
+    over integer hashes, as lists of indices into `hashes`.
+
+    The traversal order matches the original O(n^2) BFS exactly: components
+    start at the lowest unvisited index and neighbours of each popped node
+    are appended in ascending index order. Visited nodes are removed from the
+    index, so every hash is found as a neighbour at most once.
+    """
+    n = len(hashes)
+    index = MultiIndexHashTable(bits, max_distance, expected_size=n)
+
+    for i, value in enumerate(hashes):
+        index.add(i, value)
+
+    groups: List[List[int]] = []
+
+    for i in range(n):
+        if i not in index:
+            # Already visited as part of an earlier component
+            continue
+
+        index.remove(i)
+        group = [i]
+        frontier = [i]
+
+        while frontier:
+            current_idx = frontier.pop()
+
+            for j in sorted(index.query(hashes[current_idx])):
+                index.remove(j)
+                group.append(j)
+                frontier.append(j)
+
+        if len(group) >= 2:
+            groups.append(group)
+
+    return groups
@@ -0,0 +1,259 @@
+from __future__ import annotations
+
+import math
+import random
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from photo_sorter.deduplication.packed import popcount64
+
+# Defaults for 64-bit pHashes in libraries of millions: 24-bit keys leave
+# ~0.3 unrelated hashes per bucket at 5 million, and 32 bands find a pair
+# at distance 5 with ~95% probability (see candidate_probability).
+DEFAULT_NUM_BANDS = 32
+DEFAULT_BAND_BITS = 24
+
+# Buckets are scanned up to this many neighbours deep. A bigger bucket (e.g.
+# thousands of near-black photos sharing a key) only contributes pairs
+# within this distance in sort order - it would otherwise be quadratic.
+DEFAULT_MAX_BUCKET_SIZE = 64
+
+# Hashes compared per block when measuring recall (block x n distances at a time)
+_RECALL_BLOCK_SIZE = 64
+_RECALL_COLUMN_BLOCK = 1 << 16
+
+
+@dataclass
+class LshStats:
+    """Work done by one LSH grouping run."""
+
+    candidate_pairs: int = 0  # pairs sharing a band key (with repeats across bands)
+    verified_pairs: int = 0  # distinct pairs within max_distance
+    oversized_buckets: int = 0  # buckets larger than max_bucket_size (partly scanned)
+
+
+@dataclass
+class LshRecall:
+    """
+    Recall of an LSH grouping measured on sampled hashes: of all pairs
+    (sampled hash, any hash) within max_distance, the share that ended up
+    in the same group.
+    """
+
+    sample_size: int
+    exact_pairs: int
+    found_pairs: int
+
+    @property
+    def recall(self) -> float:
+        return self.found_pairs / self.exact_pairs if self.exact_pairs else 1.0
+
+
+def band_masks(bits: int, num_bands: int, band_bits: int, seed: int = 0) -> List[int]:
+    """
+    Bit masks of the bands: band_bits random bit positions each. Consecutive
+    bands take disjoint positions from one random permutation of the bits
+    until it runs out, then a new permutation starts - so with
+    num_bands * band_bits <= bits the bands partition the hash, and with
+    num_bands > max_distance every near pair shares a band (exact).
+    """
+    if not 1 <= band_bits <= bits:
+        raise ValueError(f"band_bits must be between 1 and {bits}, got {band_bits}")
+    if num_bands < 1:
+        raise ValueError(f"num_bands must be >= 1, got {num_bands}")
+
+    rng = random.Random(seed)
+    masks: List[int] = []
+    positions: List[int] = []
+
+    for _ in range(num_bands):
+        if len(positions) < band_bits:
+            positions = list(range(bits))
+            rng.shuffle(positions)
+        mask = 0
+        for position in positions[:band_bits]:
+            mask |= 1 << position
+        del positions[:band_bits]
+        masks.append(mask)
+
+    return masks
+
+
+def candidate_probability(distance: int, bits: int, num_bands: int, band_bits: int) -> float:
+    """
+    Probability that a pair of hashes at the given Hamming distance shares
+    at least one band key (becomes a candidate), treating bands as
+    independent random bit samples. Use it to pick num_bands/band_bits for a
+    target recall before measuring with measure_lsh_recall.
+    """
+    if distance > bits - band_bits:
+        return 0.0
+    band_match = math.comb(bits - distance, band_bits) / math.comb(bits, band_bits)
+    return 1.0 - (1.0 - band_match) ** num_bands
+
+
+def _masks_to_words(masks: Sequence[int], words: int) -> np.ndarray:
+    # Same layout as pack_hex_hashes: the first word holds the highest bits
+    return np.array(
+        [[(mask >> (64 * (words - 1 - w))) & 0xFFFFFFFFFFFFFFFF for w in range(words)] for mask in masks],
+        dtype=np.uint64,
+    )
+
+
+def find_near_duplicate_pairs_lsh(
+    packed: np.ndarray,
+    max_distance: int,
+    num_bands: int = DEFAULT_NUM_BANDS,
+    band_bits: int = DEFAULT_BAND_BITS,
+    max_bucket_size: int = DEFAULT_MAX_BUCKET_SIZE,
+    seed: int = 0,
+    stats: Optional[LshStats] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Pairs i < j of packed hashes (shape (n, words), see pack_hex_hashes)
+    within max_distance that share at least one LSH band key.
+
+    Per band, the hashes are sorted by their masked bits, so equal keys are
+    adjacent; candidates are verified with an exact XOR + popcount, so every
+    pair returned really is within max_distance (no false positives) - only
+    pairs that never share a key are missed. Time is O(bands * n log n).
+    """
+    if stats is None:
+        stats = LshStats()
+
+    n, words = packed.shape
+    found: List[np.ndarray] = []
+    masks = _masks_to_words(band_masks(words * 64, num_bands, band_bits, seed), words)
+
+    for mask in masks:
+        keys = packed & mask
+        if words == 1:
+            order = np.argsort(keys[:, 0])
+        else:
+            order = np.lexsort(keys.T[::-1])
+        keys = keys[order]
+
+        for offset in range(1, max(2, max_bucket_size)):
+            same = (keys[offset:] == keys[:-offset]).all(axis=1)
+            if not same.any():
+                break
+            left = order[:-offset][same]
+            right = order[offset:][same]
+            stats.candidate_pairs += len(left)
+
+            distances = popcount64(packed[left] ^ packed[right]).sum(axis=1)
+            close = distances <= max_distance
+            low = np.minimum(left[close], right[close])
+            high = np.maximum(left[close], right[close])
+            found.append(low.astype(np.int64) * n + high)
+        else:
+            # Bucket boundaries are where the key changes; count the big ones
+            starts = np.flatnonzero(np.r_[True, (keys[1:] != keys[:-1]).any(axis=1), True])
+            stats.oversized_buckets += int(np.count_nonzero(np.diff(starts) > max_bucket_size))
+
+    if not found:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty
+
+    # A close pair usually shares several bands - keep it once
+    # (sort + compare is several times faster than np.unique here)
+    codes = np.concatenate(found)
+    codes.sort()
+    codes = codes[np.r_[True, codes[1:] != codes[:-1]]]
+    stats.verified_pairs += len(codes)
+    return codes // n, codes % n
+
+
+def connected_components(n: int, left: np.ndarray, right: np.ndarray) -> List[List[int]]:
+    """
+    Connected components (size >= 2) of the graph on 0..n-1 with the given
+    edges, members in ascending order, groups ordered by smallest member
+    (like UnionFind.groups) - vectorised for millions of nodes: every node
+    repeatedly takes the smallest label of its neighbours, then labels are
+    pointer-jumped to their root.
+    """
+    if len(left) == 0:
+        return []
+
+    labels = np.arange(n)
+    while True:
+        low = np.minimum(labels[left], labels[right])
+        np.minimum.at(labels, labels[left], low)
+        np.minimum.at(labels, labels[right], low)
+        while True:
+            jumped = labels[labels]
+            if np.array_equal(jumped, labels):
+                break
+            labels = jumped
+        if np.array_equal(labels[left], labels[right]):
+            break
+
+    nodes = np.unique(np.concatenate([left, right]))
+    node_labels = labels[nodes]
+    order = np.argsort(node_labels, kind="stable")
+    nodes, node_labels = nodes[order], node_labels[order]
+    splits = np.flatnonzero(node_labels[1:] != node_labels[:-1]) + 1
+    return [group.tolist() for group in np.split(nodes, splits)]
+
+
+def find_near_duplicate_components_lsh(
+    packed: np.ndarray,
+    max_distance: int,
+    num_bands: int = DEFAULT_NUM_BANDS,
+    band_bits: int = DEFAULT_BAND_BITS,
+    max_bucket_size: int = DEFAULT_MAX_BUCKET_SIZE,
+    seed: int = 0,
+    stats: Optional[LshStats] = None,
+) -> List[List[int]]:
+    """
+    Approximate counterpart of find_near_duplicate_components_packed:
+    components of the pairs found by find_near_duplicate_pairs_lsh. Groups
+    can only be split (a missed pair), never merged wrongly. Members are in
+    ascending index order, groups ordered by smallest member.
+    """
+    left, right = find_near_duplicate_pairs_lsh(
+        packed, max_distance, num_bands, band_bits, max_bucket_size, seed, stats
+    )
+    return connected_components(packed.shape[0], left, right)
+
+
+def measure_lsh_recall(
+    packed: np.ndarray,
+    components: List[List[int]],
+    max_distance: int,
+    sample_size: int = 1000,
+    seed: int = 0,
+) -> LshRecall:
+    """
+    Measure the recall of an approximate grouping (components as returned
+    by find_near_duplicate_components_lsh for the same packed hashes):
+    sample_size random hashes are compared exactly with all n hashes
+    (O(sample_size * n)), and every pair within max_distance counts as
+    found if both hashes are in the same component.
+    """
+    n = packed.shape[0]
+    labels = np.full(n, -1, dtype=np.int64)
+    for label, component in enumerate(components):
+        labels[component] = label
+
+    rng = np.random.default_rng(seed)
+    sample = np.sort(rng.choice(n, size=min(sample_size, n), replace=False))
+
+    exact_pairs = found_pairs = 0
+    for start in range(0, len(sample), _RECALL_BLOCK_SIZE):
+        queries = sample[start:start + _RECALL_BLOCK_SIZE]
+        for column in range(0, n, _RECALL_COLUMN_BLOCK):
+            others = packed[column:column + _RECALL_COLUMN_BLOCK]
+            distances = popcount64(packed[queries][:, None, :] ^ others[None, :, :]).sum(axis=2)
+            rows, cols = np.nonzero(distances <= max_distance)
+            cols += column
+            pairs = queries[rows] != cols  # a hash is not its own near duplicate
+            rows, cols = rows[pairs], cols[pairs]
+
+            exact_pairs += len(rows)
+            query_labels = labels[queries[rows]]
+            found_pairs += int(np.count_nonzero((query_labels >= 0) & (query_labels == labels[cols])))
+
+    return LshRecall(len(sample), exact_pairs, found_pairs)
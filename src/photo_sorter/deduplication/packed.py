@@ -0,0 +1,180 @@
+from __future__ import annotations
+
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from photo_sorter.deduplication.union_find import UnionFind
+from photo_sorter.scanning.models import PhotoInfo
+
+
+# Hex characters per 64-bit word
+_HEX_PER_WORD = 16
+
+# Rows per block in the blockwise all-pairs kernel. One block of XORs takes
+# block_size^2 * words * 8 bytes (8 MiB for 1024 x 1024 single-word hashes).
+DEFAULT_BLOCK_SIZE = 1024
+
+# Bit counts of all byte values - popcount fallback for NumPy < 2.0
+_BYTE_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def popcount64(values: np.ndarray) -> np.ndarray:
+    """
+    Number of set bits in every element of a uint64 array (same shape).
+    """
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(values)
+
+    as_bytes = np.ascontiguousarray(values).view(np.uint8)
+    counts = _BYTE_POPCOUNT[as_bytes].reshape(values.shape + (8,))
+    return counts.sum(axis=-1, dtype=np.uint8)
+
+
+def words_for_hex_length(hex_length: int) -> int:
+    """
+    Number of uint64 words needed to store a hex hash of the given length.
+    """
+    return max(1, -(-hex_length // _HEX_PER_WORD))
+
+
+def pack_hex_hashes(hashes: Sequence[str], words: Optional[int] = None) -> np.ndarray:
+    """
+    Pack hex-encoded hashes into a (n, words) uint64 array.
+
+    Longer hashes (e.g. pHash with hash_size=16 -> 256 bits) use several
+    words per row. Hashes are left-padded with zeros to a whole number of
+    words, which doesn't change any Hamming distance.
+    """
+    if words is None:
+        longest = max((len(h) for h in hashes), default=_HEX_PER_WORD)
+        words = words_for_hex_length(longest)
+
+    width = words * _HEX_PER_WORD
+    raw = bytes.fromhex("".join(h.rjust(width, "0") for h in hashes))
+
+    # Hex strings are big-endian; convert to native uint64 in one go
+    packed = np.frombuffer(raw, dtype=">u8").astype(np.uint64)
+    return packed.reshape(len(hashes), words)
+
+
+def hamming_distances(query: np.ndarray, packed: np.ndarray) -> np.ndarray:
+    """
+    Hamming distances from one packed hash (shape (words,)) to every row
+    of a packed array (shape (n, words)). Returns an (n,) array.
+    """
+    xor = np.bitwise_xor(packed, query)
+    return popcount64(xor).sum(axis=1, dtype=np.uint32)
+
+
+def iter_pairwise_distance_blocks(
+    packed: np.ndarray,
+    block_size: int = DEFAULT_BLOCK_SIZE,
+) -> Iterator[Tuple[int, int, np.ndarray]]:
+    """
+    Blockwise all-pairs Hamming distances over the upper triangle.
+
+    Yields (row_start, col_start, distances) where distances[a, b] is the
+    distance between rows row_start + a and col_start + b, with
+    col_start >= row_start. Memory stays bounded by one block at a time.
+    """
+    n = packed.shape[0]
+
+    for row_start in range(0, n, block_size):
+        rows = packed[row_start:row_start + block_size]
+
+        for col_start in range(row_start, n, block_size):
+            cols = packed[col_start:col_start + block_size]
+            xor = np.bitwise_xor(rows[:, None, :], cols[None, :, :])
+            yield row_start, col_start, popcount64(xor).sum(axis=2, dtype=np.uint32)
+
+
+def find_pairs_within_distance(
+    packed: np.ndarray,
+    max_distance: int,
+    block_size: int = DEFAULT_BLOCK_SIZE,
+) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Yield (i, j) index arrays of all pairs i < j with distance <= max_distance,
+    one batch per block.
+    """
+    for row_start, col_start, distances in iter_pairwise_distance_blocks(packed, block_size):
+        close = distances <= max_distance
+
+        if row_start == col_start:
+            # Diagonal block: keep only pairs above the diagonal (i < j)
+            close = np.triu(close, k=1)
+
+        rows, cols = np.nonzero(close)
+        if rows.size:
+            yield rows + row_start, cols + col_start
+
+
+def find_near_duplicate_components_packed(
+    packed: np.ndarray,
+    max_distance: int,
+    block_size: int = DEFAULT_BLOCK_SIZE,
+) -> List[List[int]]:
+    """
+    Connected components (size >= 2) of the "distance <= max_distance" graph
+    over packed hashes, using the blockwise kernel and union-find.
+    Members are in ascending index order, groups ordered by smallest member.
+    """
+    union_find = UnionFind(packed.shape[0])
+
+    for rows, cols in find_pairs_within_distance(packed, max_distance, block_size):
+        for i, j in zip(rows.tolist(), cols.tolist()):
+            union_find.union(i, j)
+
+    return union_find.groups(min_size=2)
+
+
+class PackedHashLibrary:
+    """
+    Perceptual hashes of a photo library packed into a uint64 array,
+    for interactive "which photos look like this one?" queries.
+
+    Usage:
+        library = PackedHashLibrary(photos)
+        for photo, distance in library.query_photo(selected, max_distance=8):
+            ...
+    """
+
+    def __init__(self, photos: Sequence[PhotoInfo]) -> None:
+        self.photos: List[PhotoInfo] = [p for p in photos if p.perceptual_hash]
+        hashes = [p.perceptual_hash for p in self.photos]
+        self.packed = pack_hex_hashes(hashes)  # type: ignore[arg-type]
+        self.words = self.packed.shape[1]
+
+    def __len__(self) -> int:
+        return len(self.photos)
+
+    def query(self, perceptual_hash: str, max_distance: int = 5) -> List[Tuple[PhotoInfo, int]]:
+        """
+        Return (photo, distance) for every photo within max_distance of the
+        given hex hash, closest first.
+        """
+        if not self.photos:
+            return []
+
+        query = pack_hex_hashes([perceptual_hash], words=self.words)[0]
+        distances = hamming_distances(query, self.packed)
+
+        matches = np.nonzero(distances <= max_distance)[0]
+        # Stable sort keeps library order among equal distances
+        matches = matches[np.argsort(distances[matches], kind="stable")]
+
+        return [(self.photos[i], int(distances[i])) for i in matches.tolist()]
+
+    def query_photo(self, photo: PhotoInfo, max_distance: int = 5) -> List[Tuple[PhotoInfo, int]]:
+        """
+        Like query(), for a photo of the library - the photo itself is left out.
+        """
+        if not photo.perceptual_hash:
+            return []
+
+        return [
+            (other, distance)
+            for other, distance in self.query(photo.perceptual_hash, max_distance)
+            if other is not photo
+        ]
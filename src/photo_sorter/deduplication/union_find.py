@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+from typing import Dict, List
+
+
+class UnionFind:
+    """
+    Disjoint-set forest over the integers 0..n-1
+    (union by size, find with path compression).
+    """
+
+    def __init__(self, size: int) -> None:
+        self._parent = list(range(size))
+        self._size = [1] * size
+
+    def __len__(self) -> int:
+        return len(self._parent)
+
+    def add(self) -> int:
+        """
+        Add a new singleton set and return its element id.
+        """
+        item = len(self._parent)
+        self._parent.append(item)
+        self._size.append(1)
+        return item
+
+    def find(self, item: int) -> int:
+        """
+        Return the representative (root) of the set containing item.
+        """
+        parent = self._parent
+
+        root = item
+        while parent[root] != root:
+            root = parent[root]
+
+        # Path compression: point every node on the way directly at the root
+        while parent[item] != root:
+            parent[item], item = root, parent[item]
+
+        return root
+
+    def union(self, a: int, b: int) -> int:
+        """
+        Merge the sets containing a and b and return the new root.
+        """
+        root_a = self.find(a)
+        root_b = self.find(b)
+
+        if root_a == root_b:
+            return root_a
+
+        # Union by size: hang the smaller tree under the bigger one
+        if self._size[root_a] < self._size[root_b]:
+            root_a, root_b = root_b, root_a
+
+        self._parent[root_b] = root_a
+        self._size[root_a] += self._size[root_b]
+        return root_a
+
+    def set_size(self, item: int) -> int:
+        """
+        Return the number of elements in the set containing item.
+        """
+        return self._size[self.find(item)]
+
+    def groups(self, min_size: int = 2) -> List[List[int]]:
+        """
+        Return all sets with at least min_size elements. Members are in
+        ascending order and groups are ordered by their smallest member.
+        """
+        members: Dict[int, List[int]] = {}
+
+        for item in range(len(self._parent)):
+            members.setdefault(self.find(item), []).append(item)
+
+        return [group for group in members.values() if len(group) >= min_size]
@@ -1,26 +1,28 @@
 from pathlib import Path
 from typing import Any, Dict, List
 
-import shutil
 import tkinter as tk
 from tkinter import filedialog, messagebox
 
 # Backend imports – GUI tylko je wywołuje, nie implementuje logiki.  # GUI tylko używa backendu, nie robi obliczeń samodzielnie.
-from photo_sorter.scanning.filesystem_scanner import list_photo_paths
-from photo_sorter.scanning.image_analyzer import build_photo_infos
-from photo_sorter.scanning.sorting import sort_photos_by_taken_date
-from photo_sorter.deduplication.hashing import (
-    annotate_photos_with_file_hash,
-    annotate_photos_with_perceptual_hash,
-)
-from photo_sorter.deduplication.grouping import (
-    find_exact_duplicate_groups,
-    find_near_duplicate_groups,
-)
+from photo_sorter.scanning.filesystem_scanner import TRASH_PREVIEW_DIR_NAME
+# run_backend_pipeline lives in the backend (also used by the CLI); imported here
+# so existing "from photo_sorter.gui import run_backend_pipeline" keeps working.
+# run_backend_pipeline jest w backendzie (używa go też CLI); importujemy go tutaj,
+# żeby stary import z photo_sorter.gui dalej działał.
+from photo_sorter.pipeline.backend import run_backend_pipeline  # noqa: F401
+from photo_sorter.pipeline.incremental import IncrementalScanSession
+from photo_sorter.pipeline.background import BackgroundScanner
+from photo_sorter.pipeline.streaming import StreamEvent
 from photo_sorter.quality.analysis import (
-    annotate_photos_with_quality,
-    find_potential_trash_photos,
+    DEFAULT_BLUR_THRESHOLD,
+    DEFAULT_BRIGHTNESS_TOO_BRIGHT,
+    DEFAULT_BRIGHTNESS_TOO_DARK,
 )
+from photo_sorter.batch_move import JOURNAL_FILE_NAME, MoveResult, move_files, undo_batch
+from photo_sorter.thumbnails import ThumbnailCache, ThumbnailStore
+from photo_sorter.widgets.thumbnail_strip import ThumbnailStrip
+from photo_sorter.widgets.virtual_list import VirtualListView
 
 
 # Global variable to keep last analysis result in memory.  # Zmienna globalna, w której trzymamy wynik ostatniej analizy (na przyszłe etapy GUI).
@@ -29,57 +31,79 @@ LAST_ANALYSIS_RESULT: Dict[str, Any] | None = None
 # Global variable to remember the last scanned root folder.  # Zmienna globalna z ostatnio skanowanym folderem (do tworzenia trash_preview).
 LAST_ANALYZED_ROOT: Path | None = None
 
-# Global reference to the trash Listbox widget.  # Globalne odniesienie do Listboxa z listą śmieci.
-TRASH_LISTBOX: tk.Listbox | None = None
-
-
-def run_backend_pipeline(root_folder: Path) -> Dict[str, Any]:
+# Incremental scan session of the last scanned folder - rescanning the same folder
+# only processes files that changed since the previous scan.
+# Sesja skanowania ostatniego folderu - ponowne skanowanie tego samego folderu
+# przetwarza tylko pliki zmienione od poprzedniego skanu.
+LAST_SCAN_SESSION: IncrementalScanSession | None = None
+
+# Global reference to the trash list widget (virtualized - only visible rows are drawn).
+# Globalne odniesienie do listy śmieci (wirtualna - rysujemy tylko widoczne wiersze).
+TRASH_LISTBOX: VirtualListView | None = None
+
+# Sort options of the trash list: label -> (value of a photo, descending).
+# Opcje sortowania listy śmieci: etykieta -> (wartość dla zdjęcia, malejąco).
+TRASH_SORT_OPTIONS = {
+    "Kolejność skanowania": (None, False),
+    "Rozmycie rosnąco": (lambda p: p.blur_score, False),
+    "Rozmycie malejąco": (lambda p: p.blur_score, True),
+    "Jasność rosnąco": (lambda p: p.brightness_score, False),
+    "Jasność malejąco": (lambda p: p.brightness_score, True),
+}
+
+# Filter options of the trash list: label -> predicate (None = show all).
+# Opcje filtrowania listy śmieci: etykieta -> warunek (None = wszystkie).
+TRASH_FILTER_OPTIONS = {
+    "Wszystkie": None,
+    "Tylko rozmyte": lambda p: p.blur_score is not None and p.blur_score < DEFAULT_BLUR_THRESHOLD,
+    "Tylko za ciemne": lambda p: (
+        p.brightness_score is not None and p.brightness_score < DEFAULT_BRIGHTNESS_TOO_DARK
+    ),
+    "Tylko prześwietlone": lambda p: (
+        p.brightness_score is not None and p.brightness_score > DEFAULT_BRIGHTNESS_TOO_BRIGHT
+    ),
+}
+
+# Runs scans on a background thread, so the window doesn't freeze.
+# Skanowanie działa w wątku w tle, żeby okno nie zamarzało.
+SCANNER: BackgroundScanner | None = None
+
+# Lazily generated thumbnails (memory LRU + on-disk store keyed by file hash).
+# Miniatury generowane na żądanie (LRU w pamięci + magazyn na dysku wg hasha pliku).
+THUMBNAILS: ThumbnailCache | None = None
+
+# How often the GUI picks up scan events (ms).  # Jak często GUI odbiera zdarzenia skanowania (ms).
+SCAN_POLL_INTERVAL_MS = 100
+
+
+def get_scan_session(root_folder: Path) -> IncrementalScanSession:
     """
-    Run the full backend pipeline for a given folder and return summary data.
-    This is basically the same logic you used in debug_scan.py, but wrapped
-    into a reusable function for the GUI.
+    Return the incremental scan session for root_folder, reusing the previous
+    one if the same folder was scanned before (then only changed files are
+    processed), otherwise starting a new one.
 
-    :param root_folder: Folder with photos to analyze.
-    :return: Dict with photos list, duplicate groups and potential trash photos.
+    # Zwraca sesję skanowania dla folderu - jeśli ten sam folder był już
+    # skanowany, używamy poprzedniej sesji (przetwarzamy tylko zmiany).
     """
-    # 1. Scan filesystem and collect photo paths.  # 1. Skanujemy system plików i zbieramy ścieżki do zdjęć.
-    photo_paths: List[Path] = list_photo_paths(root_folder)
-
-    # 2. Build PhotoInfo objects from paths.  # 2. Budujemy obiekty PhotoInfo na podstawie ścieżek.
-    photos = build_photo_infos(photo_paths)
-
-    # 3. Sort photos by taken date (for nicer ordering later).  # 3. Sortujemy zdjęcia po dacie wykonania (lepsza kolejność).
-    photos = sort_photos_by_taken_date(photos)
-
-    # 4. Annotate photos with file hash and perceptual hash.  # 4. Dodajemy hash pliku i hash percepcyjny do PhotoInfo.
-    annotate_photos_with_file_hash(photos)
-    annotate_photos_with_perceptual_hash(photos)
+    global LAST_SCAN_SESSION
 
-    # 5. Find exact and near duplicate groups based on hashes.  # 5. Szukamy grup dokładnych i podobnych duplikatów na podstawie hashy.
-    exact_groups = find_exact_duplicate_groups(photos)
-    near_groups = find_near_duplicate_groups(photos)  # max_distance używa domyślnej wartości, jeśli ją ustawiłeś.
+    root_folder = root_folder.expanduser().resolve()
 
-    # 6. Annotate quality metrics and find potential trash photos.  # 6. Liczymy jakość (ostrość/jasność) i szukamy potencjalnych śmieci.
-    annotate_photos_with_quality(photos)
-    potential_trash = find_potential_trash_photos(photos)
+    if LAST_SCAN_SESSION is None or LAST_SCAN_SESSION.root_folder != root_folder:
+        # Use all CPU cores for the analysis.  # Analiza na wszystkich rdzeniach CPU.
+        LAST_SCAN_SESSION = IncrementalScanSession(root_folder, workers=None)
 
-    # 7. Return everything in a dict, so GUI can use it.  # 7. Zwracamy wszystko w słowniku, żeby GUI mogło z tego korzystać.
-    summary: Dict[str, Any] = {
-        "photos": photos,  # list[PhotoInfo]
-        "exact_groups": exact_groups,  # list[list[PhotoInfo]]
-        "near_groups": near_groups,  # list[list[PhotoInfo]]
-        "potential_trash": potential_trash,  # list[PhotoInfo]
-    }
-    return summary
+    return LAST_SCAN_SESSION
 
 
 def refresh_trash_listbox() -> None:
     """
-    Refresh the GUI Listbox that shows potential trash photos.
+    Refresh the GUI list that shows potential trash photos.
 
     This function reads data from LAST_ANALYSIS_RESULT["potential_trash"]
-    (which is a list[PhotoInfo]) and fills the Listbox with a simple
-    textual representation: file name + full path.
+    (which is a list[PhotoInfo]) and hands it to the virtualized list,
+    which only renders the rows currently visible (file name, scores and
+    full path), so even 100k entries are shown instantly.
 
     # Funkcja odświeża Listbox z potencjalnymi śmieciami.
     # Dane bierzemy z LAST_ANALYSIS_RESULT["potential_trash"],
@@ -92,50 +116,64 @@ def refresh_trash_listbox() -> None:
         # GUI nie utworzyło jeszcze Listboxa – nie ma czego odświeżać.
         return
 
-    # Clear current content.
-    # Czyścimy aktualną zawartość listy.
-    TRASH_LISTBOX.delete(0, tk.END)
-
     if LAST_ANALYSIS_RESULT is None:
-        # No analysis has been run yet.
-        # Analiza jeszcze nie była uruchamiana.
+        # No analysis has been run yet - clear the list.
+        # Analiza jeszcze nie była uruchamiana - czyścimy listę.
+        TRASH_LISTBOX.set_items([])
         return
 
     potential_trash = LAST_ANALYSIS_RESULT.get("potential_trash") or []
 
-    # We expect potential_trash to be a list[PhotoInfo].
-    # Zakładamy, że potential_trash to list[PhotoInfo].
-    for item in potential_trash:
-        try:
-            path = item.path  # type: ignore[attr-defined]
-            display_text = f"{path.name}  |  {path}"
-        except AttributeError:
-            # Fallback – if the structure is different, show raw object.
-            # Awaryjnie – jeśli struktura jest inna, pokazujemy surowy obiekt.
-            display_text = str(item)
+    # We expect potential_trash to be a list[PhotoInfo]. The list view keeps the
+    # current sort order and filter; it gets its own copy of the list.
+    # Zakładamy, że potential_trash to list[PhotoInfo]. Lista zachowuje aktualne
+    # sortowanie i filtr; dostaje własną kopię listy.
+    TRASH_LISTBOX.set_items(list(potential_trash))
+
+
+def trash_display_text(item: Any) -> str:
+    """
+    Text of one row in the trash list: file name + blur/brightness + full path.
+    # Tekst jednego wiersza listy śmieci: nazwa pliku + rozmycie/jasność + pełna ścieżka.
+    """
+    try:
+        path = item.path  # type: ignore[attr-defined]
+        blur = item.blur_score  # type: ignore[attr-defined]
+        brightness = item.brightness_score  # type: ignore[attr-defined]
+    except AttributeError:
+        # Fallback – if the structure is different, show raw object.
+        # Awaryjnie – jeśli struktura jest inna, pokazujemy surowy obiekt.
+        return str(item)
 
-        TRASH_LISTBOX.insert(tk.END, display_text)
+    blur_text = f"{blur:.1f}" if blur is not None else "?"
+    brightness_text = f"{brightness:.0f}" if brightness is not None else "?"
+    return f"{path.name}  |  rozmycie {blur_text}, jasność {brightness_text}  |  {path}"
 
 
 def move_all_potential_trash_to_preview(
     root_folder: Path,
     potential_trash: list[Any],
-) -> int:
+) -> MoveResult:
     """
     Move all potential trash photos to a 'trash_preview' subfolder
     inside the given root folder.
 
-    Returns the number of successfully moved files.
+    The files are moved as one batch (batch_move.move_files): name
+    collisions are resolved in memory after listing trash_preview once,
+    same-disk moves are plain renames, cross-disk moves are copied in
+    parallel, and every move is written to a journal in trash_preview,
+    so the batch can be undone with undo_last_trash_move().
+
+    Returns the MoveResult (moved / skipped / failed files).
 
     # Funkcja przenosi wszystkie potencjalne śmieci do podfolderu
-    # 'trash_preview' w katalogu głównym skanowania.
-    # Zwraca liczbę faktycznie przeniesionych plików.
+    # 'trash_preview' w katalogu głównym skanowania - jedną partią,
+    # z dziennikiem, który pozwala cofnąć całą operację.
+    # Zwraca MoveResult (przeniesione / pominięte / błędy).
     """
-    trash_dir = root_folder / "trash_preview"
-    trash_dir.mkdir(exist_ok=True)
-
-    moved_count = 0
+    trash_dir = root_folder / TRASH_PREVIEW_DIR_NAME
 
+    sources = []
     for item in potential_trash:
         try:
             src_path = item.path  # type: ignore[attr-defined]
@@ -144,38 +182,22 @@ def move_all_potential_trash_to_preview(
             # Jeśli obiekt nie ma atrybutu .path, pomijamy go.
             continue
 
-        if not isinstance(src_path, Path):
-            src_path = Path(src_path)
+        sources.append(Path(src_path))
 
-        # Skip if file does not exist anymore or is not a regular file.
-        # Pomijamy, jeśli plik już nie istnieje albo nie jest zwykłym plikiem.
-        if not src_path.exists() or not src_path.is_file():
-            continue
-
-        # Skip if the file is already in trash_dir.
-        # Jeśli plik już jest w trash_preview, nie ruszamy go.
-        if src_path.parent == trash_dir:
-            continue
+    # Missing files are skipped and files already in trash_dir are left alone.
+    # Brakujące pliki są pomijane, a pliki już w trash_preview nie są ruszane.
+    return move_files(sources, trash_dir)
 
-        dest_path = trash_dir / src_path.name
 
-        # If destination exists, generate a unique name.
-        # Jeśli docelowy plik istnieje, generujemy unikalną nazwę.
-        if dest_path.exists():
-            stem = dest_path.stem
-            suffix = dest_path.suffix
-            counter = 1
-            while True:
-                candidate = trash_dir / f"{stem}__trash_{counter}{suffix}"
-                if not candidate.exists():
-                    dest_path = candidate
-                    break
-                counter += 1
-
-        shutil.move(str(src_path), str(dest_path))
-        moved_count += 1
+def undo_last_trash_move(root_folder: Path) -> MoveResult:
+    """
+    Move the files of the last batch moved to trash_preview back to their
+    original folders (using the journal in trash_preview).
 
-    return moved_count
+    # Cofa ostatnie przeniesienie do trash_preview - pliki wracają
+    # do swoich folderów (na podstawie dziennika w trash_preview).
+    """
+    return undo_batch(root_folder / TRASH_PREVIEW_DIR_NAME / JOURNAL_FILE_NAME)
 
 
 def create_main_window() -> tk.Tk:
@@ -184,14 +206,17 @@ def create_main_window() -> tk.Tk:
 
     The GUI does NOT compute anything by itself. It only:
     - lets the user choose a folder,
-    - calls run_backend_pipeline(root_folder: Path),
+    - scans it in the background (incrementally when the same folder is
+      scanned again), showing progress and partial results; the scan can be cancelled,
     - displays a few numbers from the returned data,
     - shows a Listbox with potential trash photos,
     - allows moving all potential trash photos to trash_preview/.
     """
-    global TRASH_LISTBOX, LAST_ANALYZED_ROOT
+    global TRASH_LISTBOX, LAST_ANALYZED_ROOT, SCANNER, THUMBNAILS
 
     root = tk.Tk()
+    SCANNER = BackgroundScanner()
+    THUMBNAILS = ThumbnailCache(ThumbnailStore())
     root.title("Photo Sorter - Etap 5 (mini GUI)")
 
     # StringVars to update labels dynamically.  # StringVar pozwala łatwo aktualizować tekst w labelkach.
@@ -201,31 +226,61 @@ def create_main_window() -> tk.Tk:
     stats_var = tk.StringVar(
         value="Nie wykonano jeszcze skanowania."
     )
+    progress_var = tk.StringVar(value="")
 
     # --- Button callbacks ---
 
+    def format_stats(num_photos: int, num_exact_groups: int, num_potential_trash: int) -> str:
+        return (
+            f"Liczba znalezionych zdjęć: {num_photos}\n"
+            f"Liczba grup dokładnych duplikatów: {num_exact_groups}\n"
+            f"Liczba potencjalnych zdjęć 'śmieciowych': {num_potential_trash}"
+        )
+
+    def set_scanning(scanning: bool) -> None:
+        """
+        Enable/disable buttons while a scan runs in the background.
+        # Włącza/wyłącza przyciski na czas skanowania w tle.
+        """
+        idle_state = tk.DISABLED if scanning else tk.NORMAL
+        choose_button.config(state=idle_state)
+        move_button.config(state=idle_state)
+        undo_button.config(state=idle_state)
+        cancel_button.config(state=tk.NORMAL if scanning else tk.DISABLED)
+
+    # Partial results of the running scan.  # Częściowe wyniki trwającego skanowania.
+    partial: Dict[str, Any] = {"root": None, "photos": 0, "exact_groups": set(), "trash": 0}
+
     def on_choose_and_scan() -> None:
         """
-        Ask user for a folder, run backend pipeline and update labels.
+        Ask user for a folder and start scanning it in the background.
 
         Important data flow explanation:
         - This function gets a folder path from filedialog (string).
-        - It converts that string to Path and calls run_backend_pipeline(Path).
+        - It converts that string to Path and starts an incremental scan
+          session (get_scan_session(Path)) on SCANNER's background thread.
+          The first scan of a folder runs the same stages as
+          run_backend_pipeline, a rescan of the same folder only processes
+          added/modified/moved/removed files.
         - run_backend_pipeline uses:
-          * list_photo_paths -> returns list[Path],
-          * build_photo_infos -> returns photos: list[PhotoInfo],
+          * list_photo_entries -> returns list[PhotoEntry] (path + stat),
+          * analyze_photo_paths -> returns photos: list[PhotoInfo]
+            (EXIF, file hash, pHash and quality from a single decode),
           * sort_photos_by_taken_date(photos),
-          * annotate_photos_with_file_hash(photos),
-          * annotate_photos_with_perceptual_hash(photos),
           * find_exact_duplicate_groups(photos),
-          * annotate_photos_with_quality(photos),
+          * find_near_duplicate_groups(photos),
           * find_potential_trash_photos(photos).
-        - GUI then only reads:
+        - While the scan runs, poll_scan_events() shows progress, potential
+          trash and exact duplicate groups as soon as they are found.
+        - When it is done, GUI only reads:
           * len(photos),
           * len(exact_groups),
           * len(potential_trash)
           and displays those numbers.
         """
+        if SCANNER is None or SCANNER.running:
+            return
+
         folder_str = filedialog.askdirectory()
         if not folder_str:
             # User cancelled the dialog.  # Użytkownik anulował okno wyboru folderu.
@@ -235,39 +290,153 @@ def create_main_window() -> tk.Tk:
 
         root_folder = Path(folder_str)
 
-        try:
-            summary = run_backend_pipeline(root_folder)
-        except Exception as exc:  # noqa: BLE001
+        # The previous result is replaced by the new scan.  # Poprzedni wynik zostanie zastąpiony nowym skanem.
+        global LAST_ANALYSIS_RESULT
+        LAST_ANALYSIS_RESULT = None
+        if TRASH_LISTBOX is not None:
+            TRASH_LISTBOX.set_items([])
+        groups_list.set_items([])
+        trash_preview.show([])
+        group_preview.show([])
+
+        partial.update(root=root_folder, photos=0, exact_groups=set(), trash=0)
+        stats_var.set(format_stats(0, 0, 0))
+        progress_var.set("Skanowanie...")
+
+        SCANNER.start(get_scan_session(root_folder))
+        set_scanning(True)
+
+    def on_cancel_scan() -> None:
+        """
+        Cancel the running scan.  # Anuluje trwające skanowanie.
+        """
+        if SCANNER is not None and SCANNER.running:
+            SCANNER.cancel()
+            progress_var.set("Anulowanie...")
+
+    def handle_scan_event(event: StreamEvent, new_trash: List[Any]) -> None:
+        """
+        Apply one event from the background scan to the GUI (Tk thread only).
+        # Obsługa jednego zdarzenia ze skanowania w tle (tylko w wątku Tk).
+        """
+        global LAST_ANALYSIS_RESULT, LAST_ANALYZED_ROOT
+
+        if event.kind == "progress":
+            progress_var.set(event.data.describe())
+            if event.data.stage == "analyse":
+                partial["photos"] = event.data.done
+        elif event.kind == "trash":
+            # Partial result - show it right away.  # Częściowy wynik - pokazujemy od razu.
+            partial["trash"] += 1
+            new_trash.append(event.data)
+        elif event.kind == "exact_group":
+            partial["exact_groups"].add(event.data.group_id)
+        elif event.kind == "done":
+            summary = event.data
+
+            # Make summary globally available for future GUI steps.  # Zapisujemy wynik globalnie na potrzeby kolejnych kroków GUI.
+            LAST_ANALYSIS_RESULT = summary
+            LAST_ANALYZED_ROOT = partial["root"]
+
+            stats_var.set(
+                format_stats(
+                    len(summary["photos"]),
+                    len(summary["exact_groups"]),
+                    len(summary["potential_trash"]),
+                )
+            )
+            progress_var.set(f"Gotowe: {summary['analysis_stats'].summary()}")
+
+            # After updating stats, refresh the trash Listbox based on backend data.
+            # Po zaktualizowaniu statystyk odświeżamy Listbox ze śmieciami na podstawie danych z backendu.
+            refresh_trash_listbox()
+            groups_list.set_items(
+                [("Dokładne", group) for group in summary["exact_groups"]]
+                + [("Podobne", group) for group in summary["near_groups"]]
+            )
+            set_scanning(False)
+            return
+        elif event.kind == "cancelled":
+            progress_var.set("Skanowanie anulowane (wyniki częściowe).")
+            set_scanning(False)
+            return
+        elif event.kind == "error":
+            set_scanning(False)
+            progress_var.set("Błąd skanowania.")
             # Show a simple error dialog if backend crashed.  # Pokazujemy prosty komunikat błędu, jeśli backend się wywalił.
             messagebox.showerror(
                 "Błąd analizy",
-                f"Wystąpił błąd podczas skanowania folderu:\n{exc}",
+                f"Wystąpił błąd podczas skanowania folderu:\n{event.data}",
             )
             return
 
-        # Make summary globally available for future GUI steps.  # Zapisujemy wynik globalnie na potrzeby kolejnych kroków GUI.
-        global LAST_ANALYSIS_RESULT, LAST_ANALYZED_ROOT
-        LAST_ANALYSIS_RESULT = summary
-        LAST_ANALYZED_ROOT = root_folder
+        stats_var.set(
+            format_stats(partial["photos"], len(partial["exact_groups"]), partial["trash"])
+        )
 
-        photos = summary["photos"]
-        exact_groups = summary["exact_groups"]
-        potential_trash = summary["potential_trash"]
+    def poll_scan_events() -> None:
+        """
+        Pick up events of the background scan, then schedule the next poll.
+        # Odbiera zdarzenia skanowania w tle i planuje kolejne sprawdzenie.
+        """
+        if SCANNER is not None:
+            # Trash found since the last poll is added to the list in one go.
+            # Śmieci znalezione od ostatniego sprawdzenia dodajemy do listy za jednym razem.
+            new_trash: List[Any] = []
+            for event in SCANNER.poll():
+                if event.kind in ("done", "cancelled", "error") and new_trash:
+                    if TRASH_LISTBOX is not None:
+                        TRASH_LISTBOX.extend(new_trash)
+                    new_trash = []
+                handle_scan_event(event, new_trash)
+
+            if new_trash and TRASH_LISTBOX is not None:
+                TRASH_LISTBOX.extend(new_trash)
+
+        if THUMBNAILS is not None:
+            # Thumbnails decoded in the background since the last poll.
+            # Miniatury zdekodowane w tle od ostatniego sprawdzenia.
+            ready = THUMBNAILS.poll_ready()
+            if ready:
+                trash_preview.thumbnails_ready(ready)
+                group_preview.thumbnails_ready(ready)
+
+        root.after(SCAN_POLL_INTERVAL_MS, poll_scan_events)
+
+    # Photos whose thumbnails are needed right now: visible trash rows (prefetch)
+    # and the two previews. Queued decodes of anything else are dropped.
+    # Zdjęcia, których miniatury są teraz potrzebne: widoczne wiersze listy śmieci
+    # (pobieranie z wyprzedzeniem) i oba podglądy. Resztę kolejki porzucamy.
+    visible_trash: List[Any] = []
+
+    def update_thumbnail_requests() -> None:
+        if THUMBNAILS is None:
+            return
+        THUMBNAILS.cancel_except(visible_trash + trash_preview.photos + group_preview.photos)
+        for photo in visible_trash:
+            THUMBNAILS.request(photo)
 
-        num_photos = len(photos)
-        num_exact_groups = len(exact_groups)
-        num_potential_trash = len(potential_trash)
+    def on_trash_visible(photos: List[Any]) -> None:
+        visible_trash[:] = photos
+        update_thumbnail_requests()
 
-        stats_text = (
-            f"Liczba znalezionych zdjęć: {num_photos}\n"
-            f"Liczba grup dokładnych duplikatów: {num_exact_groups}\n"
-            f"Liczba potencjalnych zdjęć 'śmieciowych': {num_potential_trash}"
-        )
-        stats_var.set(stats_text)
+    def on_trash_selected(photos: List[Any]) -> None:
+        trash_preview.show(photos[:1])
+        update_thumbnail_requests()
 
-        # After updating stats, refresh the trash Listbox based on backend data.
-        # Po zaktualizowaniu statystyk odświeżamy Listbox ze śmieciami na podstawie danych z backendu.
-        refresh_trash_listbox()
+    def on_group_selected(groups: List[Any]) -> None:
+        group_preview.show(groups[0][1] if groups else [])
+        update_thumbnail_requests()
+
+    def on_close() -> None:
+        """
+        Stop a running scan before closing the window.  # Zatrzymuje skanowanie przed zamknięciem okna.
+        """
+        if SCANNER is not None:
+            SCANNER.shutdown()
+        if THUMBNAILS is not None:
+            THUMBNAILS.shutdown()
+        root.destroy()
 
     def on_move_all_trash() -> None:
         """
@@ -294,10 +463,16 @@ def create_main_window() -> tk.Tk:
             )
             return
 
-        moved = move_all_potential_trash_to_preview(
-            LAST_ANALYZED_ROOT,
-            potential_trash,
-        )
+        try:
+            result = move_all_potential_trash_to_preview(
+                LAST_ANALYZED_ROOT,
+                potential_trash,
+            )
+        except OSError as exc:
+            # trash_preview can't be created or the journal can't be written.
+            # Nie da się utworzyć trash_preview albo zapisać dziennika.
+            messagebox.showerror("Błąd przenoszenia", f"Nie udało się przenieść plików:\n{exc}")
+            return
 
         # After moving, we clear the potential_trash list in the analysis result.
         # Po przeniesieniu czyścimy listę potential_trash w wynikach analizy.
@@ -311,21 +486,43 @@ def create_main_window() -> tk.Tk:
         num_exact_groups = len(exact_groups)
         num_potential_trash = len(LAST_ANALYSIS_RESULT["potential_trash"])
 
-        stats_text = (
-            f"Liczba znalezionych zdjęć: {num_photos}\n"
-            f"Liczba grup dokładnych duplikatów: {num_exact_groups}\n"
-            f"Liczba potencjalnych zdjęć 'śmieciowych': {num_potential_trash}"
-        )
-        stats_var.set(stats_text)
+        stats_var.set(format_stats(num_photos, num_exact_groups, num_potential_trash))
 
         # Refresh the Listbox to reflect the new (empty) potential trash list.
         # Odświeżamy Listbox, żeby pokazać aktualny (pusty) stan listy śmieci.
         refresh_trash_listbox()
 
-        messagebox.showinfo(
-            "Przenoszenie zakończone",
-            f"Przeniesiono {moved} plików do folderu 'trash_preview' w:\n{LAST_ANALYZED_ROOT}",
-        )
+        message = f"Przeniesiono {result.moved_count} plików do folderu 'trash_preview' w:\n{LAST_ANALYZED_ROOT}"
+        if result.failed:
+            message += f"\n\nNie udało się przenieść {len(result.failed)} plików."
+        messagebox.showinfo("Przenoszenie zakończone", message)
+
+    def on_undo_move() -> None:
+        """
+        Undo the last move to trash_preview (files go back where they were).
+        Rescan the folder afterwards to see them in the results again.
+
+        # Cofa ostatnie przeniesienie do trash_preview. Po cofnięciu warto
+        # przeskanować folder ponownie, żeby pliki wróciły do wyników.
+        """
+        if LAST_ANALYZED_ROOT is None:
+            messagebox.showinfo("Brak danych", "Najpierw przeskanuj folder.")
+            return
+
+        try:
+            result = undo_last_trash_move(LAST_ANALYZED_ROOT)
+        except OSError as exc:
+            messagebox.showerror("Błąd cofania", f"Nie udało się cofnąć przenoszenia:\n{exc}")
+            return
+
+        if not result.batch_id:
+            messagebox.showinfo("Brak operacji", "Nie ma przenoszenia do cofnięcia.")
+            return
+
+        message = f"Przywrócono {result.moved_count} plików. Przeskanuj folder ponownie."
+        if result.failed:
+            message += f"\n\nNie udało się przywrócić {len(result.failed)} plików."
+        messagebox.showinfo("Cofanie zakończone", message)
 
     # --- Layout ---
 
@@ -339,6 +536,14 @@ def create_main_window() -> tk.Tk:
     )
     choose_button.pack(anchor="w")
 
+    cancel_button = tk.Button(
+        main_frame,
+        text="Anuluj skanowanie",
+        command=on_cancel_scan,
+        state=tk.DISABLED,
+    )
+    cancel_button.pack(anchor="w", pady=(4, 0))
+
     folder_label = tk.Label(
         main_frame,
         textvariable=selected_folder_var,
@@ -355,6 +560,15 @@ def create_main_window() -> tk.Tk:
     )
     stats_label.pack(anchor="w", pady=(4, 0))
 
+    # Progress of the running scan (stage, count, files/s).  # Postęp skanowania (etap, liczba, pliki/s).
+    progress_label = tk.Label(
+        main_frame,
+        textvariable=progress_var,
+        justify="left",
+        wraplength=600,
+    )
+    progress_label.pack(anchor="w", pady=(4, 0))
+
     # --- Potential trash list (read-only + move button) ---
     # Lista potencjalnych śmieci (na razie odczyt + przycisk przeniesienia wszystkich).
     trash_frame = tk.Frame(main_frame, pady=12)
@@ -367,24 +581,51 @@ def create_main_window() -> tk.Tk:
     )
     trash_label.pack(anchor="w")
 
-    listbox_container = tk.Frame(trash_frame)
-    listbox_container.pack(fill="both", expand=True)
-
-    TRASH_LISTBOX = tk.Listbox(
-        listbox_container,
+    # Sort / filter controls - they only reorder the list view, nothing is rebuilt.
+    # Sortowanie / filtrowanie - zmieniają tylko widok listy, nic nie jest przebudowywane.
+    controls_frame = tk.Frame(trash_frame)
+    controls_frame.pack(anchor="w", pady=(4, 4))
+
+    sort_var = tk.StringVar(value=next(iter(TRASH_SORT_OPTIONS)))
+    filter_var = tk.StringVar(value=next(iter(TRASH_FILTER_OPTIONS)))
+
+    def on_sort_changed(label: str) -> None:
+        value_of, reverse = TRASH_SORT_OPTIONS[label]
+        if TRASH_LISTBOX is not None:
+            TRASH_LISTBOX.sort_by(value_of, reverse)
+
+    def on_filter_changed(label: str) -> None:
+        if TRASH_LISTBOX is not None:
+            TRASH_LISTBOX.filter_by(TRASH_FILTER_OPTIONS[label])
+
+    tk.Label(controls_frame, text="Sortuj:").pack(side="left")
+    tk.OptionMenu(
+        controls_frame, sort_var, *TRASH_SORT_OPTIONS, command=on_sort_changed
+    ).pack(side="left", padx=(4, 12))
+
+    tk.Label(controls_frame, text="Pokaż:").pack(side="left")
+    tk.OptionMenu(
+        controls_frame, filter_var, *TRASH_FILTER_OPTIONS, command=on_filter_changed
+    ).pack(side="left", padx=(4, 0))
+
+    trash_body = tk.Frame(trash_frame)
+    trash_body.pack(fill="both", expand=True)
+
+    # Virtualized list: only the visible rows exist in the underlying Listbox.
+    # Lista wirtualna: w Listboxie istnieją tylko widoczne wiersze.
+    TRASH_LISTBOX = VirtualListView(
+        trash_body,
+        format_item=trash_display_text,
+        on_visible=on_trash_visible,
+        on_select=on_trash_selected,
         height=15,           # approximate number of rows  # przybliżona liczba widocznych wierszy
         selectmode=tk.EXTENDED,  # future: select multiple for moving  # przyszłość: zaznaczanie wielu do przenoszenia
     )
     TRASH_LISTBOX.pack(side="left", fill="both", expand=True)
 
-    scrollbar = tk.Scrollbar(
-        listbox_container,
-        orient="vertical",
-        command=TRASH_LISTBOX.yview,
-    )
-    scrollbar.pack(side="right", fill="y")
-
-    TRASH_LISTBOX.config(yscrollcommand=scrollbar.set)
+    # Preview of the selected photo.  # Podgląd zaznaczonego zdjęcia.
+    trash_preview = ThumbnailStrip(trash_body, THUMBNAILS, max_items=1)
+    trash_preview.pack(side="right", anchor="n", padx=(8, 0))
 
     move_button = tk.Button(
         trash_frame,
@@ -393,6 +634,38 @@ def create_main_window() -> tk.Tk:
     )
     move_button.pack(anchor="e", pady=(8, 0))
 
+    undo_button = tk.Button(
+        trash_frame,
+        text="Cofnij ostatnie przenoszenie",
+        command=on_undo_move,
+    )
+    undo_button.pack(anchor="e", pady=(4, 0))
+
+    # --- Duplicate groups with thumbnail previews ---
+    # Grupy duplikatów z podglądem miniatur.
+    groups_frame = tk.Frame(main_frame, pady=12)
+    groups_frame.pack(fill="both", expand=True)
+
+    tk.Label(groups_frame, text="Grupy duplikatów (dokładne i podobne):", justify="left").pack(anchor="w")
+
+    groups_list = VirtualListView(
+        groups_frame,
+        format_item=lambda item: (
+            f"{item[0]}: {len(item[1])} zdjęć  |  " + ", ".join(p.file_name for p in item[1][:5])
+        ),
+        on_select=on_group_selected,
+        height=6,
+        selectmode=tk.BROWSE,
+    )
+    groups_list.pack(fill="both", expand=True)
+
+    # Thumbnails of the selected group.  # Miniatury zaznaczonej grupy.
+    group_preview = ThumbnailStrip(groups_frame, THUMBNAILS, max_items=8)
+    group_preview.pack(anchor="w", pady=(4, 0))
+
+    root.protocol("WM_DELETE_WINDOW", on_close)
+    root.after(SCAN_POLL_INTERVAL_MS, poll_scan_events)
+
     return root
 
 
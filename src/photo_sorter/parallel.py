@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import multiprocessing
+import os
+import sys
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Callable, Deque, Iterable, Iterator, List, Optional, Sequence, TypeVar
+
+try:
+    import resource  # not available on Windows
+except ImportError:  # pragma: no cover
+    resource = None  # type: ignore[assignment]
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+# Upper bound for automatically chosen chunk sizes - keeps results flowing
+# back regularly and the last chunks balanced between workers.
+_MAX_AUTO_CHUNK_SIZE = 256
+
+
+def resolve_workers(workers: Optional[int]) -> int:
+    """
+    Turn a user-facing worker count into a concrete number of processes.
+    None or 0 means "one per CPU core"; values below zero are rejected.
+    """
+    if workers is None or workers == 0:
+        return os.cpu_count() or 1
+
+    if workers < 0:
+        raise ValueError(f"workers must be >= 0, got {workers}")
+
+    return workers
+
+
+def peak_rss_bytes() -> Optional[int]:
+    """
+    Peak resident set size of the current process, None where the platform
+    doesn't report it.
+    """
+    if resource is None:
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def worker_peak_rss_bytes() -> Optional[int]:
+    """
+    peak_rss_bytes() when called in a pool worker process, None in the main
+    process (workers=1 runs tasks there). Tasks return it with their
+    results, so the parent knows the memory of its own workers only.
+    """
+    if multiprocessing.parent_process() is None:
+        return None
+    return peak_rss_bytes()
+
+
+def _auto_chunk_size(num_items: int, workers: int) -> int:
+    """
+    Pick a chunk size giving each worker ~4 chunks, so a slow chunk
+    doesn't leave the other workers idle at the end.
+    """
+    return max(1, min(_MAX_AUTO_CHUNK_SIZE, num_items // (workers * 4)))
+
+
+def map_ordered(
+    func: Callable[[T], R],
+    items: Sequence[T],
+    workers: Optional[int] = 1,
+    chunk_size: Optional[int] = None,
+) -> List[R]:
+    """
+    Apply func to every item and return the results in input order.
+
+    workers=1 runs a plain for-loop in the current process (reproducible,
+    easy to debug). More workers run func in a process pool, submitting
+    items in chunks of chunk_size (chosen automatically if None).
+
+    func must be a module-level function (picklable) and should map per-item
+    errors to a result value itself (e.g. None), like the annotate_*
+    functions do - an exception raised by func aborts the whole map in both modes.
+    """
+    num_workers = resolve_workers(workers)
+
+    if num_workers == 1 or len(items) <= 1:
+        return [func(item) for item in items]
+
+    if chunk_size is None:
+        chunk_size = _auto_chunk_size(len(items), num_workers)
+
+    with ProcessPoolExecutor(max_workers=min(num_workers, len(items))) as executor:
+        # Executor.map yields results in submission order, whatever order chunks finish in
+        return list(executor.map(func, items, chunksize=chunk_size))
+
+
+def imap_ordered(
+    func: Callable[[T], R],
+    items: Iterable[T],
+    workers: Optional[int] = 1,
+    max_in_flight: Optional[int] = None,
+) -> Iterator[R]:
+    """
+    Lazy, bounded counterpart of map_ordered for streaming pipelines.
+
+    Items are pulled from the iterable only as results are consumed, so work
+    starts before the input is exhausted (e.g. while a directory walk is
+    still running). At most max_in_flight items (default: 4 per worker) are
+    submitted but not yet yielded, which bounds memory held by pending
+    results. Results are yielded in input order.
+    """
+    num_workers = resolve_workers(workers)
+
+    if num_workers == 1:
+        for item in items:
+            yield func(item)
+        return
+
+    if max_in_flight is None:
+        max_in_flight = num_workers * 4
+
+    executor = ProcessPoolExecutor(max_workers=num_workers)
+    pending: Deque[Future] = deque()
+
+    try:
+        for item in items:
+            pending.append(executor.submit(func, item))
+
+            if len(pending) >= max_in_flight:
+                # Backpressure: wait for the oldest result before reading more input
+                yield pending.popleft().result()
+
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        # Also reached when the consumer stops early - drop work nobody will read
+        executor.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,340 @@
+from __future__ import annotations
+
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+from photo_sorter.deduplication.clusters import choose_best_photo, find_near_duplicate_clusters
+from photo_sorter.deduplication.exact import ExactDuplicateStats, find_exact_duplicate_groups_staged
+from photo_sorter.deduplication.grouping import (
+    find_exact_duplicate_groups,
+    find_near_duplicate_groups,
+)
+from photo_sorter.deduplication.hashing import FILE_HASH_ALGORITHM
+from photo_sorter.pipeline.cache import open_cache
+from photo_sorter.pipeline.prefetch import (
+    DEFAULT_MAX_BUFFERED_BYTES,
+    analyze_photo_paths_prefetched,
+    iter_prefetched_photos,
+)
+from photo_sorter.pipeline.profiling import (
+    NULL_PROFILER,
+    STAGE_EXACT_GROUPS,
+    STAGE_NEAR_GROUPS,
+    STAGE_SORT,
+    STAGE_TRASH,
+    NullProfiler,
+    PipelineProfiler,
+)
+from photo_sorter.pipeline.progress import STAGE_ANALYSE, STAGE_DISCOVER
+from photo_sorter.pipeline.single_pass import SinglePassStats, analyze_photo_paths, iter_analyzed_photos
+from photo_sorter.quality.analysis import (
+    DEFAULT_BLUR_THRESHOLD,
+    DEFAULT_BRIGHTNESS_TOO_BRIGHT,
+    DEFAULT_BRIGHTNESS_TOO_DARK,
+    find_potential_trash_photos,
+)
+from photo_sorter.quality.batch import annotate_photos_with_quality_batched
+from photo_sorter.scanning.filesystem_scanner import (
+    TRASH_PREVIEW_DIR_NAME,
+    PhotoEntry,
+    list_photo_entries,
+)
+from photo_sorter.scanning.models import PhotoInfo
+from photo_sorter.scanning.photo_table import PhotoTable
+from photo_sorter.scanning.sorting import sort_photos_by_taken_date
+
+
+# Libraries with at least this many photos are kept in a PhotoTable by
+# run_backend_pipeline (columnar=None): ~100 instead of ~700 bytes per photo.
+COLUMNAR_MIN_PHOTOS = 100_000
+
+
+def run_backend_pipeline(
+    root_folder: Path,
+    use_cache: bool = True,
+    cache_path: Optional[Path] = None,
+    workers: Optional[int] = 1,
+    scan_threads: int = 1,
+    decode_scale: int = 1,
+    max_distance: int = 5,
+    blur_threshold: float = DEFAULT_BLUR_THRESHOLD,
+    brightness_too_dark: float = DEFAULT_BRIGHTNESS_TOO_DARK,
+    brightness_too_bright: float = DEFAULT_BRIGHTNESS_TOO_BRIGHT,
+    profiler: Union[PipelineProfiler, NullProfiler, None] = None,
+    file_hash_algorithm: str = FILE_HASH_ALGORITHM,
+    read_ahead: int = 0,
+    max_buffered_bytes: int = DEFAULT_MAX_BUFFERED_BYTES,
+    near_method: str = "index",
+    near_mode: str = "components",
+    near_max_diameter: Optional[int] = None,
+    columnar: Optional[bool] = None,
+) -> Dict[str, Any]:
+    """
+    Run the full backend pipeline for a given folder and return summary data.
+    Used by the GUI and the command-line runner; doesn't need Tk.
+
+    :param root_folder: Folder with photos to analyze.
+    :param use_cache: Reuse analysis results of unchanged files from the
+                      persistent analysis cache (and store new ones there).
+    :param cache_path: Cache database location (default: per-user cache dir).
+    :param workers: Number of analysis processes (1 = sequential,
+                    None = one per CPU core).
+    :param scan_threads: Number of threads listing directories in parallel.
+    :param decode_scale: Analyse JPEGs at 1/decode_scale resolution (1, 2, 4, 8) -
+                         faster, with slightly less precise metrics.
+    :param max_distance: Maximum pHash Hamming distance of near duplicates.
+    :param blur_threshold: Photos with a lower blur score are potential trash.
+    :param brightness_too_dark: Photos darker than this are potential trash.
+    :param brightness_too_bright: Photos brighter than this are potential trash.
+    :param profiler: PipelineProfiler recording the time of every stage
+                     (default: none, no overhead).
+    :param file_hash_algorithm: Hash used for exact duplicates ("sha256" or
+                                "blake2b", see FILE_HASH_ALGORITHMS).
+    :param read_ahead: Read up to this many files ahead while earlier ones are
+                       decoded (0 = off, each worker reads its own files) -
+                       for spinning disks and network shares.
+    :param max_buffered_bytes: With read_ahead, file contents held in memory at most.
+    :param near_method: Near-duplicate engine (see NEAR_DUPLICATE_METHODS) -
+                        "lsh" is approximate, for libraries of millions.
+    :param near_mode: How near pairs become groups (see CLUSTER_MODES) -
+                      "diameter" and "medoid" keep long chains of similar
+                      burst shots from merging into one huge group.
+    :param near_max_diameter: Largest pHash distance within a group in
+                              "diameter" mode (default: max_distance).
+    :param columnar: Collect the results in a PhotoTable instead of a list -
+                     photos, groups and trash are then PhotoRow views. None
+                     chooses it for COLUMNAR_MIN_PHOTOS photos or more.
+                     PhotoTable stores 64-bit pHashes only.
+    :return: Dict with photos list, duplicate groups and potential trash photos.
+    """
+    if profiler is None:
+        profiler = NULL_PROFILER
+
+    # 1. Scan filesystem and collect photo paths (with stat results, so files are
+    #    not stat'ed again), skipping our own trash_preview folder.
+    with profiler.stage(STAGE_DISCOVER) as stage:
+        photo_entries = list_photo_entries(
+            root_folder,
+            exclude_dirs=(TRASH_PREVIEW_DIR_NAME,),
+            threads=scan_threads,
+        )
+        stage.add(items=len(photo_entries))
+
+    # 2. Build fully annotated PhotoInfo objects (EXIF, file hash, pHash, quality)
+    #    with one read and one decode per photo.
+    #    Unchanged files are taken from the analysis cache without any decode.
+    #    If the cache can't be opened we simply scan without it.
+    #    Large libraries are appended to a PhotoTable one photo at a time, so
+    #    the PhotoInfo objects never all exist at once.
+    analysis_stats = SinglePassStats()
+    cache = open_cache(cache_path, decode_scale, file_hash_algorithm) if use_cache else None
+    if columnar is None:
+        columnar = len(photo_entries) >= COLUMNAR_MIN_PHOTOS
+
+    photos: Union[List[PhotoInfo], PhotoTable]
+    try:
+        with profiler.stage(STAGE_ANALYSE) as stage:
+            if columnar:
+                if read_ahead:
+                    analyzed = iter_prefetched_photos(
+                        photo_entries,
+                        analysis_stats,
+                        cache,
+                        workers,
+                        read_ahead,
+                        max_buffered_bytes,
+                        decode_scale,
+                        file_hash_algorithm,
+                    )
+                else:
+                    analyzed = iter_analyzed_photos(
+                        photo_entries, analysis_stats, cache, workers, None, decode_scale, file_hash_algorithm
+                    )
+                photos = PhotoTable.from_photos(analyzed)
+            elif read_ahead:
+                photos = analyze_photo_paths_prefetched(
+                    photo_entries,
+                    analysis_stats,
+                    cache,
+                    workers,
+                    read_ahead,
+                    max_buffered_bytes,
+                    decode_scale,
+                    file_hash_algorithm,
+                )
+            else:
+                photos = analyze_photo_paths(
+                    photo_entries, analysis_stats, cache, workers, decode_scale, file_hash_algorithm
+                )
+            stage.add(items=len(photos), bytes_read=analysis_stats.bytes_read)
+    finally:
+        if cache is not None:
+            cache.close()
+    profiler.add_analysis_stats(analysis_stats)
+
+    # 3. Sort photos by taken date (for nicer ordering later).
+    with profiler.stage(STAGE_SORT) as stage:
+        photos = sort_photos_by_taken_date(photos)
+        stage.add(items=len(photos))
+
+    # 4. Find exact and near duplicate groups based on hashes.
+    with profiler.stage(STAGE_EXACT_GROUPS) as stage:
+        exact_groups = find_exact_duplicate_groups(photos)
+        stage.add(items=len(photos))
+    with profiler.stage(STAGE_NEAR_GROUPS) as stage:
+        if near_mode == "components":
+            near_groups = find_near_duplicate_groups(photos, max_distance, near_method)
+            near_group_best = [choose_best_photo(group) for group in near_groups]
+        else:
+            clusters = find_near_duplicate_clusters(
+                photos, max_distance, near_mode, near_max_diameter, near_method
+            )
+            near_groups = [cluster.photos for cluster in clusters]
+            near_group_best = [cluster.best for cluster in clusters]
+        stage.add(items=len(photos))
+
+    # 5. Find potential trash photos based on quality metrics.
+    with profiler.stage(STAGE_TRASH) as stage:
+        potential_trash = find_potential_trash_photos(
+            photos, blur_threshold, brightness_too_dark, brightness_too_bright
+        )
+        stage.add(items=len(photos))
+
+    # 6. Return everything in a dict.
+    summary: Dict[str, Any] = {
+        "photos": photos,  # list[PhotoInfo] (PhotoTable if columnar)
+        "exact_groups": exact_groups,  # list[list[PhotoInfo]]
+        "near_groups": near_groups,  # list[list[PhotoInfo]]
+        "near_group_best": near_group_best,  # list[PhotoInfo], the one to keep per near group
+        "potential_trash": potential_trash,  # list[PhotoInfo]
+        "analysis_stats": analysis_stats,  # SinglePassStats (reads/decodes saved)
+    }
+    return summary
+
+
+def _photos_from_entries(photo_entries: List[PhotoEntry]) -> List[PhotoInfo]:
+    """
+    PhotoInfo objects from the directory listing alone, sorted by date.
+    No EXIF read - the date is only used for ordering, mtime is enough.
+    """
+    photos = [
+        PhotoInfo(
+            path=entry.path,
+            file_name=entry.path.name,
+            size_bytes=entry.stat.st_size,
+            taken_at=datetime.fromtimestamp(entry.stat.st_mtime),
+        )
+        for entry in photo_entries
+    ]
+    return sort_photos_by_taken_date(photos)
+
+
+def run_exact_duplicate_pipeline(
+    root_folder: Path,
+    workers: Optional[int] = 1,
+    scan_threads: int = 1,
+    file_hash_algorithm: str = FILE_HASH_ALGORITHM,
+    profiler: Union[PipelineProfiler, NullProfiler, None] = None,
+) -> Dict[str, Any]:
+    """
+    Find only exact duplicates, without decoding anything: files are
+    grouped by size, then by a hash of their first and last bytes, and only
+    the survivors are hashed fully (find_exact_duplicate_groups_staged).
+    Usually reads a small fraction of the library.
+
+    :param root_folder: Folder with photos to check.
+    :param workers: Number of hashing processes (1 = sequential,
+                    None = one per CPU core).
+    :param scan_threads: Number of threads listing directories in parallel.
+    :param file_hash_algorithm: Hash used for exact duplicates (see FILE_HASH_ALGORITHMS).
+    :param profiler: PipelineProfiler recording the time of every stage.
+    :return: Dict with photos list (file_hash set only where it was
+             computed), exact duplicate groups and the hashing stats.
+    """
+    if profiler is None:
+        profiler = NULL_PROFILER
+
+    with profiler.stage(STAGE_DISCOVER) as stage:
+        photo_entries = list_photo_entries(
+            root_folder,
+            exclude_dirs=(TRASH_PREVIEW_DIR_NAME,),
+            threads=scan_threads,
+        )
+        stage.add(items=len(photo_entries))
+
+    photos = _photos_from_entries(photo_entries)
+
+    exact_stats = ExactDuplicateStats()
+    with profiler.stage(STAGE_EXACT_GROUPS) as stage:
+        exact_groups = find_exact_duplicate_groups_staged(
+            photos, exact_stats, workers=workers, algorithm=file_hash_algorithm
+        )
+        stage.add(items=len(photos), bytes_read=exact_stats.bytes_read)
+
+    return {
+        "photos": photos,  # list[PhotoInfo]
+        "exact_groups": exact_groups,  # list[list[PhotoInfo]]
+        "exact_stats": exact_stats,  # ExactDuplicateStats (bytes read vs total bytes)
+    }
+
+
+def run_trash_pipeline(
+    root_folder: Path,
+    workers: Optional[int] = 1,
+    scan_threads: int = 1,
+    decode_scale: int = 1,
+    blur_threshold: float = DEFAULT_BLUR_THRESHOLD,
+    brightness_too_dark: float = DEFAULT_BRIGHTNESS_TOO_DARK,
+    brightness_too_bright: float = DEFAULT_BRIGHTNESS_TOO_BRIGHT,
+    profiler: Union[PipelineProfiler, NullProfiler, None] = None,
+) -> Dict[str, Any]:
+    """
+    Find only potential trash: blur and brightness are scored by the batched
+    quality engine (quality.batch) on images shrunk to its working size, with
+    no file hash, pHash or EXIF read.
+
+    The single pass of run_backend_pipeline scores the full decoded image it
+    already holds for the hashes - shrinking it first for the batched engine
+    costs more than it saves there, so the engine is used only here.
+
+    :param root_folder: Folder with photos to check.
+    :param workers: Number of decoding processes (1 = sequential,
+                    None = one per CPU core).
+    :param scan_threads: Number of threads listing directories in parallel.
+    :param decode_scale: Decode JPEGs at 1/decode_scale resolution (1, 2, 4, 8).
+    :param blur_threshold: Photos with a lower blur score are potential trash.
+    :param brightness_too_dark: Photos darker than this are potential trash.
+    :param brightness_too_bright: Photos brighter than this are potential trash.
+    :param profiler: PipelineProfiler recording the time of every stage.
+    :return: Dict with photos list, potential trash photos and the batched
+             scores (incl. clipped-pixel fractions).
+    """
+    if profiler is None:
+        profiler = NULL_PROFILER
+
+    with profiler.stage(STAGE_DISCOVER) as stage:
+        photo_entries = list_photo_entries(
+            root_folder,
+            exclude_dirs=(TRASH_PREVIEW_DIR_NAME,),
+            threads=scan_threads,
+        )
+        stage.add(items=len(photo_entries))
+
+    photos = _photos_from_entries(photo_entries)
+
+    with profiler.stage(STAGE_ANALYSE) as stage:
+        quality_scores = annotate_photos_with_quality_batched(photos, workers, decode_scale)
+        stage.add(items=len(photos), bytes_read=sum(p.size_bytes for p in photos))
+
+    with profiler.stage(STAGE_TRASH) as stage:
+        potential_trash = find_potential_trash_photos(
+            photos, blur_threshold, brightness_too_dark, brightness_too_bright
+        )
+        stage.add(items=len(photos))
+
+    return {
+        "photos": photos,  # list[PhotoInfo] (blur and brightness only)
+        "potential_trash": potential_trash,  # list[PhotoInfo]
+        "quality_scores": quality_scores,  # BatchQualityScores, in the order of photos
+    }
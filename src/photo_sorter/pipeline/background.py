@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import queue
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import List, Optional
+
+from photo_sorter.pipeline.incremental import IncrementalScanSession
+from photo_sorter.pipeline.progress import ScanCancelled
+from photo_sorter.pipeline.streaming import StreamEvent
+
+
+class BackgroundScanner:
+    """
+    Runs IncrementalScanSession.scan() on a background thread, so a GUI
+    stays responsive, and hands everything the scan reports over through a
+    thread-safe queue. The GUI thread drains it with poll() (e.g. from a
+    Tk after() callback); nothing else is shared between the threads.
+
+    Events put on the queue (StreamEvent kind / data):
+     - "progress", "trash", "exact_group": forwarded from the scan,
+     - "done": the summary dict of the finished scan,
+     - "cancelled": None - the scan stopped after cancel(),
+     - "error": the exception the scan raised.
+    Exactly one of the last three ends every scan.
+    """
+
+    def __init__(self) -> None:
+        # One thread: scans run one at a time
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="photo-scan")
+        self._events: "queue.Queue[StreamEvent]" = queue.Queue()
+        self._cancel_event = threading.Event()
+        self._future: Optional[Future] = None
+
+    @property
+    def running(self) -> bool:
+        return self._future is not None and not self._future.done()
+
+    def start(self, session: IncrementalScanSession) -> None:
+        """
+        Start scanning in the background. Only one scan may run at a time.
+        """
+        if self.running:
+            raise RuntimeError("A scan is already running")
+
+        # Fresh event per scan - a late cancel() can't hit the next scan
+        self._cancel_event = threading.Event()
+        self._future = self._executor.submit(self._run, session, self._cancel_event)
+
+    def _run(self, session: IncrementalScanSession, cancel_event: threading.Event) -> None:
+        try:
+            summary = session.scan(self._events.put, cancel_event)
+        except ScanCancelled:
+            self._events.put(StreamEvent("cancelled", None))
+        except Exception as exc:  # noqa: BLE001
+            # Reported to the GUI instead of dying silently on the worker thread
+            self._events.put(StreamEvent("error", exc))
+        else:
+            self._events.put(StreamEvent("done", summary))
+
+    def cancel(self) -> None:
+        """
+        Ask the running scan to stop (it finishes the file it is on).
+        """
+        self._cancel_event.set()
+
+    def poll(self, max_events: int = 500) -> List[StreamEvent]:
+        """
+        Return the events queued since the last call, without blocking.
+        At most max_events are returned, so one call can't freeze the GUI.
+        """
+        events: List[StreamEvent] = []
+
+        while len(events) < max_events:
+            try:
+                events.append(self._events.get_nowait())
+            except queue.Empty:
+                break
+
+        return events
+
+    def shutdown(self) -> None:
+        """
+        Cancel a running scan and wait for the thread to finish.
+        """
+        self.cancel()
+        self._executor.shutdown(wait=True)
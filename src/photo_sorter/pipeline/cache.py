@@ -0,0 +1,438 @@
+from __future__ import annotations
+
+import argparse
+import os
+import sqlite3
+import sys
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from photo_sorter.deduplication.hashing import (
+    FILE_HASH_ALGORITHM,
+    FILE_HASH_ALGORITHMS,
+    PERCEPTUAL_HASH_ALGORITHM,
+    perceptual_hash_algorithm,
+)
+from photo_sorter.quality.analysis import (
+    DECODE_SCALES,
+    QUALITY_METRICS_VERSION,
+    quality_metrics_version,
+)
+from photo_sorter.scanning.models import PhotoInfo
+
+
+# Bump when the table layout changes - old cache files are then rebuilt from scratch.
+SCHEMA_VERSION = 2
+
+# Identifies the algorithms that produced the cached values.
+# Rows written with different algorithms are never returned and are removed by compact().
+DEFAULT_ALGORITHMS = "|".join(
+    (FILE_HASH_ALGORITHM, PERCEPTUAL_HASH_ALGORITHM, QUALITY_METRICS_VERSION)
+)
+
+CACHE_FILE_NAME = "analysis.sqlite3"
+
+
+def analysis_algorithms(
+    decode_scale: int = 1,
+    file_hash_algorithm: str = FILE_HASH_ALGORITHM,
+) -> str:
+    """
+    Algorithms string for results computed at the given decode scale
+    with the given file hash algorithm.
+    Reduced decodes give slightly different pHash/blur/brightness values,
+    so they are cached separately from full-resolution results; digests of
+    different file hash algorithms are never comparable.
+    """
+    return "|".join(
+        (
+            file_hash_algorithm,
+            perceptual_hash_algorithm(decode_scale),
+            quality_metrics_version(decode_scale),
+        )
+    )
+
+
+# Results of every supported decode scale and file hash stay valid - compact() keeps them all
+CURRENT_ALGORITHMS = frozenset(
+    analysis_algorithms(scale, file_hash_algorithm)
+    for scale in DECODE_SCALES
+    for file_hash_algorithm in FILE_HASH_ALGORITHMS
+)
+
+# Number of pending rows written in one executemany() batch
+_WRITE_BATCH_SIZE = 500
+
+_COLUMNS = (
+    "path",
+    "algorithms",
+    "size_bytes",
+    "mtime_ns",
+    "inode",
+    "file_name",
+    "taken_at",
+    "file_hash",
+    "perceptual_hash",
+    "blur_score",
+    "brightness_score",
+    "is_potential_trash",
+    "width",
+    "height",
+)
+
+
+def default_cache_dir() -> Path:
+    """
+    Return the per-user cache directory for photo_sorter
+    (XDG_CACHE_HOME on Linux, Library/Caches on macOS, LOCALAPPDATA on Windows).
+    """
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA")
+        if base:
+            return Path(base) / "photo_sorter" / "Cache"
+        return Path.home() / "AppData" / "Local" / "photo_sorter" / "Cache"
+
+    if sys.platform == "darwin":
+        return Path.home() / "Library" / "Caches" / "photo_sorter"
+
+    base = os.environ.get("XDG_CACHE_HOME")
+    if base:
+        return Path(base) / "photo_sorter"
+    return Path.home() / ".cache" / "photo_sorter"
+
+
+def default_cache_path() -> Path:
+    """
+    Return the default location of the analysis cache database.
+    """
+    return default_cache_dir() / CACHE_FILE_NAME
+
+
+def _cache_key_path(path: Path, resolved_dirs: Dict[str, str]) -> str:
+    """
+    Return the path string used as the cache key: the path with its folder
+    resolved (symlinks, "..", relative paths), so one file reached in
+    different ways shares its row. A symlinked file keeps its own name.
+
+    resolved_dirs memoises the folders - photos come folder by folder, so
+    each one is resolved about once. It belongs to one AnalysisCache (one
+    scan), so a re-pointed folder symlink is seen by the next scan.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    resolved = resolved_dirs.get(directory)
+    if resolved is None:
+        resolved = resolved_dirs[directory] = os.path.realpath(directory)
+    return os.path.join(resolved, path.name)
+
+
+@dataclass
+class CompactionResult:
+    """
+    Number of rows removed by AnalysisCache.compact().
+    """
+
+    removed_missing: int = 0
+    removed_changed: int = 0
+    removed_outdated: int = 0
+    remaining: int = 0
+
+    @property
+    def removed(self) -> int:
+        return self.removed_missing + self.removed_changed + self.removed_outdated
+
+
+class AnalysisCache:
+    """
+    Persistent SQLite cache of analysed PhotoInfo fields.
+
+    Rows are keyed by (resolved path, st_size, st_mtime_ns, st_ino), so a file
+    is only re-analysed when it changed on disk. Each row also records the
+    algorithms that produced it; a lookup with different algorithms is a miss.
+
+    Usage:
+        with AnalysisCache(default_cache_path()) as cache:
+            photo = cache.get(path, path.stat())
+            ...
+            cache.put(photo, stat_result)
+    """
+
+    def __init__(self, db_path: Path, algorithms: str = DEFAULT_ALGORITHMS) -> None:
+        self.db_path = Path(db_path)
+        self.algorithms = algorithms
+        self._pending: List[tuple] = []
+        self._resolved_dirs: Dict[str, str] = {}  # see _cache_key_path
+
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.db_path))
+        self._init_schema()
+
+    # --- Setup ---
+
+    def _init_schema(self) -> None:
+        """
+        Create tables, or rebuild them if the file was written with another schema version.
+        """
+        conn = self._conn
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+
+        (version,) = conn.execute("PRAGMA user_version").fetchone()
+        if version != SCHEMA_VERSION:
+            conn.execute("DROP TABLE IF EXISTS photos")
+
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS photos (
+                path TEXT NOT NULL,
+                algorithms TEXT NOT NULL,
+                size_bytes INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                inode INTEGER NOT NULL,
+                file_name TEXT NOT NULL,
+                taken_at TEXT,
+                file_hash TEXT,
+                perceptual_hash TEXT,
+                blur_score REAL,
+                brightness_score REAL,
+                is_potential_trash INTEGER,
+                width INTEGER,
+                height INTEGER,
+                PRIMARY KEY (path, algorithms)
+            )
+            """
+        )
+        conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+        conn.commit()
+
+    # --- Context manager ---
+
+    def __enter__(self) -> "AnalysisCache":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """
+        Flush pending writes and close the database.
+        """
+        self.flush()
+        self._conn.close()
+        self._resolved_dirs.clear()
+
+    # --- Reading / writing ---
+
+    def get(self, path: Path, stat_result: os.stat_result) -> Optional[PhotoInfo]:
+        """
+        Return the cached PhotoInfo for path, or None if there is no row
+        for the current algorithms or the file changed since it was cached.
+        """
+        row = self._conn.execute(
+            "SELECT size_bytes, mtime_ns, inode, file_name, taken_at, file_hash,"
+            " perceptual_hash, blur_score, brightness_score, is_potential_trash, width, height"
+            " FROM photos WHERE path = ? AND algorithms = ?",
+            (_cache_key_path(path, self._resolved_dirs), self.algorithms),
+        ).fetchone()
+
+        if row is None:
+            return None
+
+        size_bytes, mtime_ns, inode, file_name, taken_at, *rest = row
+        if (size_bytes, mtime_ns, inode) != (
+            stat_result.st_size,
+            stat_result.st_mtime_ns,
+            stat_result.st_ino,
+        ):
+            # File was modified (or replaced) since it was cached
+            return None
+
+        file_hash, perceptual_hash, blur_score, brightness_score, is_trash, width, height = rest
+        return PhotoInfo(
+            path=path,
+            file_name=file_name,
+            size_bytes=size_bytes,
+            taken_at=datetime.fromisoformat(taken_at) if taken_at else None,
+            file_hash=file_hash,
+            perceptual_hash=perceptual_hash,
+            blur_score=blur_score,
+            brightness_score=brightness_score,
+            is_potential_trash=None if is_trash is None else bool(is_trash),
+            width=width,
+            height=height,
+        )
+
+    def put(self, photo: PhotoInfo, stat_result: os.stat_result) -> None:
+        """
+        Store all PhotoInfo fields for the given file state.
+        Writes are batched; call flush() (or close()) to persist them.
+        """
+        self._pending.append(
+            (
+                _cache_key_path(photo.path, self._resolved_dirs),
+                self.algorithms,
+                stat_result.st_size,
+                stat_result.st_mtime_ns,
+                stat_result.st_ino,
+                photo.file_name,
+                photo.taken_at.isoformat() if photo.taken_at else None,
+                photo.file_hash,
+                photo.perceptual_hash,
+                photo.blur_score,
+                photo.brightness_score,
+                None if photo.is_potential_trash is None else int(photo.is_potential_trash),
+                photo.width,
+                photo.height,
+            )
+        )
+
+        if len(self._pending) >= _WRITE_BATCH_SIZE:
+            self.flush()
+
+    def flush(self) -> None:
+        """
+        Write all pending rows in a single transaction.
+        """
+        if not self._pending:
+            return
+
+        placeholders = ", ".join("?" for _ in _COLUMNS)
+        with self._conn:
+            self._conn.executemany(
+                f"INSERT OR REPLACE INTO photos ({', '.join(_COLUMNS)}) VALUES ({placeholders})",
+                self._pending,
+            )
+        self._pending.clear()
+
+    # --- Maintenance ---
+
+    def count(self) -> int:
+        """
+        Return the number of rows in the cache (all algorithms).
+        """
+        self.flush()
+        (total,) = self._conn.execute("SELECT COUNT(*) FROM photos").fetchone()
+        return total
+
+    def compact(self) -> CompactionResult:
+        """
+        Evict rows that can never be hit again and shrink the database file:
+        - files that no longer exist,
+        - files that changed on disk since they were cached,
+        - rows written with outdated algorithms (neither the current ones
+          nor any of CURRENT_ALGORITHMS).
+        """
+        self.flush()
+        result = CompactionResult()
+        to_delete: List[tuple] = []
+
+        rows = self._conn.execute(
+            "SELECT path, algorithms, size_bytes, mtime_ns, inode FROM photos"
+        ).fetchall()
+
+        for path_str, algorithms, size_bytes, mtime_ns, inode in rows:
+            if algorithms != self.algorithms and algorithms not in CURRENT_ALGORITHMS:
+                result.removed_outdated += 1
+                to_delete.append((path_str, algorithms))
+                continue
+
+            try:
+                st = os.stat(path_str)
+            except OSError:
+                result.removed_missing += 1
+                to_delete.append((path_str, algorithms))
+                continue
+
+            if (st.st_size, st.st_mtime_ns, st.st_ino) != (size_bytes, mtime_ns, inode):
+                result.removed_changed += 1
+                to_delete.append((path_str, algorithms))
+
+        with self._conn:
+            self._conn.executemany(
+                "DELETE FROM photos WHERE path = ? AND algorithms = ?",
+                to_delete,
+            )
+
+        # VACUUM cannot run inside a transaction
+        self._conn.execute("VACUUM")
+
+        result.remaining = len(rows) - len(to_delete)
+        return result
+
+    def clear(self) -> None:
+        """
+        Remove all rows from the cache.
+        """
+        self._pending.clear()
+        with self._conn:
+            self._conn.execute("DELETE FROM photos")
+        self._conn.execute("VACUUM")
+
+
+def open_cache(
+    cache_path: Optional[Path] = None,
+    decode_scale: int = 1,
+    file_hash_algorithm: str = FILE_HASH_ALGORITHM,
+) -> Optional[AnalysisCache]:
+    """
+    Open the analysis cache (default location if cache_path is None)
+    for results computed at the given decode scale and file hash algorithm.
+    The cache is only an optimisation, so if it can't be opened
+    (read-only home, corrupted file, ...) None is returned and callers scan without it.
+    """
+    try:
+        return AnalysisCache(
+            cache_path or default_cache_path(),
+            analysis_algorithms(decode_scale, file_hash_algorithm),
+        )
+    except (OSError, sqlite3.Error):
+        return None
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Maintenance command for the analysis cache:
+        python -m photo_sorter.pipeline.cache compact [--cache PATH]
+        python -m photo_sorter.pipeline.cache info [--cache PATH]
+        python -m photo_sorter.pipeline.cache clear [--cache PATH]
+    """
+    parser = argparse.ArgumentParser(
+        prog="python -m photo_sorter.pipeline.cache",
+        description="Maintain the photo_sorter analysis cache.",
+    )
+    parser.add_argument(
+        "command",
+        choices=("compact", "info", "clear"),
+        help="compact: evict rows of missing/changed files and outdated algorithms",
+    )
+    parser.add_argument(
+        "--cache",
+        type=Path,
+        default=None,
+        help=f"Cache database (default: {default_cache_path()})",
+    )
+    args = parser.parse_args(argv)
+
+    with AnalysisCache(args.cache or default_cache_path()) as cache:
+        if args.command == "compact":
+            result = cache.compact()
+            print(
+                f"Removed {result.removed} rows "
+                f"({result.removed_missing} missing, {result.removed_changed} changed, "
+                f"{result.removed_outdated} outdated), {result.remaining} remaining."
+            )
+        elif args.command == "info":
+            print(f"Cache: {cache.db_path}")
+            print(f"Schema version: {SCHEMA_VERSION}")
+            print(f"Algorithms: {cache.algorithms}")
+            print(f"Rows: {cache.count()}")
+        else:
+            cache.clear()
+            print(f"Cleared {cache.db_path}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,323 @@
+from __future__ import annotations
+
+import bisect
+import threading
+from contextlib import closing
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from photo_sorter.deduplication.hashing import FILE_HASH_ALGORITHM
+from photo_sorter.deduplication.incremental import (
+    IncrementalExactGrouper,
+    IncrementalNearGrouper,
+)
+from photo_sorter.pipeline.cache import open_cache
+from photo_sorter.pipeline.progress import (
+    STAGE_ANALYSE,
+    STAGE_DISCOVER,
+    STAGE_GROUP,
+    ProgressCallback,
+    ProgressReporter,
+)
+from photo_sorter.pipeline.single_pass import SinglePassStats, iter_analyzed_photos
+from photo_sorter.pipeline.streaming import ExactGroupUpdate
+from photo_sorter.quality.analysis import find_potential_trash_photos
+from photo_sorter.scanning.filesystem_scanner import (
+    TRASH_PREVIEW_DIR_NAME,
+    PhotoEntry,
+    iter_photo_entries,
+)
+from photo_sorter.scanning.models import PhotoInfo
+
+
+@dataclass(frozen=True)
+class FileState:
+    """
+    What a rescan compares to decide whether a file changed.
+    """
+
+    size: int
+    mtime_ns: int
+    inode: int
+
+
+@dataclass
+class ScanDelta:
+    """
+    Difference between two directory walks.
+    moved holds (old_path, new_path) pairs of renamed/moved files.
+    """
+
+    added: List[Path] = field(default_factory=list)
+    removed: List[Path] = field(default_factory=list)
+    modified: List[Path] = field(default_factory=list)
+    moved: List[Tuple[Path, Path]] = field(default_factory=list)
+    unchanged: int = 0
+
+    @property
+    def is_empty(self) -> bool:
+        return not (self.added or self.removed or self.modified or self.moved)
+
+    def summary(self) -> str:
+        return (
+            f"{len(self.added)} added, {len(self.removed)} removed, "
+            f"{len(self.modified)} modified, {len(self.moved)} moved, "
+            f"{self.unchanged} unchanged"
+        )
+
+
+def take_snapshot(entries: List[PhotoEntry]) -> Dict[Path, FileState]:
+    """
+    Build a snapshot (path -> size, mtime, inode) from walker entries.
+    """
+    return {
+        entry.path: FileState(entry.stat.st_size, entry.stat.st_mtime_ns, entry.stat.st_ino)
+        for entry in entries
+    }
+
+
+def diff_snapshots(old: Dict[Path, FileState], new: Dict[Path, FileState]) -> ScanDelta:
+    """
+    Compare two snapshots. A file that disappeared from one path and
+    appeared under another with the same size, mtime and inode was moved
+    (a rename keeps all three), so it doesn't need to be analysed again.
+    """
+    delta = ScanDelta()
+    vanished: Dict[FileState, List[Path]] = {}
+
+    for path, state in old.items():
+        new_state = new.get(path)
+        if new_state is None:
+            vanished.setdefault(state, []).append(path)
+        elif new_state != state:
+            delta.modified.append(path)
+        else:
+            delta.unchanged += 1
+
+    for path, state in new.items():
+        if path in old:
+            continue
+
+        candidates = vanished.get(state)
+        if candidates:
+            delta.moved.append((candidates.pop(), path))
+        else:
+            delta.added.append(path)
+
+    for paths in vanished.values():
+        delta.removed.extend(paths)
+
+    return delta
+
+
+def _sort_key(photo: PhotoInfo):
+    # Same order as sort_photos_by_taken_date: photos without date go to the end
+    return (photo.taken_at is None, photo.taken_at)
+
+
+class IncrementalScanSession:
+    """
+    Keeps the results of the last scan of one root folder and updates them
+    in place on rescan, processing only added, modified and moved files.
+
+    The first scan() analyses everything. Every later scan() walks the tree,
+    compares it with the previous snapshot (path, size, mtime, inode) and:
+     - analyses only added and modified files,
+     - moves the PhotoInfo of moved files to their new path,
+     - removes deleted files from the photo list, the exact/near duplicate
+       groups and the trash list,
+    without recomputing anything for unchanged files.
+
+    The summary dict has the same keys as run_backend_pipeline's, plus
+    "scan_delta" (ScanDelta of the last scan).
+
+    scan() can report progress and partial results to a callback and be
+    cancelled from another thread (see scan() for details).
+    """
+
+    def __init__(
+        self,
+        root_folder: Path,
+        use_cache: bool = True,
+        cache_path: Optional[Path] = None,
+        workers: Optional[int] = 1,
+        max_distance: int = 5,
+        scan_threads: int = 1,
+        decode_scale: int = 1,
+        file_hash_algorithm: str = FILE_HASH_ALGORITHM,
+    ) -> None:
+        self.root_folder = root_folder
+        self.use_cache = use_cache
+        self.cache_path = cache_path
+        self.workers = workers
+        self.scan_threads = scan_threads
+        self.decode_scale = decode_scale
+        self.file_hash_algorithm = file_hash_algorithm
+        self.max_distance = max_distance
+
+        self.summary: Dict[str, Any] = {}
+        self._reset()
+
+    def _reset(self) -> None:
+        """
+        Forget all results - the next scan() analyses everything again
+        (unchanged files still come from the analysis cache).
+        """
+        self._snapshot: Dict[Path, FileState] = {}
+        self._by_path: Dict[Path, PhotoInfo] = {}
+        self._photos: List[PhotoInfo] = []  # sorted by taken date
+        self._trash: List[PhotoInfo] = []
+        self._exact = IncrementalExactGrouper()
+        self._near = IncrementalNearGrouper(max_distance=self.max_distance)
+        self._group_ids: Dict[str, int] = {}  # file_hash -> stable exact group id
+        self.summary.clear()
+
+    def _remove_photo(self, photo: PhotoInfo) -> None:
+        del self._by_path[photo.path]
+        self._exact.remove(photo)
+        self._near.remove(photo)
+
+        # Find it through the sorted order instead of scanning the whole list
+        key = _sort_key(photo)
+        start = bisect.bisect_left(self._photos, key, key=_sort_key)
+        for i in range(start, len(self._photos)):
+            if self._photos[i] is photo:
+                del self._photos[i]
+                break
+
+        if photo.is_potential_trash:
+            self._trash[:] = [p for p in self._trash if p is not photo]
+
+    def _add_photo(self, photo: PhotoInfo) -> Optional[List[PhotoInfo]]:
+        """
+        Add an analysed photo; returns its exact duplicate group if it has one.
+        """
+        self._by_path[photo.path] = photo
+        group = self._exact.add(photo)
+        self._near.add(photo)
+        bisect.insort(self._photos, photo, key=_sort_key)
+        return group
+
+    def scan(
+        self,
+        progress: Optional[ProgressCallback] = None,
+        cancel_event: Optional[threading.Event] = None,
+    ) -> Dict[str, Any]:
+        """
+        Walk the root folder and bring the results up to date.
+        Returns the (updated) summary dict.
+
+        progress receives StreamEvents while the scan runs (on the scanning
+        thread): "progress" (ScanProgress of the discover / analyse / group
+        stages), and as soon as they are known "trash" (PhotoInfo) and
+        "exact_group" (ExactGroupUpdate) for newly analysed photos.
+
+        Setting cancel_event stops the scan at the next file and raises
+        ScanCancelled. After that, or any other error (e.g. an OSError from
+        the walk or a crashed worker), the session starts from scratch on the
+        next scan(); everything analysed so far is already in the analysis cache.
+        """
+        reporter = ProgressReporter(progress, cancel_event)
+
+        try:
+            return self._scan(reporter)
+        except BaseException:
+            # Results are half-updated - don't build on them
+            self._reset()
+            raise
+
+    def _scan(self, reporter: ProgressReporter) -> Dict[str, Any]:
+        entries: List[PhotoEntry] = []
+        for entry in iter_photo_entries(
+            self.root_folder,
+            exclude_dirs=(TRASH_PREVIEW_DIR_NAME,),
+            threads=self.scan_threads,
+        ):
+            entries.append(entry)
+            reporter.update(STAGE_DISCOVER, len(entries))
+            reporter.check_cancelled()
+        reporter.update(STAGE_DISCOVER, len(entries), len(entries), force=True)
+
+        new_snapshot = take_snapshot(entries)
+        delta = diff_snapshots(self._snapshot, new_snapshot)
+
+        # 1. Drop removed files and the old versions of modified files
+        for path in delta.removed + delta.modified:
+            self._remove_photo(self._by_path[path])
+
+        # 2. Moved files keep their analysis, only the path changes
+        for old_path, new_path in delta.moved:
+            photo = self._by_path.pop(old_path)
+            photo.path = new_path
+            photo.file_name = new_path.name
+            self._by_path[new_path] = photo
+
+        # 3. Analyse only new and modified files
+        entries_by_path = {entry.path: entry for entry in entries}
+        todo = [entries_by_path[path] for path in delta.added + delta.modified]
+
+        analysis_stats = SinglePassStats()
+        cache = (
+            open_cache(self.cache_path, self.decode_scale, self.file_hash_algorithm)
+            if self.use_cache
+            else None
+        )
+        try:
+            # Moved files are cache misses under their new path - remember them there
+            if cache is not None:
+                for _, new_path in delta.moved:
+                    cache.put(self._by_path[new_path], entries_by_path[new_path].stat)
+
+            reporter.update(STAGE_ANALYSE, 0, len(todo), force=True)
+
+            # closing(): on cancel, stop the worker pool right away
+            with closing(
+                iter_analyzed_photos(
+                    todo,
+                    analysis_stats,
+                    cache,
+                    self.workers,
+                    decode_scale=self.decode_scale,
+                    file_hash_algorithm=self.file_hash_algorithm,
+                )
+            ) as new_photos:
+                for done, photo in enumerate(new_photos, start=1):
+                    reporter.check_cancelled()
+
+                    if find_potential_trash_photos([photo]):
+                        self._trash.append(photo)
+                        reporter.emit("trash", photo)
+
+                    group = self._add_photo(photo)
+                    if group is not None:
+                        assert photo.file_hash is not None
+                        group_id = self._group_ids.setdefault(photo.file_hash, len(self._group_ids))
+                        reporter.emit(
+                            "exact_group",
+                            ExactGroupUpdate(group_id, photo.file_hash, group),
+                        )
+
+                    reporter.update(STAGE_ANALYSE, done, len(todo))
+            reporter.update(STAGE_ANALYSE, len(todo), len(todo), force=True)
+        finally:
+            if cache is not None:
+                cache.close()
+
+        self._snapshot = new_snapshot
+
+        reporter.update(STAGE_GROUP, 0, None, force=True)
+        near_groups = self._near.groups()
+        reporter.update(STAGE_GROUP, len(near_groups), len(near_groups), force=True)
+
+        self.summary.update(
+            {
+                "photos": self._photos,
+                "exact_groups": self._exact.groups(),
+                "near_groups": near_groups,
+                "potential_trash": self._trash,
+                "analysis_stats": analysis_stats,
+                "scan_delta": delta,
+            }
+        )
+        return self.summary
@@ -0,0 +1,379 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import (
+    TYPE_CHECKING,
+    Deque,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
+
+from photo_sorter.deduplication.hashing import FILE_HASH_ALGORITHM, new_file_hasher
+from photo_sorter.parallel import resolve_workers, worker_peak_rss_bytes
+from photo_sorter.pipeline.single_pass import (
+    SinglePassStats,
+    _AnalysisTask,
+    analyze_photo_bytes,
+)
+from photo_sorter.quality.analysis import check_decode_scale
+from photo_sorter.scanning.filesystem_scanner import PhotoEntry, unpack_photo_entry
+from photo_sorter.scanning.models import PhotoInfo
+
+if TYPE_CHECKING:
+    from photo_sorter.pipeline.cache import AnalysisCache
+
+
+# Files read at the same time. Reads mostly wait on the disk or network,
+# so a few more than CPU cores keep a queue in front of the decoders.
+DEFAULT_READ_AHEAD = 8
+
+# File contents held in memory at once (read, waiting for or in analysis)
+DEFAULT_MAX_BUFFERED_BYTES = 256 * 1024 * 1024
+
+
+@dataclass
+class PrefetchStats:
+    """
+    How the prefetching went: read time summed over the reader threads,
+    the most file bytes held at once, and how often reading had to wait
+    because max_buffered_bytes was used up (the CPU side is the bottleneck).
+    """
+
+    files: int = 0
+    read_seconds: float = 0.0
+    peak_buffered_bytes: int = 0
+    budget_waits: int = 0
+
+
+class _ByteBudget:
+    """
+    Bytes of file contents allowed in memory. Only the scheduler's feeder
+    acquires, so waiters are simply woken up on every release. A file larger
+    than the whole budget is let through once nothing else is buffered.
+    """
+
+    def __init__(self, limit: int, stats: PrefetchStats) -> None:
+        self.limit = limit
+        self.used = 0
+        self.stats = stats
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    async def acquire(self, size: int) -> None:
+        if self.used and self.used + size > self.limit:
+            self.stats.budget_waits += 1
+        while self.used and self.used + size > self.limit:
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            await waiter
+
+        self.used += size
+        self.stats.peak_buffered_bytes = max(self.stats.peak_buffered_bytes, self.used)
+
+    def release(self, size: int) -> None:
+        self.used -= size
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+
+
+def _read_or_none(path: Path) -> Tuple[Optional[bytes], float]:
+    started = time.perf_counter()
+    try:
+        data: Optional[bytes] = path.read_bytes()
+    except OSError:
+        # File disappeared or is unreadable - analysed as unreadable
+        data = None
+    return data, time.perf_counter() - started
+
+
+def _analyze_bytes_task(
+    task: Tuple[Path, Optional[bytes], os.stat_result, int, str, float],
+) -> Tuple[PhotoInfo, SinglePassStats]:
+    """
+    Unit of work for the CPU pool: analyse prefetched bytes and return the
+    photo with its own counters (merged by the scheduler).
+    """
+    path, data, stat_result, decode_scale, file_hash_algorithm, read_seconds = task
+    stats = SinglePassStats()
+    started = time.perf_counter()
+    photo = analyze_photo_bytes(path, data, stat_result, stats, decode_scale, file_hash_algorithm)
+    if data is not None:
+        stats.add_step("read", read_seconds)
+    stats.add_file_time(path, read_seconds + time.perf_counter() - started)
+    stats.worker_peak_rss_bytes = worker_peak_rss_bytes()
+    return photo, stats
+
+
+class _Failure:
+    __slots__ = ("error",)
+
+    def __init__(self, error: BaseException) -> None:
+        self.error = error
+
+
+_END = object()
+
+# What the scheduler hands back: an analysed photo, its counters and stat
+# result, or a photo that needed no analysis (cache hit)
+_Result = Union[Tuple[PhotoInfo, SinglePassStats, os.stat_result], PhotoInfo]
+
+
+class _PrefetchScheduler:
+    """
+    Feeds analysis tasks through two stages:
+     - reading: whole files are read in a thread pool, at most read_ahead
+       at a time, and only while the bytes held stay within max_buffered_bytes,
+     - analysis: the bytes go to the CPU executor (analyze_photo_bytes).
+    A file's bytes count against the budget until its analysis is done, so
+    slow decoding stops the reading instead of filling memory.
+
+    The event loop runs in the consumer's thread (see iter_prefetched_photos):
+    the reads and the analysis go on in their pools while the consumer handles
+    a result, and the task iterable (walker, cache lookups) is only ever
+    touched from that thread.
+    """
+
+    def __init__(
+        self,
+        cpu_executor: Executor,
+        io_executor: ThreadPoolExecutor,
+        read_ahead: int,
+        max_buffered_bytes: int,
+        max_in_flight: int,
+        stats: PrefetchStats,
+    ) -> None:
+        self.cpu_executor = cpu_executor
+        self.io_executor = io_executor
+        self.stats = stats
+        self.results: asyncio.Queue = asyncio.Queue()
+        self._read_slots = asyncio.Semaphore(read_ahead)
+        self._in_flight = asyncio.Semaphore(max_in_flight)
+        self._budget = _ByteBudget(max_buffered_bytes, stats)
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def run(self, items: Iterable[Union[_AnalysisTask, PhotoInfo]]) -> None:
+        try:
+            loop = asyncio.get_running_loop()
+            for item in items:
+                if isinstance(item, PhotoInfo):
+                    self.results.put_nowait(item)
+                    continue
+
+                path, stat_result = item[0], item[1]
+                if stat_result is None:
+                    stat_result = await loop.run_in_executor(self.io_executor, path.stat)
+                    item = (path, stat_result) + item[2:]
+
+                # Backpressure: wait for room before the read starts
+                await self._in_flight.acquire()
+                await self._budget.acquire(stat_result.st_size)
+                await self._read_slots.acquire()
+
+                task = loop.create_task(self._process(item))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+
+            while self._tasks:
+                await asyncio.gather(*list(self._tasks))
+        except Exception as error:
+            self.results.put_nowait(_Failure(error))
+        else:
+            self.results.put_nowait(_END)
+
+    async def _process(self, task: _AnalysisTask) -> None:
+        path, stat_result, decode_scale, file_hash_algorithm = task
+        assert stat_result is not None
+        loop = asyncio.get_running_loop()
+
+        try:
+            try:
+                data, read_seconds = await loop.run_in_executor(self.io_executor, _read_or_none, path)
+            finally:
+                self._read_slots.release()
+            self.stats.files += 1
+            self.stats.read_seconds += read_seconds
+
+            photo, task_stats = await loop.run_in_executor(
+                self.cpu_executor,
+                _analyze_bytes_task,
+                (path, data, stat_result, decode_scale, file_hash_algorithm, read_seconds),
+            )
+            del data
+        except Exception as error:
+            self.results.put_nowait(_Failure(error))
+            return
+        finally:
+            self._budget.release(stat_result.st_size)
+            self._in_flight.release()
+
+        self.results.put_nowait((photo, task_stats, stat_result))
+
+    async def cancel(self) -> None:
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def _cpu_executor(workers: int) -> Executor:
+    # One worker: a thread is enough - it still overlaps with the reads
+    # (hashing and decoding release the GIL) and costs no pickling
+    if workers == 1:
+        return ThreadPoolExecutor(max_workers=1, thread_name_prefix="photo-analysis")
+    return ProcessPoolExecutor(max_workers=workers)
+
+
+def _iter_scheduled(
+    items: Iterable[Union[_AnalysisTask, PhotoInfo]],
+    workers: Optional[int],
+    read_ahead: int,
+    max_buffered_bytes: int,
+    prefetch_stats: PrefetchStats,
+) -> Iterator[_Result]:
+    num_workers = resolve_workers(workers)
+    if read_ahead < 1:
+        raise ValueError(f"read_ahead must be >= 1, got {read_ahead}")
+
+    loop = asyncio.new_event_loop()
+    io_executor = ThreadPoolExecutor(max_workers=read_ahead, thread_name_prefix="photo-read")
+    cpu_executor = _cpu_executor(num_workers)
+    scheduler = _PrefetchScheduler(
+        cpu_executor,
+        io_executor,
+        read_ahead,
+        max_buffered_bytes,
+        # Enough queued work to keep every worker busy
+        read_ahead + 2 * num_workers,
+        prefetch_stats,
+    )
+    main = loop.create_task(scheduler.run(items))
+
+    try:
+        # The loop only runs while we wait for the next result - reads and
+        # analyses already handed to the pools carry on in the meantime
+        while True:
+            result = loop.run_until_complete(scheduler.results.get())
+            if result is _END:
+                break
+            if isinstance(result, _Failure):
+                raise result.error
+            yield result
+    finally:
+        # Also reached when the consumer stops early (generator closed)
+        main.cancel()
+        loop.run_until_complete(asyncio.gather(main, return_exceptions=True))
+        loop.run_until_complete(scheduler.cancel())
+        io_executor.shutdown(wait=True, cancel_futures=True)
+        cpu_executor.shutdown(wait=True, cancel_futures=True)
+        loop.close()
+
+
+def iter_prefetched_photos(
+    paths: Iterable[Union[Path, PhotoEntry]],
+    stats: Optional[SinglePassStats] = None,
+    cache: Optional[AnalysisCache] = None,
+    workers: Optional[int] = 1,
+    read_ahead: int = DEFAULT_READ_AHEAD,
+    max_buffered_bytes: int = DEFAULT_MAX_BUFFERED_BYTES,
+    decode_scale: int = 1,
+    file_hash_algorithm: str = FILE_HASH_ALGORITHM,
+    prefetch_stats: Optional[PrefetchStats] = None,
+) -> Iterator[PhotoInfo]:
+    """
+    Counterpart of iter_analyzed_photos that overlaps reading with decoding:
+    an asyncio scheduler reads up to read_ahead files ahead in a thread pool
+    while earlier ones are analysed by the CPU workers (workers processes,
+    or one thread for workers=1), and holds at most max_buffered_bytes of
+    file contents - reading pauses when decoding falls behind. Helps most
+    on spinning disks and network shares, where the CPU otherwise idles
+    during every read.
+
+    Results are the same as iter_analyzed_photos', yielded in the order
+    they finish (not input order). Cache hits are yielded without reading.
+    """
+    check_decode_scale(decode_scale)
+    new_file_hasher(file_hash_algorithm)
+    if stats is None:
+        stats = SinglePassStats()
+    if prefetch_stats is None:
+        prefetch_stats = PrefetchStats()
+
+    def items() -> Iterator[Union[_AnalysisTask, PhotoInfo]]:
+        for item in paths:
+            path, stat_result = unpack_photo_entry(item)
+
+            if cache is not None:
+                if stat_result is None:
+                    stat_result = path.stat()
+                cached = cache.get(path, stat_result)
+                if cached is not None:
+                    stats.photos += 1
+                    stats.cache_hits += 1
+                    yield cached
+                    continue
+
+            yield path, stat_result, decode_scale, file_hash_algorithm
+
+    for result in _iter_scheduled(items(), workers, read_ahead, max_buffered_bytes, prefetch_stats):
+        if isinstance(result, PhotoInfo):
+            yield result
+            continue
+
+        photo, task_stats, stat_result = result
+        stats.merge(task_stats)
+
+        # Don't remember read errors - they may be temporary
+        if cache is not None and photo.file_hash is not None:
+            cache.put(photo, stat_result)
+
+        yield photo
+
+    if cache is not None:
+        cache.flush()
+
+
+def analyze_photo_paths_prefetched(
+    paths: Iterable[Union[Path, PhotoEntry]],
+    stats: Optional[SinglePassStats] = None,
+    cache: Optional[AnalysisCache] = None,
+    workers: Optional[int] = 1,
+    read_ahead: int = DEFAULT_READ_AHEAD,
+    max_buffered_bytes: int = DEFAULT_MAX_BUFFERED_BYTES,
+    decode_scale: int = 1,
+    file_hash_algorithm: str = FILE_HASH_ALGORITHM,
+    prefetch_stats: Optional[PrefetchStats] = None,
+) -> List[PhotoInfo]:
+    """
+    analyze_photo_paths with prefetched reads (see iter_prefetched_photos):
+    same photos, in the order of paths.
+    """
+    items = list(paths)
+    slots = {unpack_photo_entry(item)[0]: slot for slot, item in enumerate(items)}
+    photos: List[Optional[PhotoInfo]] = [None] * len(items)
+
+    for photo in iter_prefetched_photos(
+        items,
+        stats,
+        cache,
+        workers,
+        read_ahead,
+        max_buffered_bytes,
+        decode_scale,
+        file_hash_algorithm,
+        prefetch_stats,
+    ):
+        photos[slots[photo.path]] = photo
+
+    return photos  # type: ignore[return-value]  # every slot is filled above
@@ -0,0 +1,287 @@
+from __future__ import annotations
+
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, TypeVar
+
+from photo_sorter.parallel import peak_rss_bytes
+from photo_sorter.pipeline.single_pass import SinglePassStats
+
+T = TypeVar("T")
+
+
+# Stages of run_backend_pipeline / stream_backend_pipeline besides
+# progress.STAGE_DISCOVER and progress.STAGE_ANALYSE
+STAGE_SORT = "sort"
+STAGE_EXACT_GROUPS = "exact_groups"
+STAGE_NEAR_GROUPS = "near_groups"
+STAGE_TRASH = "trash"
+
+
+def _children_cpu_seconds() -> float:
+    # CPU time of finished child processes (pool workers are joined at the
+    # end of the analysis). Always 0 on Windows.
+    times = os.times()
+    return times.children_user + times.children_system
+
+
+@dataclass
+class StageReport:
+    """
+    Timings of one stage. wall_s / cpu_s are self time: time spent in a
+    nested stage (e.g. the directory walk feeding a streaming analysis)
+    is only counted there. cpu_s is CPU time of this process - work done
+    in worker processes is in ProfileReport.worker_cpu_s.
+    """
+
+    name: str
+    wall_s: float = 0.0
+    cpu_s: float = 0.0
+    items: int = 0
+    bytes_read: int = 0
+    # Process peak RSS when the stage was last left (sampled only when it isn't
+    # nested in another stage) - the peak never goes down, so the first stage
+    # showing a jump is the one that caused it
+    peak_rss_bytes: Optional[int] = None
+
+    @property
+    def items_per_s(self) -> float:
+        return self.items / self.wall_s if self.wall_s > 0 else 0.0
+
+    @property
+    def mb_per_s(self) -> float:
+        return self.bytes_read / self.wall_s / 1e6 if self.wall_s > 0 else 0.0
+
+    def add(self, items: int = 0, bytes_read: int = 0) -> None:
+        self.items += items
+        self.bytes_read += bytes_read
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "wall_s": self.wall_s,
+            "cpu_s": self.cpu_s,
+            "items": self.items,
+            "items_per_s": self.items_per_s,
+            "bytes_read": self.bytes_read,
+            "mb_per_s": self.mb_per_s,
+            "peak_rss_bytes": self.peak_rss_bytes,
+        }
+
+
+@dataclass
+class ProfileReport:
+    """
+    Result of a profiled pipeline run.
+
+    analysis_steps breaks the single-pass analysis down into its steps
+    (read, file_hash, exif, decode, phash, quality) - seconds summed over all
+    analysed files, so with several workers they can add up to more than
+    the wall time of the analyse stage. Cache hits have no steps.
+    """
+
+    stages: List[StageReport] = field(default_factory=list)
+    total_wall_s: float = 0.0
+    worker_cpu_s: float = 0.0
+    peak_rss_bytes: Optional[int] = None
+    worker_peak_rss_bytes: Optional[int] = None
+    analysis_steps: Dict[str, float] = field(default_factory=dict)
+    slowest_files: List[Tuple[float, str]] = field(default_factory=list)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "total_wall_s": self.total_wall_s,
+            "worker_cpu_s": self.worker_cpu_s,
+            "peak_rss_bytes": self.peak_rss_bytes,
+            "worker_peak_rss_bytes": self.worker_peak_rss_bytes,
+            "stages": [stage.to_dict() for stage in self.stages],
+            "analysis_steps": dict(self.analysis_steps),
+            "slowest_files": [
+                {"path": path, "seconds": seconds} for seconds, path in self.slowest_files
+            ],
+        }
+
+    def to_json(self, indent: Optional[int] = 2) -> str:
+        return json.dumps(self.to_dict(), indent=indent, ensure_ascii=False)
+
+    def format_table(self) -> str:
+        """
+        Human readable report (for the CLI / debug_scan.py).
+        """
+        lines = [
+            f"{'stage':<14}{'wall s':>9}{'cpu s':>9}{'items':>9}{'items/s':>11}{'MB/s':>9}",
+        ]
+        for stage in self.stages:
+            lines.append(
+                f"{stage.name:<14}{stage.wall_s:>9.3f}{stage.cpu_s:>9.3f}{stage.items:>9}"
+                f"{stage.items_per_s:>11.1f}{stage.mb_per_s:>9.1f}"
+            )
+        lines.append(f"{'total':<14}{self.total_wall_s:>9.3f}")
+
+        if self.worker_cpu_s:
+            lines.append(f"worker processes CPU: {self.worker_cpu_s:.3f} s")
+        if self.peak_rss_bytes is not None:
+            line = f"peak RSS: {self.peak_rss_bytes / 2**20:.1f} MiB"
+            if self.worker_peak_rss_bytes:
+                line += f" (largest worker: {self.worker_peak_rss_bytes / 2**20:.1f} MiB)"
+            lines.append(line)
+
+        if self.analysis_steps:
+            total = sum(self.analysis_steps.values()) or 1.0
+            steps = ", ".join(
+                f"{name} {seconds:.3f} s ({seconds / total:.0%})"
+                for name, seconds in self.analysis_steps.items()
+            )
+            lines.append(f"analysis steps: {steps}")
+
+        if self.slowest_files:
+            lines.append("slowest files:")
+            lines.extend(f"  {seconds:8.3f} s  {path}" for seconds, path in self.slowest_files)
+
+        return "\n".join(lines)
+
+
+class _StageTimer:
+    """
+    Context manager timing one entry into a stage (see PipelineProfiler).
+    A plain class rather than @contextmanager - it runs once per file in
+    streaming mode, so every microsecond counts.
+    """
+
+    __slots__ = ("report", "stack", "wall", "cpu", "nested_wall", "nested_cpu")
+
+    def __init__(self, report: StageReport, stack: List["_StageTimer"]) -> None:
+        self.report = report
+        self.stack = stack
+
+    def __enter__(self) -> StageReport:
+        self.nested_wall = 0.0
+        self.nested_cpu = 0.0
+        self.stack.append(self)
+        self.wall = time.perf_counter()
+        self.cpu = time.process_time()
+        return self.report
+
+    def __exit__(self, *exc_info: object) -> None:
+        wall = time.perf_counter() - self.wall
+        cpu = time.process_time() - self.cpu
+        stack = self.stack
+        stack.pop()
+
+        report = self.report
+        report.wall_s += wall - self.nested_wall
+        report.cpu_s += cpu - self.nested_cpu
+
+        if stack:
+            stack[-1].nested_wall += wall
+            stack[-1].nested_cpu += cpu
+        else:
+            # getrusage() isn't free - only sampled when leaving the outermost stage
+            report.peak_rss_bytes = peak_rss_bytes()
+
+
+class PipelineProfiler:
+    """
+    Collects per-stage wall time, CPU time, item and byte counts of a
+    pipeline run:
+
+        profiler = PipelineProfiler()
+        with profiler.stage("sort") as stage:
+            photos = sort_photos_by_taken_date(photos)
+            stage.add(items=len(photos))
+        entries = profiler.timed_iter(STAGE_DISCOVER, iter_photo_entries(root))
+        report = profiler.report()
+
+    Stages can be entered many times (times add up) and nested; a stage's
+    time excludes the stages nested in it. Use from one thread only.
+    Pass NULL_PROFILER (the default of the pipelines) to skip all of this.
+    """
+
+    enabled = True
+
+    def __init__(self) -> None:
+        self._stages: Dict[str, StageReport] = {}
+        self._stack: List[_StageTimer] = []  # open stages, innermost last
+        self._analysis = SinglePassStats()
+        self._started = time.perf_counter()
+        self._children_cpu_start = _children_cpu_seconds()
+
+    def stage(self, name: str) -> "_StageTimer":
+        report = self._stages.get(name)
+        if report is None:
+            report = self._stages[name] = StageReport(name)
+        return _StageTimer(report, self._stack)
+
+    def timed_iter(self, name: str, items: Iterable[T]) -> Iterator[T]:
+        """
+        Yield from items, counting the time spent producing each item
+        (not the time the consumer spends on it) and the number of items.
+        """
+        iterator = iter(items)
+        while True:
+            with self.stage(name) as report:
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+                report.items += 1
+            yield item
+
+    def add_analysis_stats(self, stats: SinglePassStats) -> None:
+        """
+        Take the per-step timings and slowest files of an analysis run.
+        """
+        self._analysis.merge(stats)
+
+    def report(self) -> ProfileReport:
+        return ProfileReport(
+            stages=list(self._stages.values()),
+            total_wall_s=time.perf_counter() - self._started,
+            worker_cpu_s=_children_cpu_seconds() - self._children_cpu_start,
+            peak_rss_bytes=peak_rss_bytes(),
+            worker_peak_rss_bytes=self._analysis.worker_peak_rss_bytes,
+            analysis_steps=dict(self._analysis.step_seconds),
+            slowest_files=list(self._analysis.slowest_files),
+        )
+
+
+class _NullStage:
+    """Stage handle of NullProfiler - accepts and forgets everything."""
+
+    def add(self, items: int = 0, bytes_read: int = 0) -> None:
+        pass
+
+    def __enter__(self) -> "_NullStage":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        pass
+
+
+_NULL_STAGE = _NullStage()
+
+
+class NullProfiler:
+    """
+    Profiler that records nothing: stage() is a shared no-op context
+    manager and timed_iter() returns the iterable unchanged.
+    """
+
+    enabled = False
+
+    def stage(self, name: str) -> _NullStage:
+        return _NULL_STAGE
+
+    def timed_iter(self, name: str, items: Iterable[T]) -> Iterable[T]:
+        return items
+
+    def add_analysis_stats(self, stats: SinglePassStats) -> None:
+        pass
+
+    def report(self) -> ProfileReport:
+        return ProfileReport()
+
+
+NULL_PROFILER = NullProfiler()
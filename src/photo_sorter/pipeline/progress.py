@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional
+
+from photo_sorter.pipeline.streaming import StreamEvent
+
+
+# Minimum time between two "progress" events of the same stage - keeps the
+# event queue small when thousands of cached files are processed per second.
+PROGRESS_INTERVAL_S = 0.1
+
+# Stages reported by the scans
+STAGE_DISCOVER = "discover"  # directory walk
+STAGE_ANALYSE = "analyse"  # read + SHA-256 + EXIF + pHash + quality (or cache hit)
+STAGE_GROUP = "group"  # near-duplicate grouping
+
+
+class ScanCancelled(Exception):
+    """
+    Raised inside a scan when its cancel event was set.
+    """
+
+
+@dataclass
+class ScanProgress:
+    """
+    Payload of "progress" events: how far a stage got.
+    total is None while it isn't known yet (e.g. during the directory walk).
+    """
+
+    stage: str
+    done: int
+    total: Optional[int]
+    elapsed: float
+
+    @property
+    def rate(self) -> float:
+        """Items per second since the stage started."""
+        return self.done / self.elapsed if self.elapsed > 0 else 0.0
+
+    def describe(self) -> str:
+        """
+        Short text for a status line, e.g. "analyse: 120/500 (85.3/s)".
+        """
+        count = f"{self.done}/{self.total}" if self.total is not None else f"{self.done}"
+        return f"{self.stage}: {count} ({self.rate:.1f}/s)"
+
+
+ProgressCallback = Callable[[StreamEvent], None]
+
+
+class ProgressReporter:
+    """
+    Sends StreamEvents to an optional callback and checks for cancellation.
+
+    "progress" events are throttled to one per PROGRESS_INTERVAL_S per stage
+    (plus the final one, force=True); other events are passed on immediately.
+    Without a callback every call is a cheap no-op.
+    """
+
+    def __init__(
+        self,
+        callback: Optional[ProgressCallback] = None,
+        cancel_event: Optional[threading.Event] = None,
+    ) -> None:
+        self.callback = callback
+        self.cancel_event = cancel_event
+        self._started: Dict[str, float] = {}
+        self._last_sent: Dict[str, float] = {}
+
+    def check_cancelled(self) -> None:
+        """
+        Raise ScanCancelled if cancellation was requested.
+        """
+        if self.cancel_event is not None and self.cancel_event.is_set():
+            raise ScanCancelled()
+
+    def emit(self, kind: str, data: object) -> None:
+        if self.callback is not None:
+            self.callback(StreamEvent(kind, data))
+
+    def update(self, stage: str, done: int, total: Optional[int] = None, force: bool = False) -> None:
+        """
+        Report progress of a stage (the first call starts its clock).
+        """
+        if self.callback is None:
+            return
+
+        now = time.perf_counter()
+        started = self._started.setdefault(stage, now)
+
+        if not force and now - self._last_sent.get(stage, 0.0) < PROGRESS_INTERVAL_S:
+            return
+
+        self._last_sent[stage] = now
+        self.emit("progress", ScanProgress(stage, done, total, now - started))
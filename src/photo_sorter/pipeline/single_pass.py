@@ -0,0 +1,427 @@
+from __future__ import annotations
+
+import heapq
+import os
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from collections import deque
+from typing import TYPE_CHECKING, Deque, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+from PIL import Image
+
+from photo_sorter.buffers import ImageBuffer, open_buffer
+from photo_sorter.deduplication.hashing import (
+    FILE_HASH_ALGORITHM,
+    compute_file_hash_for_buffer,
+    compute_perceptual_hash_for_image,
+    new_file_hasher,
+)
+from photo_sorter.parallel import imap_ordered, map_ordered, worker_peak_rss_bytes
+from photo_sorter.quality.analysis import (
+    check_decode_scale,
+    compute_blur_score_for_array,
+    compute_brightness_score_for_array,
+    normalize_blur_score,
+)
+from photo_sorter.scanning.filesystem_scanner import PhotoEntry, unpack_photo_entry
+from photo_sorter.scanning.image_analyzer import (
+    _exif_datetime_from_image,
+    exif_datetime_from_bytes,
+)
+from photo_sorter.scanning.models import PhotoInfo
+
+if TYPE_CHECKING:
+    from photo_sorter.pipeline.cache import AnalysisCache
+
+
+# In streaming mode, cache hits are handed out at least this often,
+# even if no file needs to be analysed in between.
+_STREAM_READY_BATCH = 64
+
+# How the step-by-step pipeline touches every photo:
+# EXIF, file hash, pHash, blur and brightness each open the file (5 reads),
+# and pHash, blur and brightness each decode the pixels (3 decodes).
+LEGACY_READS_PER_PHOTO = 5
+LEGACY_DECODES_PER_PHOTO = 3
+
+# Steps of analyze_photo_path timed in SinglePassStats.step_seconds
+ANALYSIS_STEPS = ("read", "file_hash", "exif", "decode", "phash", "quality")
+
+# Number of slowest analysed files kept in SinglePassStats.slowest_files
+SLOWEST_FILES_KEPT = 10
+
+
+@dataclass
+class SinglePassStats:
+    """
+    Counters collected by the single-pass analysis stage.
+
+    step_seconds holds the time spent in each step (ANALYSIS_STEPS) summed
+    over the analysed files, slowest_files the (seconds, path) of the
+    slowest ones, slowest first. Timing costs a few perf_counter() calls
+    per file, negligible next to reading and decoding it.
+    """
+
+    photos: int = 0
+    bytes_read: int = 0
+    reads: int = 0
+    decodes: int = 0
+    decode_failures: int = 0
+    cache_hits: int = 0
+    step_seconds: Dict[str, float] = field(default_factory=dict)
+    slowest_files: List[Tuple[float, str]] = field(default_factory=list)
+    # Largest peak RSS reported by a worker process (None without a process pool)
+    worker_peak_rss_bytes: Optional[int] = None
+
+    def add_step(self, step: str, seconds: float) -> None:
+        self.step_seconds[step] = self.step_seconds.get(step, 0.0) + seconds
+
+    def add_file_time(self, path: Path, seconds: float) -> None:
+        """Remember the time one file took, if it is among the slowest."""
+        self._keep_slowest([(seconds, str(path))])
+
+    def _keep_slowest(self, new: List[Tuple[float, str]]) -> None:
+        if new:
+            self.slowest_files = heapq.nlargest(
+                SLOWEST_FILES_KEPT, self.slowest_files + new
+            )
+
+    def merge(self, other: "SinglePassStats") -> None:
+        """Add counters collected elsewhere (e.g. in a worker process)."""
+        self.photos += other.photos
+        self.bytes_read += other.bytes_read
+        self.reads += other.reads
+        self.decodes += other.decodes
+        self.decode_failures += other.decode_failures
+        self.cache_hits += other.cache_hits
+        for step, seconds in other.step_seconds.items():
+            self.add_step(step, seconds)
+        self._keep_slowest(other.slowest_files)
+        if other.worker_peak_rss_bytes is not None:
+            self.worker_peak_rss_bytes = max(self.worker_peak_rss_bytes or 0, other.worker_peak_rss_bytes)
+
+    @property
+    def reads_saved(self) -> int:
+        """Number of file reads avoided compared to the step-by-step pipeline."""
+        return self.photos * LEGACY_READS_PER_PHOTO - self.reads
+
+    @property
+    def decodes_saved(self) -> int:
+        """Number of image decodes avoided compared to the step-by-step pipeline."""
+        return self.photos * LEGACY_DECODES_PER_PHOTO - self.decodes
+
+    def summary(self) -> str:
+        """
+        Human readable one-line summary (used by debug_scan.py).
+        """
+        return (
+            f"{self.photos} photos, {self.bytes_read} B read, "
+            f"{self.reads} reads ({self.reads_saved} saved), "
+            f"{self.decodes} decodes ({self.decodes_saved} saved), "
+            f"{self.decode_failures} decode failures, "
+            f"{self.cache_hits} cache hits"
+        )
+
+
+def analyze_photo_path(
+    path: Path,
+    stats: Optional[SinglePassStats] = None,
+    stat_result: Optional[os.stat_result] = None,
+    decode_scale: int = 1,
+    file_hash_algorithm: str = FILE_HASH_ALGORITHM,
+) -> PhotoInfo:
+    """
+    Build a fully annotated PhotoInfo with a single read and a single decode.
+
+    The file bytes are read once and feed the file hash (file_hash_algorithm,
+    see FILE_HASH_ALGORITHMS), EXIF and the decoder.
+    The image is decoded once into a grayscale buffer, which is used for
+    pHash, blur score and brightness score.
+
+    decode_scale 2, 4 or 8 decodes JPEGs at 1/decode_scale resolution
+    directly from the DCT coefficients (much less work than a full decode);
+    other formats are decoded fully and then reduced, so all files get
+    comparable metrics. The blur score is normalised back to full resolution
+    (see normalize_blur_score); pHash and brightness barely change.
+
+    Fields that cannot be computed are left as None, exactly like the
+    separate annotate_* functions do. taken_at falls back to mtime.
+    stat_result can be passed when the caller already has it.
+    """
+    if stats is None:
+        stats = SinglePassStats()
+
+    # Get data from filesystem
+    if stat_result is None:
+        stat_result = path.stat()
+
+    started = time.perf_counter()
+    try:
+        data: Optional[bytes] = path.read_bytes()
+    except OSError:
+        # File disappeared or is unreadable - hashes and metrics stay None
+        data = None
+    else:
+        stats.add_step("read", time.perf_counter() - started)
+
+    return analyze_photo_bytes(path, data, stat_result, stats, decode_scale, file_hash_algorithm)
+
+
+def analyze_photo_bytes(
+    path: Path,
+    data: Optional[ImageBuffer],
+    stat_result: os.stat_result,
+    stats: Optional[SinglePassStats] = None,
+    decode_scale: int = 1,
+    file_hash_algorithm: str = FILE_HASH_ALGORITHM,
+) -> PhotoInfo:
+    """
+    The CPU part of analyze_photo_path, for file contents read elsewhere
+    (e.g. prefetched by pipeline.prefetch) - bytes, a memoryview or an mmap,
+    read in place by hashing, EXIF and the decoder. data None means the file
+    could not be read - the PhotoInfo then only has the filesystem fields.
+    """
+    if stats is None:
+        stats = SinglePassStats()
+
+    fs_mtime = datetime.fromtimestamp(stat_result.st_mtime)
+
+    photo = PhotoInfo(
+        path=path,
+        file_name=path.name,
+        size_bytes=stat_result.st_size,
+        taken_at=fs_mtime,
+    )
+    stats.photos += 1
+
+    if data is None:
+        return photo
+
+    stats.reads += 1
+    stats.bytes_read += len(data)
+
+    now = time.perf_counter
+    read_done = now()
+
+    photo.file_hash = compute_file_hash_for_buffer(data, file_hash_algorithm)
+    hash_done = now()
+    stats.add_step("file_hash", hash_done - read_done)
+
+    try:
+        with open_buffer(data) as f, Image.open(f) as img:
+            # EXIF straight from the header bytes (no tag table mapping);
+            # Pillow's parser only for formats other than JPEG/PNG
+            try:
+                exif_dt = exif_datetime_from_bytes(data)
+            except ValueError:
+                exif_dt = _exif_datetime_from_image(img)
+            if exif_dt:
+                photo.taken_at = exif_dt
+            exif_done = now()
+            stats.add_step("exif", exif_done - hash_done)
+
+            full_width = img.width
+            photo.width, photo.height = img.size
+            if decode_scale > 1:
+                # JPEG only - for other formats draft() is a no-op
+                img.draft("L", (img.width // decode_scale, img.height // decode_scale))
+
+            # The one and only decode: straight to grayscale
+            stats.decodes += 1
+            gray = img.convert("L")
+
+            if decode_scale > 1 and gray.width == full_width:
+                gray = gray.reduce(decode_scale)
+    except Exception:
+        # Error reading file / format - metrics stay None
+        stats.decode_failures += 1
+        return photo
+    decode_done = now()
+    stats.add_step("decode", decode_done - exif_done)
+
+    photo.perceptual_hash = compute_perceptual_hash_for_image(gray)
+    phash_done = now()
+    stats.add_step("phash", phash_done - decode_done)
+
+    # np.asarray shares the buffer of the PIL image, no extra copy
+    gray_array = np.asarray(gray)
+    # Decoded size is rounded up, so measure the scale that was actually applied
+    effective_scale = full_width / gray.width if decode_scale > 1 else 1
+    photo.blur_score = normalize_blur_score(
+        compute_blur_score_for_array(gray_array), effective_scale
+    )
+    photo.brightness_score = compute_brightness_score_for_array(gray_array)
+    stats.add_step("quality", now() - phash_done)
+
+    return photo
+
+
+# (path, stat result or None, decode_scale, file_hash_algorithm)
+_AnalysisTask = Tuple[Path, Optional[os.stat_result], int, str]
+
+
+def _analyze_photo_task(task: _AnalysisTask) -> Tuple[PhotoInfo, SinglePassStats]:
+    """
+    Unit of work for worker processes: analyse one photo and return
+    its own counters, which are merged in the parent process.
+    """
+    path, stat_result, decode_scale, file_hash_algorithm = task
+    stats = SinglePassStats()
+    started = time.perf_counter()
+    photo = analyze_photo_path(path, stats, stat_result, decode_scale, file_hash_algorithm)
+    stats.add_file_time(path, time.perf_counter() - started)
+    stats.worker_peak_rss_bytes = worker_peak_rss_bytes()
+    return photo, stats
+
+
+def analyze_photo_paths(
+    paths: Iterable[Union[Path, PhotoEntry]],
+    stats: Optional[SinglePassStats] = None,
+    cache: Optional[AnalysisCache] = None,
+    workers: Optional[int] = 1,
+    decode_scale: int = 1,
+    file_hash_algorithm: str = FILE_HASH_ALGORITHM,
+) -> List[PhotoInfo]:
+    """
+    Single-pass replacement for build_photo_infos followed by
+    annotate_photos_with_file_hash, annotate_photos_with_perceptual_hash
+    and annotate_photos_with_quality.
+
+    paths may also be PhotoEntry items from the walker, whose stat result
+    is reused instead of calling stat() again.
+
+    With a cache, files unchanged since the last scan (same path, size,
+    mtime and inode) are taken from it without reading or decoding them.
+    workers > 1 analyses the remaining files in a process pool
+    (None = one per CPU core); the result keeps the order of paths.
+
+    decode_scale and file_hash_algorithm are passed on to analyze_photo_path.
+    The cache should be opened for the same values
+    (open_cache(..., decode_scale, file_hash_algorithm)).
+    """
+    check_decode_scale(decode_scale)
+    new_file_hasher(file_hash_algorithm)  # unknown algorithm -> ValueError up front
+    if stats is None:
+        stats = SinglePassStats()
+
+    # Slots for the result, in input order. Cache hits are filled right away,
+    # everything else becomes a task.
+    photos: List[Optional[PhotoInfo]] = []
+    tasks: List[_AnalysisTask] = []
+    task_slots: List[int] = []
+
+    for item in paths:
+        path, stat_result = unpack_photo_entry(item)
+
+        if cache is not None:
+            if stat_result is None:
+                stat_result = path.stat()
+            cached = cache.get(path, stat_result)
+            if cached is not None:
+                stats.photos += 1
+                stats.cache_hits += 1
+                photos.append(cached)
+                continue
+
+        task_slots.append(len(photos))
+        tasks.append((path, stat_result, decode_scale, file_hash_algorithm))
+        photos.append(None)
+
+    results = map_ordered(_analyze_photo_task, tasks, workers)
+
+    for slot, (path, stat_result, _, _), (photo, task_stats) in zip(task_slots, tasks, results):
+        photos[slot] = photo
+        stats.merge(task_stats)
+
+        # Don't remember read errors - they may be temporary
+        if cache is not None and stat_result is not None and photo.file_hash is not None:
+            cache.put(photo, stat_result)
+
+    if cache is not None:
+        cache.flush()
+
+    return photos  # type: ignore[return-value]  # every slot is filled above
+
+
+def _analyze_photo_task_or_none(
+    task: Optional[_AnalysisTask],
+) -> Optional[Tuple[PhotoInfo, SinglePassStats, Optional[os.stat_result]]]:
+    """
+    Streaming variant of _analyze_photo_task. None is a "no work" marker that
+    lets the consumer hand out cache hits collected in the meantime.
+    """
+    if task is None:
+        return None
+
+    photo, stats = _analyze_photo_task(task)
+    return photo, stats, task[1]
+
+
+def iter_analyzed_photos(
+    paths: Iterable[Union[Path, PhotoEntry]],
+    stats: Optional[SinglePassStats] = None,
+    cache: Optional[AnalysisCache] = None,
+    workers: Optional[int] = 1,
+    max_in_flight: Optional[int] = None,
+    decode_scale: int = 1,
+    file_hash_algorithm: str = FILE_HASH_ALGORITHM,
+) -> Iterator[PhotoInfo]:
+    """
+    Streaming counterpart of analyze_photo_paths.
+
+    paths is consumed lazily, so analysis starts while the directory walk is
+    still running, and at most max_in_flight photos are being analysed at a
+    time. Photos are yielded as soon as they are ready; cache hits may come
+    out of order relative to analysed photos.
+    """
+    check_decode_scale(decode_scale)
+    new_file_hasher(file_hash_algorithm)
+    if stats is None:
+        stats = SinglePassStats()
+
+    ready: Deque[PhotoInfo] = deque()
+
+    def tasks() -> Iterator[Optional[_AnalysisTask]]:
+        for item in paths:
+            path, stat_result = unpack_photo_entry(item)
+
+            if cache is not None:
+                if stat_result is None:
+                    stat_result = path.stat()
+                cached = cache.get(path, stat_result)
+                if cached is not None:
+                    stats.photos += 1
+                    stats.cache_hits += 1
+                    ready.append(cached)
+                    if len(ready) >= _STREAM_READY_BATCH:
+                        yield None
+                    continue
+
+            yield path, stat_result, decode_scale, file_hash_algorithm
+
+    results = imap_ordered(_analyze_photo_task_or_none, tasks(), workers, max_in_flight)
+
+    for result in results:
+        while ready:
+            yield ready.popleft()
+
+        if result is None:
+            continue
+
+        photo, task_stats, stat_result = result
+        stats.merge(task_stats)
+
+        # Don't remember read errors - they may be temporary
+        if cache is not None and stat_result is not None and photo.file_hash is not None:
+            cache.put(photo, stat_result)
+
+        yield photo
+
+    while ready:
+        yield ready.popleft()
+
+    if cache is not None:
+        cache.flush()
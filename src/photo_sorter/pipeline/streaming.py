@@ -0,0 +1,293 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+from photo_sorter.deduplication.clusters import (
+    CLUSTER_MODES,
+    choose_best_photo,
+    find_near_duplicate_clusters,
+)
+from photo_sorter.deduplication.grouping import (
+    NEAR_DUPLICATE_METHODS,
+    find_exact_duplicate_groups,
+    find_near_duplicate_groups,
+)
+from photo_sorter.deduplication.hashing import FILE_HASH_ALGORITHM
+from photo_sorter.deduplication.incremental import (
+    IncrementalExactGrouper,
+    IncrementalNearGrouper,
+)
+from photo_sorter.pipeline.cache import open_cache
+from photo_sorter.pipeline.prefetch import DEFAULT_MAX_BUFFERED_BYTES, iter_prefetched_photos
+from photo_sorter.pipeline.profiling import (
+    NULL_PROFILER,
+    STAGE_EXACT_GROUPS,
+    STAGE_NEAR_GROUPS,
+    STAGE_TRASH,
+    NullProfiler,
+    PipelineProfiler,
+)
+from photo_sorter.pipeline.single_pass import SinglePassStats, iter_analyzed_photos
+from photo_sorter.quality.analysis import (
+    DEFAULT_BLUR_THRESHOLD,
+    DEFAULT_BRIGHTNESS_TOO_BRIGHT,
+    DEFAULT_BRIGHTNESS_TOO_DARK,
+    find_potential_trash_photos,
+)
+from photo_sorter.scanning.filesystem_scanner import (
+    TRASH_PREVIEW_DIR_NAME,
+    iter_photo_entries,
+)
+from photo_sorter.scanning.models import PhotoInfo
+from photo_sorter.scanning.sorting import sort_photos_by_taken_date
+
+
+@dataclass
+class StreamEvent:
+    """
+    One event of the streaming pipeline.
+
+    kind / data:
+     - "photo": PhotoInfo - a photo was fully analysed,
+     - "trash": PhotoInfo - the photo was classified as potential trash,
+     - "exact_group": ExactGroupUpdate - an exact duplicate group was created or grew,
+     - "near_groups": list[list[PhotoInfo]] - final near duplicate groups,
+     - "done": SinglePassStats - the stream is complete.
+    """
+
+    kind: str
+    data: Any
+
+
+@dataclass
+class ExactGroupUpdate:
+    """
+    Payload of "exact_group" events. group_id is stable for a given hash,
+    photos is the complete group so far (at least 2 photos).
+    """
+
+    group_id: int
+    file_hash: str
+    photos: List[PhotoInfo]
+
+
+def stream_backend_pipeline(
+    root_folder: Path,
+    use_cache: bool = True,
+    cache_path: Optional[Path] = None,
+    workers: Optional[int] = 1,
+    max_in_flight: Optional[int] = None,
+    max_distance: int = 5,
+    scan_threads: int = 1,
+    decode_scale: int = 1,
+    blur_threshold: float = DEFAULT_BLUR_THRESHOLD,
+    brightness_too_dark: float = DEFAULT_BRIGHTNESS_TOO_DARK,
+    brightness_too_bright: float = DEFAULT_BRIGHTNESS_TOO_BRIGHT,
+    profiler: Union[PipelineProfiler, NullProfiler, None] = None,
+    file_hash_algorithm: str = FILE_HASH_ALGORITHM,
+    read_ahead: int = 0,
+    max_buffered_bytes: int = DEFAULT_MAX_BUFFERED_BYTES,
+    near_method: str = "index",
+    near_mode: str = "components",
+    near_max_diameter: Optional[int] = None,
+) -> Iterator[StreamEvent]:
+    """
+    Streaming version of the backend pipeline.
+
+    Discovery, analysis and grouping are chained generators: the directory
+    walk feeds the single-pass analysis (EXIF, hashes, quality) lazily,
+    at most max_in_flight photos are in the analysis stage at a time, and
+    exact/near duplicate grouping consumes analysed photos one by one.
+    Decoded image data never accumulates - only the small PhotoInfo records
+    needed for grouping are kept.
+
+    The walk skips trash_preview/ and hands each file's stat result on,
+    so files are not stat'ed twice. scan_threads > 1 lists sibling
+    directories in parallel (helps on network shares). decode_scale > 1
+    analyses JPEGs from a reduced-resolution decode (see analyze_photo_path).
+    file_hash_algorithm picks the hash behind exact groups (FILE_HASH_ALGORITHMS).
+    read_ahead > 0 reads that many files ahead of the decoders, holding at
+    most max_buffered_bytes (see iter_prefetched_photos) - max_in_flight
+    is then unused.
+
+    Trash classification (with the given thresholds, see
+    find_potential_trash_photos) and exact groups are reported as soon as
+    they are known; near-duplicate groups are final only at the end of the stream.
+    With near_method "index" they are built incrementally while photos
+    arrive; "numpy" and "lsh" (approximate, for libraries of millions, see
+    find_near_duplicate_groups) group all photos at the end, and so does
+    a near_mode other than "components" (see find_near_duplicate_clusters;
+    near_max_diameter caps the groups of "diameter" mode).
+
+    A PipelineProfiler records the self time of each stage: walking,
+    analysing (without the walk feeding it), grouping and classification.
+    """
+    # Imported here - progress imports this module (StreamEvent)
+    from photo_sorter.pipeline.progress import STAGE_ANALYSE, STAGE_DISCOVER
+
+    if profiler is None:
+        profiler = NULL_PROFILER
+
+    if near_method not in NEAR_DUPLICATE_METHODS:
+        raise ValueError(f"Unknown near_method {near_method!r}, expected one of {NEAR_DUPLICATE_METHODS}")
+    if near_mode not in CLUSTER_MODES:
+        raise ValueError(f"Unknown near_mode {near_mode!r}, expected one of {CLUSTER_MODES}")
+    incremental = near_method == "index" and near_mode == "components"
+
+    exact_grouper = IncrementalExactGrouper()
+    near_grouper = IncrementalNearGrouper(max_distance=max_distance) if incremental else None
+    hashed_photos: List[PhotoInfo] = []  # for the other methods, grouped at the end
+    group_ids: Dict[str, int] = {}
+    stats = SinglePassStats()
+
+    cache = open_cache(cache_path, decode_scale, file_hash_algorithm) if use_cache else None
+
+    try:
+        entries = iter_photo_entries(
+            root_folder,
+            exclude_dirs=(TRASH_PREVIEW_DIR_NAME,),
+            threads=scan_threads,
+        )
+        if read_ahead:
+            photos = iter_prefetched_photos(
+                profiler.timed_iter(STAGE_DISCOVER, entries),
+                stats,
+                cache,
+                workers,
+                read_ahead,
+                max_buffered_bytes,
+                decode_scale,
+                file_hash_algorithm,
+            )
+        else:
+            photos = iter_analyzed_photos(
+                profiler.timed_iter(STAGE_DISCOVER, entries),
+                stats,
+                cache,
+                workers,
+                max_in_flight,
+                decode_scale,
+                file_hash_algorithm,
+            )
+
+        # Profiled blocks never contain a yield - the consumer's time isn't ours
+        for photo in profiler.timed_iter(STAGE_ANALYSE, photos):
+            # Classify first, so "photo" events carry is_potential_trash
+            with profiler.stage(STAGE_TRASH) as stage:
+                is_trash = bool(
+                    find_potential_trash_photos(
+                        [photo], blur_threshold, brightness_too_dark, brightness_too_bright
+                    )
+                )
+                stage.add(items=1)
+            yield StreamEvent("photo", photo)
+
+            if is_trash:
+                yield StreamEvent("trash", photo)
+
+            with profiler.stage(STAGE_EXACT_GROUPS) as stage:
+                group = exact_grouper.add(photo)
+                stage.add(items=1)
+            if group is not None:
+                assert photo.file_hash is not None
+                group_id = group_ids.setdefault(photo.file_hash, len(group_ids))
+                yield StreamEvent(
+                    "exact_group",
+                    ExactGroupUpdate(group_id, photo.file_hash, group),
+                )
+
+            with profiler.stage(STAGE_NEAR_GROUPS) as stage:
+                if near_grouper is not None:
+                    near_grouper.add(photo)
+                elif photo.perceptual_hash:
+                    hashed_photos.append(photo)
+                stage.add(items=1)
+    finally:
+        if cache is not None:
+            cache.close()
+
+    with profiler.stage(STAGE_NEAR_GROUPS):
+        if near_grouper is not None:
+            near_groups = near_grouper.groups()
+        elif near_mode == "components":
+            near_groups = find_near_duplicate_groups(hashed_photos, max_distance, near_method)
+        else:
+            clusters = find_near_duplicate_clusters(
+                hashed_photos, max_distance, near_mode, near_max_diameter, near_method
+            )
+            near_groups = [cluster.photos for cluster in clusters]
+    with profiler.stage(STAGE_ANALYSE) as stage:
+        stage.add(bytes_read=stats.bytes_read)
+    profiler.add_analysis_stats(stats)
+
+    yield StreamEvent("near_groups", near_groups)
+    yield StreamEvent("done", stats)
+
+
+def run_streaming_pipeline(
+    root_folder: Path,
+    use_cache: bool = True,
+    cache_path: Optional[Path] = None,
+    workers: Optional[int] = 1,
+    max_in_flight: Optional[int] = None,
+    max_distance: int = 5,
+    scan_threads: int = 1,
+    decode_scale: int = 1,
+    blur_threshold: float = DEFAULT_BLUR_THRESHOLD,
+    brightness_too_dark: float = DEFAULT_BRIGHTNESS_TOO_DARK,
+    brightness_too_bright: float = DEFAULT_BRIGHTNESS_TOO_BRIGHT,
+    file_hash_algorithm: str = FILE_HASH_ALGORITHM,
+    read_ahead: int = 0,
+    max_buffered_bytes: int = DEFAULT_MAX_BUFFERED_BYTES,
+    near_method: str = "index",
+    near_mode: str = "components",
+    near_max_diameter: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Run stream_backend_pipeline to completion and return the same summary
+    dict as run_backend_pipeline. The near duplicate groups are the same,
+    but their members come in analysis order.
+    """
+    photos: List[PhotoInfo] = []
+    near_groups: List[List[PhotoInfo]] = []
+    analysis_stats = SinglePassStats()
+
+    for event in stream_backend_pipeline(
+        root_folder,
+        use_cache=use_cache,
+        cache_path=cache_path,
+        workers=workers,
+        max_in_flight=max_in_flight,
+        max_distance=max_distance,
+        scan_threads=scan_threads,
+        decode_scale=decode_scale,
+        blur_threshold=blur_threshold,
+        brightness_too_dark=brightness_too_dark,
+        brightness_too_bright=brightness_too_bright,
+        file_hash_algorithm=file_hash_algorithm,
+        read_ahead=read_ahead,
+        max_buffered_bytes=max_buffered_bytes,
+        near_method=near_method,
+        near_mode=near_mode,
+        near_max_diameter=near_max_diameter,
+    ):
+        if event.kind == "photo":
+            photos.append(event.data)
+        elif event.kind == "near_groups":
+            near_groups = event.data
+        elif event.kind == "done":
+            analysis_stats = event.data
+
+    photos = sort_photos_by_taken_date(photos)
+
+    return {
+        "photos": photos,
+        # Regrouped over the sorted list to get the same order as run_backend_pipeline
+        "exact_groups": find_exact_duplicate_groups(photos),
+        "near_groups": near_groups,
+        "near_group_best": [choose_best_photo(group) for group in near_groups],
+        "potential_trash": [p for p in photos if p.is_potential_trash],
+        "analysis_stats": analysis_stats,
+    }
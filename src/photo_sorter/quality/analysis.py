@@ -1,31 +1,162 @@
 from __future__ import annotations
 
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Tuple
 
 import cv2  # OpenCV library for image processing
 import numpy as np  # used for variance calculation
 
+from photo_sorter.buffers import ImageBuffer, buffer_as_array
+from photo_sorter.parallel import map_ordered
 from photo_sorter.scanning.models import PhotoInfo  # our model from Stage 2/3
+from photo_sorter.scanning.photo_table import PhotoRow, PhotoTable
 
-def compute_blur_score_for_path(image_path: Path) -> Optional[float]:
+# Version of the blur/brightness metrics - bump it whenever the formulas change,
+# so persisted results (analysis cache) computed with the old ones are invalidated.
+QUALITY_METRICS_VERSION = "laplacian-var-1+mean-gray-1"
+
+# Default trash classification thresholds (find_potential_trash_photos)
+DEFAULT_BLUR_THRESHOLD = 100.0
+DEFAULT_BRIGHTNESS_TOO_DARK = 40.0
+DEFAULT_BRIGHTNESS_TOO_BRIGHT = 210.0
+
+# Reduced-resolution decode: 1 = full resolution, 2/4/8 = 1/2, 1/4, 1/8 of the
+# width and height. JPEG decoders produce these directly from the DCT
+# coefficients, which is several times faster than a full decode.
+DECODE_SCALES = (1, 2, 4, 8)
+
+# OpenCV imread/imdecode flags for each decode scale
+_CV2_GRAYSCALE_FLAGS = {
+    1: cv2.IMREAD_GRAYSCALE,
+    2: cv2.IMREAD_REDUCED_GRAYSCALE_2,
+    4: cv2.IMREAD_REDUCED_GRAYSCALE_4,
+    8: cv2.IMREAD_REDUCED_GRAYSCALE_8,
+}
+
+# Reduced blur score / full-resolution blur score for each decode scale.
+# The variance of the Laplacian does not follow a power of the scale: fine
+# detail and noise average out, so sharp photos lose most of it, while
+# blurry ones gain (their edges get steeper per pixel). What has to survive
+# is the verdict at the blur threshold, so each factor is the geometric
+# middle of the factors that keep the most trash verdicts of a full decode
+# at DEFAULT_BLUR_THRESHOLD - measured on benchmarks.corpus (seeds 0 and 1,
+# 580 photos): all verdicts kept at 1/2 and 1/4, 578 of 580 at 1/8. Refit
+# for your library with calibrate_blur_scale_factor().
+BLUR_SCALE_FACTORS = {1: 1.0, 2: 0.73, 4: 0.56, 8: 0.75}
+
+# Bump when BLUR_SCALE_FACTORS change - reduced-decode blur scores in the
+# analysis cache are then recomputed.
+BLUR_SCALE_FACTORS_VERSION = "factors-1"
+
+
+def check_decode_scale(decode_scale: int) -> None:
+    """
+    Raise ValueError for decode scales the decoders don't support.
+    """
+    if decode_scale not in DECODE_SCALES:
+        raise ValueError(f"decode_scale must be one of {DECODE_SCALES}, got {decode_scale}")
+
+
+def quality_metrics_version(decode_scale: int = 1) -> str:
+    """
+    Identifier of the quality metrics computed at the given decode scale
+    (reduced decodes give slightly different values, so they're cached apart).
+    """
+    if decode_scale == 1:
+        return QUALITY_METRICS_VERSION
+    return f"{QUALITY_METRICS_VERSION}@1/{decode_scale}+{BLUR_SCALE_FACTORS_VERSION}"
+
+
+def blur_scale_factor(scale: float) -> float:
+    """
+    BLUR_SCALE_FACTORS for any downscale factor >= 1 (e.g. a decode rounded
+    to 1.98, or a resize to a working size): interpolated linearly in
+    log-log space between the measured scales, constant beyond 8.
+    """
+    scales = sorted(BLUR_SCALE_FACTORS)
+    if scale <= scales[0]:
+        return BLUR_SCALE_FACTORS[scales[0]]
+    if scale >= scales[-1]:
+        return BLUR_SCALE_FACTORS[scales[-1]]
+    log_factors = [np.log(BLUR_SCALE_FACTORS[k]) for k in scales]
+    return float(np.exp(np.interp(np.log(scale), np.log(scales), log_factors)))
+
+
+def normalize_blur_score(raw_score: float, scale: float) -> float:
+    """
+    Convert a blur score measured on an image downscaled by `scale` into the
+    full-resolution equivalent (scale 1 returns the score unchanged).
+    """
+    if scale == 1:
+        return raw_score
+    return raw_score / blur_scale_factor(scale)
+
+
+def _decode_grayscale(data: ImageBuffer, decode_scale: int = 1) -> Optional[np.ndarray]:
+    # Decode the file contents as grayscale
+    # This gives us one "brightness" value per pixel instead of 3 channels (RGB/BGR)
+    # imdecode reads the buffer in place (np.frombuffer shares its memory)
+    check_decode_scale(decode_scale)
+    if len(data) == 0:
+        return None
+    return cv2.imdecode(buffer_as_array(data), _CV2_GRAYSCALE_FLAGS[decode_scale])
+
+
+def _read_grayscale(image_path: Path, decode_scale: int = 1) -> Optional[np.ndarray]:
+    # imdecode of the file's bytes is the same decoder (and pixels) as cv2.imread,
+    # and works with non-ASCII paths on Windows too
+    check_decode_scale(decode_scale)
+    try:
+        data = image_path.read_bytes()
+    except OSError:
+        return None
+    return _decode_grayscale(data, decode_scale)
+
+
+def compute_blur_score_for_path(image_path: Path, decode_scale: int = 1) -> Optional[float]:
     """
     Compute a simple blur score for a single image file using the variance
     of the Laplacian (classic OpenCV sharpness metric).
 
     :param image_path: Path to an image file on disk.
+    :param decode_scale: Decode at 1/decode_scale resolution (1, 2, 4 or 8);
+                         the score is normalised back to full resolution.
     :return: Blur score (higher = sharper, lower = more blurred), or None if
              the image could not be read.
     """
-    # Load image as grayscale
-    # This gives us one "brightness" value per pixel instead of 3 channels (RGB/BGR)
-    img = cv2.imread(str(image_path), cv2.IMREAD_GRAYSCALE)
+    img = _read_grayscale(image_path, decode_scale)
 
     if img is None:
         # If OpenCV couldn't load the file (e.g. corrupted / no permissions),
         # return None - higher level code can handle it.
         return None
 
+    return normalize_blur_score(compute_blur_score_for_array(img), decode_scale)
+
+def compute_blur_score_for_buffer(data: ImageBuffer, decode_scale: int = 1) -> Optional[float]:
+    """
+    compute_blur_score_for_path for the contents of an image file already
+    in memory.
+
+    :param data: Encoded image (bytes, memoryview or mmap - decoded in place).
+    :param decode_scale: Decode at 1/decode_scale resolution (1, 2, 4 or 8).
+    :return: Blur score, or None if the image could not be decoded.
+    """
+    img = _decode_grayscale(data, decode_scale)
+
+    if img is None:
+        return None
+
+    return normalize_blur_score(compute_blur_score_for_array(img), decode_scale)
+
+def compute_blur_score_for_array(img: np.ndarray) -> float:
+    """
+    Compute the blur score (variance of the Laplacian) for an already
+    decoded grayscale image.
+
+    :param img: 2D uint8 array with grayscale pixel values.
+    :return: Blur score (higher = sharper, lower = more blurred).
+    """
     # Compute Laplacian (detects brightness changes, i.e. "edges")
     # Sharp image -> many edges -> high Laplacian variance
     # Blurry image -> few edges -> low Laplacian variance
@@ -36,22 +167,72 @@ def compute_blur_score_for_path(image_path: Path) -> Optional[float]:
 
     return variance
 
-def compute_brightness_score_for_path(image_path: Path) -> Optional[float]:
+def compute_brightness_score_for_path(image_path: Path, decode_scale: int = 1) -> Optional[float]:
     """
     Compute a brightness score (mean pixel intensity) for a single image file.
 
     :param image_path: Path to an image file on disk.
+    :param decode_scale: Decode at 1/decode_scale resolution (1, 2, 4 or 8).
+                         The mean barely changes with the scale.
     :return: Brightness score (0-255), or None if the file could not be read.
     """
-    img = cv2.imread(str(image_path), cv2.IMREAD_GRAYSCALE)
+    img = _read_grayscale(image_path, decode_scale)
 
     if img is None:
         return None
 
+    return compute_brightness_score_for_array(img)
+
+def compute_brightness_score_for_buffer(data: ImageBuffer, decode_scale: int = 1) -> Optional[float]:
+    """
+    compute_brightness_score_for_path for the contents of an image file
+    already in memory.
+
+    :param data: Encoded image (bytes, memoryview or mmap - decoded in place).
+    :param decode_scale: Decode at 1/decode_scale resolution (1, 2, 4 or 8).
+    :return: Brightness score (0-255), or None if the image could not be decoded.
+    """
+    img = _decode_grayscale(data, decode_scale)
+
+    if img is None:
+        return None
+
+    return compute_brightness_score_for_array(img)
+
+def compute_brightness_score_for_array(img: np.ndarray) -> float:
+    """
+    Compute the brightness score (mean pixel intensity) for an already
+    decoded grayscale image.
+
+    :param img: 2D uint8 array with grayscale pixel values.
+    :return: Brightness score (0-255).
+    """
     brightness = float(np.mean(img))
     return brightness
 
-def annotate_photos_with_quality(photos: list[PhotoInfo]) -> None:
+def _compute_quality_scores(
+    task: Tuple[Path, int],
+) -> Tuple[Optional[float], Optional[float]]:
+    """
+    Compute (blur_score, brightness_score) for one file - the unit of work
+    sent to worker processes by annotate_photos_with_quality.
+    """
+    image_path, decode_scale = task
+
+    # One decode for both metrics
+    img = _read_grayscale(image_path, decode_scale)
+    if img is None:
+        return None, None
+
+    blur = normalize_blur_score(compute_blur_score_for_array(img), decode_scale)
+    brightness = compute_brightness_score_for_array(img)
+    return blur, brightness
+
+def annotate_photos_with_quality(
+    photos: list[PhotoInfo],
+    workers: Optional[int] = 1,
+    decode_scale: int = 1,
+) -> None:
     """
     Annotate a list of PhotoInfo objects with basic quality metrics:
     - blur_score (variance of Laplacian)
@@ -61,12 +242,15 @@ def annotate_photos_with_quality(photos: list[PhotoInfo]) -> None:
 
     :param photos: List of PhotoInfo objects created by the scanning module
                    (e.g. build_photo_infos(...) used in debug_scan.py).
+    :param workers: Number of worker processes (1 = sequential in this
+                    process, None = one per CPU core).
+    :param decode_scale: Decode at 1/decode_scale resolution (1, 2, 4 or 8).
     """
-    for photo in photos:
-        # Use existing metrics based on file path
-        blur = compute_blur_score_for_path(photo.path)
-        brightness = compute_brightness_score_for_path(photo.path)
+    check_decode_scale(decode_scale)
+    tasks = [(p.path, decode_scale) for p in photos]
+    scores = map_ordered(_compute_quality_scores, tasks, workers)
 
+    for photo, (blur, brightness) in zip(photos, scores):
         photo.blur_score = blur
         photo.brightness_score = brightness
 
@@ -76,9 +260,9 @@ def annotate_photos_with_quality(photos: list[PhotoInfo]) -> None:
 
 def find_potential_trash_photos(
     photos: list[PhotoInfo],
-    blur_threshold: float = 100.0,
-    brightness_too_dark: float = 40.0,
-    brightness_too_bright: float = 210.0,
+    blur_threshold: float = DEFAULT_BLUR_THRESHOLD,
+    brightness_too_dark: float = DEFAULT_BRIGHTNESS_TOO_DARK,
+    brightness_too_bright: float = DEFAULT_BRIGHTNESS_TOO_BRIGHT,
 ) -> list[PhotoInfo]:
     """
     Mark photos as potential trash based on blur and brightness criteria.
@@ -87,7 +271,13 @@ def find_potential_trash_photos(
     computed by annotate_photos_with_quality().
 
     Returns a list of photos classified as potential trash.
+    A PhotoTable is classified with array operations on its score columns.
     """
+    if isinstance(photos, PhotoTable):
+        return _find_potential_trash_in_table(
+            photos, blur_threshold, brightness_too_dark, brightness_too_bright
+        )
+
     trash_list = []
 
     for photo in photos:
@@ -110,4 +300,71 @@ def find_potential_trash_photos(
         else:
             photo.is_potential_trash = False
 
-    return trash_list
\ No newline at end of file
+    return trash_list
+
+def _find_potential_trash_in_table(
+    table: PhotoTable,
+    blur_threshold: float,
+    brightness_too_dark: float,
+    brightness_too_bright: float,
+) -> list[PhotoRow]:
+    blur = table.column("blur_score")
+    brightness = table.column("brightness_score")
+
+    # NaN = missing score -> "uncertain" (-1), like None above
+    known = ~(np.isnan(blur) | np.isnan(brightness))
+    trash = known & (
+        (blur < blur_threshold)
+        | (brightness < brightness_too_dark)
+        | (brightness > brightness_too_bright)
+    )
+
+    flags = table.column("is_potential_trash")
+    flags[:] = np.where(known, trash, -1)
+    return [PhotoRow(table, i) for i in np.flatnonzero(trash).tolist()]
+
+def calibrate_blur_scale_factor(
+    image_paths: list[Path],
+    decode_scale: int,
+    blur_threshold: float = DEFAULT_BLUR_THRESHOLD,
+) -> Optional[float]:
+    """
+    Fit BLUR_SCALE_FACTORS[decode_scale] for a sample of your own photos:
+    decode each at full and at 1/decode_scale resolution and return the
+    geometric middle of the factors that keep the most blur verdicts
+    (score < blur_threshold) of the full decode. None if no image could be used.
+    """
+    check_decode_scale(decode_scale)
+    if decode_scale == 1:
+        raise ValueError("Calibration needs a reduced decode_scale (2, 4 or 8)")
+
+    full_scores = []
+    reduced_scores = []
+
+    for image_path in image_paths:
+        full_img = _read_grayscale(image_path, 1)
+        reduced_img = _read_grayscale(image_path, decode_scale)
+        if full_img is None or reduced_img is None:
+            continue
+        full_scores.append(compute_blur_score_for_array(full_img))
+        reduced_scores.append(compute_blur_score_for_array(reduced_img))
+
+    if not full_scores:
+        return None
+
+    blurry = np.array(full_scores) < blur_threshold
+    reduced = np.array(reduced_scores)
+    # A verdict flips where reduced / factor crosses the threshold, so only
+    # the factors reduced / threshold can change the count of kept verdicts
+    candidates = np.unique(np.concatenate([reduced / blur_threshold, [1.0]]))
+    candidates = candidates[candidates > 0]
+    if len(candidates) == 0:
+        return None
+    # One probe inside every interval between neighbouring candidates
+    lower = np.concatenate([[candidates[0] / 2], candidates])
+    upper = np.concatenate([candidates, [candidates[-1] * 2]])
+    kept = np.array(
+        [np.sum((reduced / f < blur_threshold) == blurry) for f in np.sqrt(lower * upper)]
+    )
+    best = np.flatnonzero(kept == kept.max())
+    return float(np.sqrt(lower[best[0]] * upper[best[-1]]))
@@ -0,0 +1,292 @@
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+from photo_sorter.parallel import imap_ordered
+from photo_sorter.quality.analysis import (
+    _read_grayscale,
+    blur_scale_factor,
+    check_decode_scale,
+)
+from photo_sorter.scanning.models import PhotoInfo
+from photo_sorter.scanning.photo_table import PhotoTable
+
+# Common working resolution (width, height): every image is shrunk to fit
+# inside it (aspect ratio kept, never enlarged), so a batch is one
+# (n, height, width) array. Portrait images are transposed first (Laplacian
+# variance and mean are the same for the transposed image).
+DEFAULT_WORKING_SIZE = (640, 480)
+
+# Images scored together: one cv2.Laplacian call per batch, which OpenCV
+# can split across its threads. The 8-bit pixels and int16 Laplacian of a
+# batch of 32 take ~30 MB. On one core, 256 working images took
+# 0.20 s at every batch size from 1 to 64, vs 0.56 s for the float32 NumPy
+# kernel this replaced and 0.81 s for cv2.Laplacian + np.var per image.
+DEFAULT_BATCH_SIZE = 32
+
+# Grey levels at or below / at or above which a pixel counts as clipped
+SHADOW_CLIP_LEVEL = 5
+HIGHLIGHT_CLIP_LEVEL = 250
+
+
+@dataclass
+class BatchQualityScores:
+    """
+    Per-image results of the batched quality engine, in input order.
+    NaN marks images that could not be decoded.
+    """
+
+    blur_score: np.ndarray  # full-resolution equivalent, like compute_blur_score_for_path
+    brightness_score: np.ndarray  # mean grey level (0-255)
+    shadow_clip_fraction: np.ndarray  # share of pixels <= SHADOW_CLIP_LEVEL
+    highlight_clip_fraction: np.ndarray  # share of pixels >= HIGHLIGHT_CLIP_LEVEL
+
+    @classmethod
+    def empty(cls, count: int) -> "BatchQualityScores":
+        return cls(*(np.full(count, np.nan) for _ in range(4)))
+
+
+def prepare_working_image(
+    img: np.ndarray,
+    decode_scale: int = 1,
+    working_size: Tuple[int, int] = DEFAULT_WORKING_SIZE,
+) -> Tuple[np.ndarray, float]:
+    """
+    Fit a decoded grayscale image into the working resolution.
+
+    :param img: 2D uint8 array as decoded at 1/decode_scale resolution.
+    :param decode_scale: The reduced-decode scale the image was decoded with.
+    :param working_size: (width, height) the result fits in.
+    :return: (landscape working image, its downscale factor relative to the
+             full resolution - the scale the blur score is normalised with).
+    """
+    if img.shape[0] > img.shape[1]:
+        img = img.T
+
+    height, width = img.shape
+    max_width, max_height = working_size
+    shrink = max(width / max_width, height / max_height)
+    if shrink <= 1:
+        return img, float(decode_scale)
+
+    size = (min(max_width, round(width / shrink)), min(max_height, round(height / shrink)))
+    # INTER_AREA averages whole pixel blocks (no aliasing)
+    working = cv2.resize(np.ascontiguousarray(img), size, interpolation=cv2.INTER_AREA)
+    return working, decode_scale * width / size[0]
+
+
+class QualityBatch:
+    """
+    Preallocated buffers for scoring up to batch_size working images at
+    once. add() copies images in, compute() scores all of them and empties
+    the batch; the buffers are reused for every batch.
+
+    The slots are stacked into one 8-bit image, so a single cv2.Laplacian
+    call (3x3 kernel, int16 output - exact for 8-bit pixels) covers the
+    whole batch. Every slot carries its own reflected 1-pixel border
+    (BORDER_REFLECT_101, like cv2.Laplacian's default), so neighbouring
+    slots never mix and every image gets the score
+    compute_blur_score_for_array gives it. Images smaller than the working
+    resolution sit in the top-left corner of their slot and are scored on
+    their own pixels only.
+    """
+
+    def __init__(
+        self,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        working_size: Tuple[int, int] = DEFAULT_WORKING_SIZE,
+    ) -> None:
+        if batch_size < 1:
+            raise ValueError(f"batch_size must be >= 1, got {batch_size}")
+
+        width, height = working_size
+        self.batch_size = batch_size
+        self.working_size = working_size
+        self._shapes: List[Tuple[int, int]] = []
+
+        # Pixels with a 1-pixel border for the Laplacian's neighbours
+        self._pixels = np.zeros((batch_size, height + 2, width + 2), dtype=np.uint8)
+        self._laplacian = np.empty((batch_size, height + 2, width + 2), dtype=np.int16)
+
+    def __len__(self) -> int:
+        return len(self._shapes)
+
+    def is_full(self) -> bool:
+        return len(self._shapes) == self.batch_size
+
+    def add(self, working: np.ndarray) -> None:
+        """
+        Copy one image from prepare_working_image into the batch.
+        """
+        if self.is_full():
+            raise ValueError("QualityBatch is full - compute() it first")
+
+        if working.shape[0] > working.shape[1]:
+            working = working.T
+
+        width, height = self.working_size
+        rows, cols = working.shape
+        if rows < 2 or cols < 2 or rows > height or cols > width:
+            raise ValueError(f"Expected a working image of 2x2 to {width}x{height} pixels, got {cols}x{rows}")
+
+        slot = self._pixels[len(self._shapes)]
+        slot[1:rows + 1, 1:cols + 1] = working
+        # Reflected border: row -1 = row 1, row h = row h-2 (same for columns)
+        slot[0, :cols + 2] = slot[2, :cols + 2]
+        slot[rows + 1, :cols + 2] = slot[rows - 1, :cols + 2]
+        slot[:rows + 2, 0] = slot[:rows + 2, 2]
+        slot[:rows + 2, cols + 1] = slot[:rows + 2, cols - 1]
+        # The rest of a smaller image's slot is never read (see compute)
+
+        self._shapes.append((rows, cols))
+
+    def compute(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Score the images added since the last call, in the order they were
+        added: (raw blur score, brightness, shadow clip fraction, highlight
+        clip fraction). Blur is the Laplacian variance of the working image,
+        not yet normalised to full resolution.
+        """
+        shapes = self._shapes
+        self._shapes = []
+        count = len(shapes)
+
+        _, padded_height, padded_width = self._pixels.shape
+        cv2.Laplacian(
+            self._pixels[:count].reshape(-1, padded_width),
+            cv2.CV_16S,
+            dst=self._laplacian[:count].reshape(-1, padded_width),
+        )
+
+        blur = np.empty(count)
+        brightness = np.empty(count)
+        shadows = np.empty(count)
+        highlights = np.empty(count)
+        levels = np.arange(256)
+
+        # Only the image itself: its Laplacian needs nothing outside its border
+        for index, (rows, cols) in enumerate(shapes):
+            _, std = cv2.meanStdDev(self._laplacian[index, 1:rows + 1, 1:cols + 1])
+            blur[index] = float(std[0, 0]) ** 2
+
+            # One histogram gives the mean and both clip fractions
+            pixels = self._pixels[index, 1:rows + 1, 1:cols + 1]
+            histogram = cv2.calcHist([pixels], [0], None, [256], [0, 256]).ravel().astype(np.int64)
+            valid = rows * cols
+            brightness[index] = (histogram @ levels) / valid
+            shadows[index] = histogram[:SHADOW_CLIP_LEVEL + 1].sum() / valid
+            highlights[index] = histogram[HIGHLIGHT_CLIP_LEVEL:].sum() / valid
+
+        return blur, brightness, shadows, highlights
+
+
+def _working_image_task(
+    task: Tuple[Path, int, Tuple[int, int]],
+) -> Optional[Tuple[np.ndarray, float]]:
+    """
+    Decode and resize one file - the unit of work sent to worker processes
+    (only the small working image travels back).
+    """
+    image_path, decode_scale, working_size = task
+    img = _read_grayscale(image_path, decode_scale)
+    if img is None:
+        return None
+    return prepare_working_image(img, decode_scale, working_size)
+
+
+def compute_quality_batched(
+    image_paths: Sequence[Path],
+    workers: Optional[int] = 1,
+    decode_scale: int = 1,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    working_size: Tuple[int, int] = DEFAULT_WORKING_SIZE,
+) -> BatchQualityScores:
+    """
+    Quality metrics for many image files, scored batch_size at a time.
+
+    Images are decoded (in worker processes with workers > 1) and shrunk to
+    fit working_size. Images that already fit get exactly the per-image
+    scores; for larger ones the blur score is normalised back to full
+    resolution like a reduced decode (normalize_blur_score), so it is
+    comparable with the trash thresholds but not identical.
+
+    :param image_paths: Image files to score.
+    :param workers: Number of worker processes for decoding (1 = sequential
+                    in this process, None = one per CPU core).
+    :param decode_scale: Decode at 1/decode_scale resolution (1, 2, 4 or 8).
+    :param batch_size: Images scored together.
+    :param working_size: (width, height) every image is fitted into.
+    :return: Scores in the order of image_paths.
+    """
+    check_decode_scale(decode_scale)
+
+    scores = BatchQualityScores.empty(len(image_paths))
+    batch = QualityBatch(batch_size, working_size)
+    indices: List[int] = []
+    scales: List[float] = []
+
+    def flush() -> None:
+        if not indices:
+            return
+        blur, brightness, shadows, highlights = batch.compute()
+        slots = np.array(indices)
+        scores.blur_score[slots] = blur / np.array([blur_scale_factor(scale) for scale in scales])
+        scores.brightness_score[slots] = brightness
+        scores.shadow_clip_fraction[slots] = shadows
+        scores.highlight_clip_fraction[slots] = highlights
+        indices.clear()
+        scales.clear()
+
+    tasks = ((path, decode_scale, working_size) for path in image_paths)
+    for index, prepared in enumerate(imap_ordered(_working_image_task, tasks, workers)):
+        if prepared is None:
+            continue
+        working, scale = prepared
+        batch.add(working)
+        indices.append(index)
+        scales.append(scale)
+        if batch.is_full():
+            flush()
+    flush()
+
+    return scores
+
+
+def annotate_photos_with_quality_batched(
+    photos: list[PhotoInfo],
+    workers: Optional[int] = 1,
+    decode_scale: int = 1,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    working_size: Tuple[int, int] = DEFAULT_WORKING_SIZE,
+) -> BatchQualityScores:
+    """
+    Batched counterpart of annotate_photos_with_quality: sets blur_score
+    and brightness_score of every photo (None if unreadable), ready for
+    find_potential_trash_photos. A PhotoTable's score columns are written
+    directly.
+
+    Returns all scores, including the clipped-pixel fractions that
+    PhotoInfo has no fields for.
+    """
+    scores = compute_quality_batched(
+        [photo.path for photo in photos], workers, decode_scale, batch_size, working_size
+    )
+
+    if isinstance(photos, PhotoTable):
+        photos.column("blur_score")[:] = scores.blur_score
+        photos.column("brightness_score")[:] = scores.brightness_score
+        return scores
+
+    for photo, blur, brightness in zip(
+        photos, scores.blur_score.tolist(), scores.brightness_score.tolist()
+    ):
+        photo.blur_score = None if math.isnan(blur) else blur
+        photo.brightness_score = None if math.isnan(brightness) else brightness
+
+    return scores
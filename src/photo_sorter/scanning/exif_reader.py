@@ -0,0 +1,240 @@
+"""
+Minimal EXIF reader for capture dates.
+
+Reads only the container headers - the JPEG APP1 "Exif" segment or the PNG
+eXIf chunk - and walks the two TIFF directories that can hold a date
+(IFD0 and the Exif sub-IFD). No image is opened and no other tag is decoded,
+so a JPEG costs a few KiB of reading instead of a Pillow open + full EXIF parse.
+"""
+from __future__ import annotations
+
+import struct
+from typing import BinaryIO, Dict, Optional, Tuple, Union
+
+
+# TIFF tag ids of the date tags (same names as PIL.ExifTags.TAGS)
+DATETIME_TAGS = {
+    0x0132: "DateTime",
+    0x9003: "DateTimeOriginal",
+    0x9004: "DateTimeDigitized",
+}
+
+# Pointer from IFD0 to the Exif sub-IFD
+_EXIF_IFD_POINTER = 0x8769
+
+# TIFF field types we read values of
+_TYPE_ASCII = 2
+_TYPE_UNDEFINED = 7
+_TYPE_LONG = 4
+
+JPEG_SIGNATURE = b"\xff\xd8"
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+_EXIF_HEADER = b"Exif\x00\x00"
+
+# How much of an APP1 segment is read first. IFD0 and the Exif IFD sit at
+# its start; only the thumbnail at the end is usually bigger than this.
+_APP1_FIRST_READ = 4096
+
+# JPEG markers
+_SOS = 0xDA
+_EOI = 0xD9
+_APP1 = 0xE1
+
+
+class _NeedMoreData(Exception):
+    """An offset points past the part of the EXIF block read so far."""
+
+
+def _read_exact(f: BinaryIO, size: int) -> bytes:
+    data = f.read(size)
+    if len(data) != size:
+        raise EOFError
+    return data
+
+
+def _find_jpeg_exif(f: BinaryIO) -> Optional[Tuple[bytes, int]]:
+    """
+    Walk the JPEG marker segments (after SOI) up to the start of the image data
+    and find the first APP1 "Exif" segment. Only its first _APP1_FIRST_READ
+    bytes are read; returns (TIFF data read so far, bytes of the segment left).
+    Other segments are skipped with seek(), their data is never read.
+    """
+    while True:
+        byte = _read_exact(f, 1)
+        if byte != b"\xff":
+            # Not a marker - corrupted stream
+            return None
+
+        marker = _read_exact(f, 1)[0]
+        while marker == 0xFF:
+            # Fill bytes before a marker are allowed
+            marker = _read_exact(f, 1)[0]
+
+        if marker in (_SOS, _EOI):
+            return None
+        if 0xD0 <= marker <= 0xD7 or marker == 0x01:
+            # Markers without a length field
+            continue
+
+        (length,) = struct.unpack(">H", _read_exact(f, 2))
+        payload_size = length - 2
+        if payload_size < 0:
+            return None
+
+        if marker == _APP1 and payload_size >= len(_EXIF_HEADER):
+            head = _read_exact(f, min(payload_size, _APP1_FIRST_READ))
+            if head.startswith(_EXIF_HEADER):
+                return head[len(_EXIF_HEADER):], payload_size - len(head)
+            f.seek(payload_size - len(head), 1)
+            continue
+
+        f.seek(payload_size, 1)
+
+
+def _find_png_exif(f: BinaryIO) -> Optional[Tuple[bytes, int]]:
+    """
+    Walk the PNG chunks (after the signature) and return the eXIf chunk's
+    data (nothing left to read). Chunk data other than eXIf is skipped with seek().
+    """
+    while True:
+        length, chunk_type = struct.unpack(">I4s", _read_exact(f, 8))
+
+        if chunk_type == b"eXIf":
+            data = _read_exact(f, length)
+            # Some writers keep the JPEG style header in the chunk
+            if data.startswith(_EXIF_HEADER):
+                data = data[len(_EXIF_HEADER):]
+            return data, 0
+
+        if chunk_type == b"IEND":
+            return None
+
+        # Skip data and CRC
+        f.seek(length + 4, 1)
+
+
+def _find_exif(f: BinaryIO) -> Optional[Tuple[bytes, int]]:
+    """
+    Locate the EXIF data of a JPEG or PNG file object positioned at its start.
+    Returns (start of the TIFF data, number of its bytes not read yet) or
+    None if there is no EXIF. Raises ValueError for other formats.
+    """
+    signature = f.read(len(PNG_SIGNATURE))
+
+    try:
+        if signature.startswith(JPEG_SIGNATURE):
+            f.seek(len(JPEG_SIGNATURE) - len(signature), 1)
+            return _find_jpeg_exif(f)
+        if signature == PNG_SIGNATURE:
+            return _find_png_exif(f)
+    except (EOFError, struct.error):
+        # Truncated file - no EXIF to be found
+        return None
+
+    raise ValueError("Not a JPEG or PNG file")
+
+
+def read_exif_block(f: BinaryIO) -> Optional[bytes]:
+    """
+    Return the raw TIFF-structured EXIF data of a JPEG or PNG file object
+    positioned at its start, or None if the file has no EXIF.
+
+    Raises ValueError if the file is neither JPEG nor PNG.
+    """
+    found = _find_exif(f)
+    if found is None:
+        return None
+
+    block, remaining = found
+    try:
+        return block + _read_exact(f, remaining)
+    except EOFError:
+        return None
+
+
+def _parse_date_tags(block: bytes) -> Dict[str, Union[str, bytes]]:
+    """
+    Read the date tags from IFD0 and the Exif IFD of a TIFF block.
+    ASCII values are returned as str (like Pillow: latin-1, one trailing NUL
+    removed), UNDEFINED values as bytes.
+    """
+    if len(block) < 8:
+        return {}
+
+    byte_order = block[:2]
+    if byte_order == b"II":
+        prefix = "<"
+    elif byte_order == b"MM":
+        prefix = ">"
+    else:
+        return {}
+
+    def unpack(fmt: str, offset: int) -> tuple:
+        if offset < 0 or offset + struct.calcsize(prefix + fmt) > len(block):
+            raise _NeedMoreData
+        return struct.unpack_from(prefix + fmt, block, offset)
+
+    values: Dict[str, Union[str, bytes]] = {}
+
+    def read_ifd(offset: int) -> Optional[int]:
+        """Collect date tags of one IFD, return the Exif IFD pointer if present."""
+        (count,) = unpack("H", offset)
+        exif_ifd = None
+
+        for i in range(count):
+            tag, field_type, value_count, value_offset = unpack("HHII", offset + 2 + i * 12)
+
+            if tag == _EXIF_IFD_POINTER and field_type == _TYPE_LONG:
+                exif_ifd = value_offset
+                continue
+
+            name = DATETIME_TAGS.get(tag)
+            if name is None or field_type not in (_TYPE_ASCII, _TYPE_UNDEFINED):
+                continue
+
+            # Values up to 4 bytes are stored in the offset field itself
+            data_offset = offset + 2 + i * 12 + 8 if value_count <= 4 else value_offset
+            if data_offset + value_count > len(block):
+                raise _NeedMoreData
+            raw = block[data_offset:data_offset + value_count]
+
+            if field_type == _TYPE_ASCII:
+                if raw.endswith(b"\x00"):
+                    raw = raw[:-1]
+                values[name] = raw.decode("latin-1", "replace")
+            else:
+                values[name] = bytes(raw)
+
+        return exif_ifd
+
+    (ifd0,) = unpack("I", 4)
+    exif_ifd = read_ifd(ifd0)
+    if exif_ifd:
+        read_ifd(exif_ifd)
+
+    return values
+
+
+def read_exif_date_tags(f: BinaryIO) -> Dict[str, Union[str, bytes]]:
+    """
+    Return the EXIF date tags ("DateTimeOriginal", "DateTimeDigitized",
+    "DateTime") found in a JPEG or PNG file object, keyed by tag name.
+    Missing tags are left out; a file without (readable) EXIF gives {}.
+
+    Raises ValueError if the file is neither JPEG nor PNG.
+    """
+    found = _find_exif(f)
+    if found is None:
+        return {}
+
+    block, remaining = found
+    try:
+        try:
+            return _parse_date_tags(block)
+        except _NeedMoreData:
+            if not remaining:
+                return {}
+            # An offset points past the first read - read the whole segment
+            return _parse_date_tags(block + _read_exact(f, remaining))
+    except (_NeedMoreData, EOFError, struct.error):
+        return {}
@@ -1,34 +1,136 @@
+import os
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from fnmatch import fnmatch
 from pathlib import Path
-from typing import Iterable, List
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Sequence, Set, Tuple
 
 
 # Supported image file extensions for initial implementation
 SUPPORTED_EXTENSIONS = {".jpg", ".jpeg", ".png"}
 
+# Folder the GUI moves potential trash into - pipelines skip it when rescanning
+TRASH_PREVIEW_DIR_NAME = "trash_preview"
 
-def _iter_photo_paths(root: Path) -> Iterable[Path]:
+
+class PhotoEntry(NamedTuple):
+    """
+    A photo file found by the walker, with the stat result taken during the
+    walk - later stages use it instead of calling stat() again.
     """
-    Iterate over all supported photo files under the given root directory.
 
-    :param root: Base directory to scan.
-    :return: Generator of Path objects pointing to photo files.
+    path: Path
+    stat: os.stat_result
+
+
+def unpack_photo_entry(item: Path | PhotoEntry) -> Tuple[Path, Optional[os.stat_result]]:
     """
-    # Use rglob to recursively traverse all subdirectories
-    for path in root.rglob("*"):
-        if not path.is_file():
-            continue
+    Return (path, stat result or None) for a plain Path or a PhotoEntry,
+    so stages can accept both.
+    """
+    if isinstance(item, PhotoEntry):
+        return item.path, item.stat
+    return item, None
+
 
-        # Check extension in case-insensitive mode
-        if path.suffix.lower() in SUPPORTED_EXTENSIONS:
-            yield path
+def _is_excluded(dir_name: str, exclude_dirs: Sequence[str]) -> bool:
+    return any(fnmatch(dir_name, pattern) for pattern in exclude_dirs)
 
 
-def list_photo_paths(root_path: str | Path) -> List[Path]:
+def _scan_directory(
+    directory: str,
+    exclude_dirs: Sequence[str],
+) -> Tuple[List[PhotoEntry], List[str]]:
     """
-    Return a list of Paths to supported photo files (JPG/PNG) inside a folder.
+    List one directory: return its photo files (with stat) and the
+    subdirectories to walk next.
 
-    :param root_path: Directory to scan (string or Path).
-    :return: List of Path objects pointing to photo files.
+    DirEntry caches the file type from the directory listing, so non-photo
+    files and directories cost no extra stat; only photo files are stat'ed,
+    once. Like Path.rglob, symlinked directories are not followed and
+    unreadable directories are skipped.
+    """
+    photos: List[PhotoEntry] = []
+    subdirs: List[str] = []
+
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if not _is_excluded(entry.name, exclude_dirs):
+                            subdirs.append(entry.path)
+                        continue
+
+                    # Check extension in case-insensitive mode (before any stat)
+                    if os.path.splitext(entry.name)[1].lower() not in SUPPORTED_EXTENSIONS:
+                        continue
+
+                    if not entry.is_file():
+                        continue
+
+                    photos.append(PhotoEntry(Path(entry.path), entry.stat()))
+                except OSError:
+                    # File vanished or can't be stat'ed - skip it
+                    continue
+    except (PermissionError, FileNotFoundError, NotADirectoryError):
+        return [], []
+
+    return photos, subdirs
+
+
+def _walk_sequential(root: Path, exclude_dirs: Sequence[str]) -> Iterator[PhotoEntry]:
+    # Depth-first with an explicit stack (no recursion limit on deep trees)
+    stack = [str(root)]
+
+    while stack:
+        photos, subdirs = _scan_directory(stack.pop(), exclude_dirs)
+        yield from photos
+        # Reversed, so subdirectories are visited in listing order
+        stack.extend(reversed(subdirs))
+
+
+def _walk_threaded(
+    root: Path,
+    exclude_dirs: Sequence[str],
+    threads: int,
+) -> Iterator[PhotoEntry]:
+    # Sibling directories are listed concurrently; os.scandir and stat release
+    # the GIL, which hides latency on network filesystems.
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        pending: Set[Future] = {executor.submit(_scan_directory, str(root), exclude_dirs)}
+
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                photos, subdirs = future.result()
+                for subdir in subdirs:
+                    pending.add(executor.submit(_scan_directory, subdir, exclude_dirs))
+                yield from photos
+
+
+def _iter_photo_entries(
+    root: Path,
+    exclude_dirs: Sequence[str] = (),
+    threads: int = 1,
+) -> Iterator[PhotoEntry]:
+    """
+    Iterate over all supported photo files under the given root directory.
+
+    :param root: Base directory to scan.
+    :param exclude_dirs: fnmatch patterns of directory names to skip
+                         (e.g. "trash_preview", ".*").
+    :param threads: Number of threads listing directories in parallel (1 = sequential).
+    :return: Generator of PhotoEntry (path + stat result).
+    """
+    if threads > 1:
+        return _walk_threaded(root, exclude_dirs, threads)
+    return _walk_sequential(root, exclude_dirs)
+
+
+def _resolve_root(root_path: str | Path) -> Path:
+    """
+    Resolve and validate the directory to scan.
     """
     root = Path(root_path).expanduser().resolve()
 
@@ -39,5 +141,72 @@ def list_photo_paths(root_path: str | Path) -> List[Path]:
     if not root.is_dir():
         raise NotADirectoryError(f"Not a directory: {root}")
 
+    return root
+
+
+def iter_photo_entries(
+    root_path: str | Path,
+    exclude_dirs: Iterable[str] = (),
+    threads: int = 1,
+) -> Iterator[PhotoEntry]:
+    """
+    Lazily yield PhotoEntry (path + stat result) for supported photo files
+    (JPG/PNG) inside a folder, while the directory tree is being walked.
+
+    The root folder is validated immediately, not on the first next().
+
+    :param root_path: Directory to scan (string or Path).
+    :param exclude_dirs: fnmatch patterns of directory names to skip.
+    :param threads: Number of threads listing sibling directories in parallel.
+    :return: Iterator of PhotoEntry.
+    """
+    root = _resolve_root(root_path)
+    return _iter_photo_entries(root, tuple(exclude_dirs), threads)
+
+
+def iter_photo_paths(
+    root_path: str | Path,
+    exclude_dirs: Iterable[str] = (),
+    threads: int = 1,
+) -> Iterator[Path]:
+    """
+    Lazily yield Paths to supported photo files (JPG/PNG) inside a folder,
+    while the directory tree is being walked (for streaming pipelines).
+
+    :param root_path: Directory to scan (string or Path).
+    :param exclude_dirs: fnmatch patterns of directory names to skip.
+    :param threads: Number of threads listing sibling directories in parallel.
+    :return: Iterator of Path objects pointing to photo files.
+    """
+    entries = iter_photo_entries(root_path, exclude_dirs, threads)
+    return (entry.path for entry in entries)
+
+
+def list_photo_entries(
+    root_path: str | Path,
+    exclude_dirs: Iterable[str] = (),
+    threads: int = 1,
+) -> List[PhotoEntry]:
+    """
+    Return a list of PhotoEntry (path + stat result) for supported photo
+    files inside a folder. Pass the entries to build_photo_infos or
+    analyze_photo_paths so they don't stat every file again.
+    """
+    return list(iter_photo_entries(root_path, exclude_dirs, threads))
+
+
+def list_photo_paths(
+    root_path: str | Path,
+    exclude_dirs: Iterable[str] = (),
+    threads: int = 1,
+) -> List[Path]:
+    """
+    Return a list of Paths to supported photo files (JPG/PNG) inside a folder.
+
+    :param root_path: Directory to scan (string or Path).
+    :param exclude_dirs: fnmatch patterns of directory names to skip.
+    :param threads: Number of threads listing sibling directories in parallel.
+    :return: List of Path objects pointing to photo files.
+    """
     # Collect all matching paths
-    return list(_iter_photo_paths(root))
+    return list(iter_photo_paths(root_path, exclude_dirs, threads))
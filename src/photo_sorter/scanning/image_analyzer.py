@@ -1,9 +1,15 @@
+import os
 from pathlib import Path
 from datetime import datetime
-from typing import Iterable, List, Optional
+from typing import Iterable, List, Mapping, Optional, Union
 
 from PIL import Image, ExifTags  # Pillow: EXIF reading
 
+from photo_sorter.buffers import ImageBuffer, open_buffer
+from photo_sorter.parallel import map_ordered
+
+from .exif_reader import read_exif_date_tags
+from .filesystem_scanner import PhotoEntry, unpack_photo_entry
 from .models import PhotoInfo
 
 
@@ -26,20 +32,61 @@ def _get_exif_datetime(path: Path) -> Optional[datetime]:
     """
     Try to read the best datetime from EXIF metadata.
     Returns None if EXIF is missing or cannot be parsed.
+
+    JPEG and PNG files are handled by the header-only reader (exif_reader),
+    which reads just the EXIF segment; anything else goes through Pillow.
     """
+    try:
+        with path.open("rb") as f:
+            return _datetime_from_exif_values(read_exif_date_tags(f))
+    except ValueError:
+        # Not a JPEG/PNG after all (e.g. wrong extension) - let Pillow try
+        pass
+    except OSError:
+        return None
+
     try:
         with Image.open(path) as img:
-            exif = img._getexif()
+            return _exif_datetime_from_image(img)
     except Exception:
         # If unable to open file or no EXIF data - continue gracefully
         return None
 
+
+def exif_datetime_from_bytes(data: ImageBuffer) -> Optional[datetime]:
+    """
+    Header-only EXIF datetime for JPEG/PNG file contents already in memory
+    (bytes, memoryview or mmap). Raises ValueError for other formats
+    (use _exif_datetime_from_image then).
+    """
+    with open_buffer(data) as f:
+        return _datetime_from_exif_values(read_exif_date_tags(f))
+
+
+def _exif_datetime_from_image(img: Image.Image) -> Optional[datetime]:
+    """
+    Read the best datetime from EXIF of an already opened PIL image.
+    Opening an image only parses its header, so this does not decode pixels.
+    """
+    try:
+        exif = img._getexif()
+    except Exception:
+        return None
+
     if not exif:
         return None
 
     # Map numeric EXIF keys to readable names
     exif_named = {ExifTags.TAGS.get(k, k): v for k, v in exif.items()}
 
+    return _datetime_from_exif_values(exif_named)
+
+
+def _datetime_from_exif_values(exif_named: Mapping) -> Optional[datetime]:
+    """
+    Pick the best datetime from EXIF values keyed by tag name
+    (first parsable of EXIF_DATETIME_KEYS).
+    """
     for key in EXIF_DATETIME_KEYS:
         raw_value = exif_named.get(key)
         if not raw_value:
@@ -60,13 +107,15 @@ def _get_exif_datetime(path: Path) -> Optional[datetime]:
     return None
 
 
-def build_photo_info(path: Path) -> PhotoInfo:
+def build_photo_info(path: Path, stat_result: Optional[os.stat_result] = None) -> PhotoInfo:
     """
     Create PhotoInfo using EXIF datetime if possible,
     otherwise fall back to filesystem modification time (mtime).
+    stat_result can be passed when the walker already has it.
     """
     # Get data from filesystem
-    stat_result = path.stat()
+    if stat_result is None:
+        stat_result = path.stat()
     size_bytes = stat_result.st_size
     fs_mtime = datetime.fromtimestamp(stat_result.st_mtime)
 
@@ -84,9 +133,19 @@ def build_photo_info(path: Path) -> PhotoInfo:
     )
 
 
-def build_photo_infos(paths: Iterable[Path]) -> List[PhotoInfo]:
+def _build_photo_info_task(item: Union[Path, PhotoEntry]) -> PhotoInfo:
+    return build_photo_info(*unpack_photo_entry(item))
+
+
+def build_photo_infos(
+    paths: Iterable[Union[Path, PhotoEntry]],
+    workers: Optional[int] = 1,
+) -> List[PhotoInfo]:
     """
-    Convert iterable of Paths into a list of PhotoInfo objects.
+    Convert iterable of Paths (or PhotoEntry from the walker, which saves
+    a stat per file) into a list of PhotoInfo objects.
+    workers > 1 reads EXIF in a process pool (None = one per CPU core),
+    the result keeps the order of paths.
     """
-    return [build_photo_info(p) for p in paths]
+    return map_ordered(_build_photo_info_task, list(paths), workers)
 
@@ -4,8 +4,9 @@ from datetime import datetime
 from typing import Optional
 
 
-@dataclass
+@dataclass(slots=True)
 class PhotoInfo:
+    # __slots__: no per-object __dict__ - saves ~100 B per photo in large libraries
     path: Path
     file_name: str
     size_bytes: int
@@ -19,3 +20,7 @@ class PhotoInfo:
     blur_score: Optional[float] = None  # niższa wartość -> bardziej rozmazane
     brightness_score: Optional[float] = None  # średnia jasność (0-255)
     is_potential_trash: Optional[bool] = None  # True/False po analizie jakości
+
+    # Image size in pixels, as stored in the file (set by the single-pass analysis)
+    width: Optional[int] = None
+    height: Optional[int] = None
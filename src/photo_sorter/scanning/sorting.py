@@ -1,6 +1,7 @@
 from typing import List
 
 from .models import PhotoInfo
+from .photo_table import PhotoTable
 
 
 def sort_photos_by_taken_date(
@@ -10,7 +11,10 @@ def sort_photos_by_taken_date(
     """
     Return a new list of photos sorted by 'taken_at' date.
     Photos without date (taken_at is None) go to the end.
+    A PhotoTable is sorted on its date column into a new table.
     """
+    if isinstance(photos, PhotoTable):
+        return photos.sorted_by_taken_at(descending)
 
     def sort_key(photo: PhotoInfo):
         # True > False, so photos without date go to the end
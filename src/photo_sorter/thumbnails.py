@@ -0,0 +1,273 @@
+from __future__ import annotations
+
+import os
+import queue
+import tempfile
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from io import BytesIO
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from PIL import Image, ImageOps
+
+from photo_sorter.pipeline.cache import default_cache_dir
+from photo_sorter.scanning.models import PhotoInfo
+
+
+# Longest side of a thumbnail in pixels
+THUMBNAIL_SIZE = 160
+
+# Bump when thumbnails are rendered differently - old files on disk are then ignored
+THUMBNAIL_VERSION = 1
+
+# Default byte budget of the in-memory tier (PNG bytes, ~10-25 KiB per thumbnail)
+DEFAULT_MEMORY_BUDGET = 64 * 1024 * 1024
+
+THUMBNAIL_DIR_NAME = "thumbnails"
+
+
+def default_thumbnail_dir() -> Path:
+    """
+    Return the default location of the on-disk thumbnail store.
+    """
+    return default_cache_dir() / THUMBNAIL_DIR_NAME
+
+
+def make_thumbnail_png(path: Path, size: int = THUMBNAIL_SIZE) -> Optional[bytes]:
+    """
+    Render a thumbnail (longest side = size, EXIF orientation applied)
+    and return it PNG-encoded, or None if the image can't be read.
+
+    JPEGs are decoded at reduced resolution (draft()): only the smallest
+    DCT scale that is still at least size pixels is decoded, typically 1/8.
+    """
+    try:
+        with Image.open(path) as img:
+            img.draft("RGB", (size, size))
+            img = ImageOps.exif_transpose(img)
+            img.thumbnail((size, size))
+            if img.mode not in ("RGB", "RGBA", "L"):
+                img = img.convert("RGB")
+
+            out = BytesIO()
+            # PNG can be loaded by tk.PhotoImage without Pillow's ImageTk
+            img.save(out, "PNG", compress_level=1)
+            return out.getvalue()
+    except Exception:
+        # Error reading file / format - no thumbnail
+        return None
+
+
+class MemoryLRU:
+    """
+    Least-recently-used byte cache with a budget on the total size of the
+    values (not on their count). Not thread-safe - ThumbnailCache only
+    touches it from the thread that owns the cache (the GUI thread).
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MEMORY_BUDGET) -> None:
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._data: "OrderedDict[str, bytes]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._data
+
+    def get(self, key: str) -> Optional[bytes]:
+        data = self._data.get(key)
+        if data is not None:
+            self._data.move_to_end(key)
+        return data
+
+    def put(self, key: str, data: bytes) -> None:
+        old = self._data.pop(key, None)
+        if old is not None:
+            self.total_bytes -= len(old)
+
+        if len(data) > self.max_bytes:
+            # Would evict everything else and still not fit
+            return
+
+        self._data[key] = data
+        self.total_bytes += len(data)
+
+        while self.total_bytes > self.max_bytes:
+            _, evicted = self._data.popitem(last=False)
+            self.total_bytes -= len(evicted)
+
+
+class ThumbnailStore:
+    """
+    On-disk thumbnail store keyed by file hash (content digest of the photo),
+    so duplicates share one thumbnail and a moved or renamed photo keeps it.
+    Files live in <root>/<size>px-v<version>/<first 2 hash chars>/<hash>.png.
+
+    Like the analysis cache it is only an optimisation: I/O errors are
+    swallowed and mean "not stored".
+    """
+
+    def __init__(self, root: Optional[Path] = None, size: int = THUMBNAIL_SIZE) -> None:
+        self.root = Path(root) if root is not None else default_thumbnail_dir()
+        self.size = size
+        self._dir = self.root / f"{size}px-v{THUMBNAIL_VERSION}"
+
+    def path_for(self, file_hash: str) -> Path:
+        return self._dir / file_hash[:2] / f"{file_hash}.png"
+
+    def get(self, file_hash: str) -> Optional[bytes]:
+        try:
+            return self.path_for(file_hash).read_bytes()
+        except OSError:
+            return None
+
+    def put(self, file_hash: str, data: bytes) -> None:
+        target = self.path_for(file_hash)
+        try:
+            target.parent.mkdir(parents=True, exist_ok=True)
+            # Write to a temporary file and rename, so readers never see half a file
+            fd, tmp_name = tempfile.mkstemp(dir=target.parent, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(data)
+                os.replace(tmp_name, target)
+            except OSError:
+                os.unlink(tmp_name)
+                raise
+        except OSError:
+            pass
+
+
+def _thumbnail_key(photo: PhotoInfo) -> str:
+    # Same content -> same thumbnail; photos without a hash are keyed by path
+    return photo.file_hash or str(photo.path)
+
+
+def _load_thumbnail(
+    path: Path,
+    file_hash: Optional[str],
+    store: Optional[ThumbnailStore],
+    size: int,
+) -> Optional[bytes]:
+    """
+    Worker job: take the thumbnail from the disk store or render (and store) it.
+    """
+    if store is not None and file_hash:
+        data = store.get(file_hash)
+        if data is not None:
+            return data
+
+    data = make_thumbnail_png(path, size)
+    if data is not None and store is not None and file_hash:
+        store.put(file_hash, data)
+    return data
+
+
+class ThumbnailCache:
+    """
+    Two-tier lazy thumbnail cache for GUI previews.
+
+    request(photo) never blocks: it returns the PNG bytes if they are in
+    the in-memory LRU, otherwise it schedules loading on a thread pool
+    (disk store first, then a reduced-resolution decode) and returns None.
+    Finished thumbnails are collected by poll_ready() - call it regularly
+    from the owning (GUI) thread; it moves them into memory and returns the
+    keys that became available. cancel_except() drops queued requests for
+    photos that are no longer on screen, so fast scrolling doesn't build up
+    a backlog of decodes nobody will see.
+
+    Decoding releases the GIL, so threads are enough to use several cores.
+    """
+
+    def __init__(
+        self,
+        store: Optional[ThumbnailStore] = None,
+        memory_budget: int = DEFAULT_MEMORY_BUDGET,
+        workers: Optional[int] = None,
+        size: int = THUMBNAIL_SIZE,
+    ) -> None:
+        self.store = store
+        self.size = size
+        self.memory = MemoryLRU(memory_budget)
+
+        if workers is None:
+            workers = min(4, os.cpu_count() or 1)
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="thumbnail")
+        self._pending: Dict[str, Future] = {}
+        self._done: "queue.Queue[Tuple[str, Future]]" = queue.Queue()
+        self._failed: Set[str] = set()
+
+    key_for = staticmethod(_thumbnail_key)
+
+    def get(self, photo: PhotoInfo) -> Optional[bytes]:
+        """
+        Thumbnail from memory, or None (doesn't schedule anything).
+        """
+        return self.memory.get(_thumbnail_key(photo))
+
+    def request(self, photo: PhotoInfo) -> Optional[bytes]:
+        """
+        Thumbnail from memory, or None after scheduling it to be loaded.
+        """
+        key = _thumbnail_key(photo)
+
+        data = self.memory.get(key)
+        if data is not None or key in self._pending or key in self._failed:
+            return data
+
+        future = self._executor.submit(_load_thumbnail, photo.path, photo.file_hash, self.store, self.size)
+        self._pending[key] = future
+        # Runs on a worker thread (or in cancel()) - only hands the future over
+        future.add_done_callback(lambda f, key=key: self._done.put((key, f)))
+        return None
+
+    def poll_ready(self) -> List[str]:
+        """
+        Move finished thumbnails into memory; return the keys now available.
+        """
+        ready: List[str] = []
+
+        while True:
+            try:
+                key, future = self._done.get_nowait()
+            except queue.Empty:
+                break
+
+            if self._pending.get(key) is not future:
+                # Cancelled (and maybe requested again since)
+                continue
+            del self._pending[key]
+
+            try:
+                data = future.result()
+            except Exception:
+                data = None
+
+            if data is None:
+                # Unreadable image - don't try again in this session
+                self._failed.add(key)
+                continue
+
+            self.memory.put(key, data)
+            ready.append(key)
+
+        return ready
+
+    def cancel_except(self, photos: Iterable[PhotoInfo]) -> None:
+        """
+        Cancel queued (not yet started) requests for photos not in photos.
+        """
+        keep = {_thumbnail_key(photo) for photo in photos}
+
+        for key, future in list(self._pending.items()):
+            if key not in keep and future.cancel():
+                del self._pending[key]
+
+    def shutdown(self) -> None:
+        """
+        Drop queued requests and wait for the running ones.
+        """
+        self._executor.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import base64
+import tkinter as tk
+from typing import Dict, Iterable, List, Optional
+
+from photo_sorter.scanning.models import PhotoInfo
+from photo_sorter.thumbnails import ThumbnailCache
+
+
+class ThumbnailStrip(tk.Frame):
+    """
+    A row of thumbnail previews (with file names) for up to max_items photos.
+
+    Thumbnails come from a ThumbnailCache and never block the GUI: missing
+    ones show a placeholder text and are filled in by thumbnails_ready(),
+    which the owner calls with the keys returned by ThumbnailCache.poll_ready().
+    """
+
+    def __init__(
+        self,
+        master: tk.Misc,
+        thumbnails: ThumbnailCache,
+        max_items: int = 8,
+        placeholder: str = "...",
+    ) -> None:
+        super().__init__(master)
+        self.thumbnails = thumbnails
+        self.max_items = max_items
+        self.placeholder = placeholder
+
+        self._photos: List[PhotoInfo] = []
+        self._labels: List[tk.Label] = []
+        # PhotoImages must stay referenced while shown, Tk doesn't keep them alive
+        self._images: Dict[int, tk.PhotoImage] = {}
+
+    @property
+    def photos(self) -> List[PhotoInfo]:
+        """Photos currently shown (also the ones still loading)."""
+        return self._photos
+
+    def show(self, photos: Iterable[PhotoInfo]) -> None:
+        """
+        Show thumbnails of the first max_items photos, requesting the missing ones.
+        """
+        for label in self._labels:
+            label.destroy()
+        self._labels.clear()
+        self._images.clear()
+
+        self._photos = list(photos)[: self.max_items]
+
+        for column, photo in enumerate(self._photos):
+            label = tk.Label(self, text=self.placeholder, compound="top", wraplength=170)
+            label.grid(row=0, column=column, padx=4, pady=4, sticky="n")
+            self._labels.append(label)
+            self._set_image(column, self.thumbnails.request(photo))
+
+    def thumbnails_ready(self, keys: Iterable[str]) -> None:
+        """
+        Fill in thumbnails that finished loading.
+        """
+        ready = set(keys)
+        for column, photo in enumerate(self._photos):
+            if self.thumbnails.key_for(photo) in ready:
+                self._set_image(column, self.thumbnails.get(photo))
+
+    def _set_image(self, column: int, data: Optional[bytes]) -> None:
+        photo = self._photos[column]
+        label = self._labels[column]
+
+        if data is None:
+            label.config(image="", text=f"{self.placeholder}\n{photo.file_name}")
+            return
+
+        # base64 works with every Tk 8.6 build, raw PNG bytes not always
+        image = tk.PhotoImage(data=base64.b64encode(data))
+        self._images[column] = image
+        label.config(image=image, text=photo.file_name)
@@ -0,0 +1,260 @@
+from __future__ import annotations
+
+import bisect
+import tkinter as tk
+import tkinter.font as tkfont
+from typing import Any, Callable, Generic, Iterable, List, Optional, Sequence, Set, TypeVar
+
+T = TypeVar("T")
+
+
+def _sort_key(
+    value_of: Callable[[Any], Optional[float]],
+    reverse: bool,
+) -> Callable[[Any], tuple]:
+    # Ascending key for both directions, so the view can always be kept sorted
+    # with bisect. Items without a value (e.g. unreadable image -> blur_score
+    # None) go to the end either way.
+    sign = -1.0 if reverse else 1.0
+
+    def key(item: Any) -> tuple:
+        value = value_of(item)
+        return (value is None, sign * value if value is not None else 0.0)
+
+    return key
+
+
+class VirtualListView(tk.Frame, Generic[T]):
+    """
+    List view for very long lists: only the rows that fit on screen exist
+    in the underlying Listbox, so showing, scrolling, sorting or filtering
+    100k items costs the same as 30.
+
+    The view keeps a reference to the item sequence (no copy) and an
+    index list with the current sort order and filter; the visible slice
+    of it is rendered with format_item. Items appended while a scan is
+    running can be added with append().
+
+    Selection is tracked by item index, so it survives scrolling and
+    re-sorting; selected_items() returns the selected items.
+
+    on_visible(items) is called after every redraw with the items on
+    screen (e.g. to prefetch previews), on_select(items) after the user
+    changed the selection.
+    """
+
+    def __init__(
+        self,
+        master: tk.Misc,
+        format_item: Callable[[T], str] = str,
+        on_visible: Optional[Callable[[List[T]], None]] = None,
+        on_select: Optional[Callable[[List[T]], None]] = None,
+        **listbox_options: Any,
+    ) -> None:
+        super().__init__(master)
+        self.format_item = format_item
+        self.on_visible = on_visible
+        self.on_select = on_select
+
+        self._items: Sequence[T] = []
+        self._view: List[int] = []  # indices into _items, sorted and filtered
+        self._first = 0  # position in _view of the top visible row
+        self._selected: Set[int] = set()  # indices into _items
+
+        self._sort_key: Optional[Callable[[T], tuple]] = None
+        self._filter: Optional[Callable[[T], bool]] = None
+
+        listbox_options.setdefault("selectmode", tk.EXTENDED)
+        self._listbox = tk.Listbox(self, exportselection=False, **listbox_options)
+        self._listbox.pack(side="left", fill="both", expand=True)
+
+        self._scrollbar = tk.Scrollbar(self, orient="vertical", command=self._on_scrollbar)
+        self._scrollbar.pack(side="right", fill="y")
+
+        font = tkfont.nametofont(self._listbox.cget("font"))
+        self._row_height = max(1, font.metrics("linespace") + 1)
+        self._visible_rows = int(self._listbox.cget("height")) or 10
+
+        self._listbox.bind("<Configure>", self._on_resize)
+        self._listbox.bind("<<ListboxSelect>>", self._on_select)
+        # A plain click replaces the selection, also the part scrolled out of view
+        self._listbox.bind("<Button-1>", lambda _event: self._selected.clear())
+        self._listbox.bind("<Control-Button-1>", lambda _event: None)
+        self._listbox.bind("<Shift-Button-1>", lambda _event: None)
+
+        # Scrolling is done by the view, not by the Listbox (it only has the visible rows)
+        self._listbox.bind("<MouseWheel>", self._on_mouse_wheel)
+        self._listbox.bind("<Button-4>", lambda _event: self._scroll_by(-3))
+        self._listbox.bind("<Button-5>", lambda _event: self._scroll_by(3))
+        self._listbox.bind("<Up>", lambda _event: self._scroll_by(-1))
+        self._listbox.bind("<Down>", lambda _event: self._scroll_by(1))
+        self._listbox.bind("<Prior>", lambda _event: self._scroll_by(-self._visible_rows))
+        self._listbox.bind("<Next>", lambda _event: self._scroll_by(self._visible_rows))
+        self._listbox.bind("<Home>", lambda _event: self._scroll_by(-len(self._view)))
+        self._listbox.bind("<End>", lambda _event: self._scroll_by(len(self._view)))
+
+    # --- Data ---
+
+    def set_items(self, items: Sequence[T]) -> None:
+        """
+        Show a new item sequence (kept by reference - extend() appends to
+        it), keeping the current sort order and filter. Clears the selection
+        and scrolls to the top.
+        """
+        self._items = items
+        self._selected.clear()
+        self._first = 0
+        self._rebuild_view()
+
+    def extend(self, new_items: Iterable[T]) -> None:
+        """
+        Add items at the end of the item sequence (a list is extended in
+        place) and show those that pass the filter. With a sort order set
+        they are inserted in place, without re-sorting the whole view.
+        """
+        if not isinstance(self._items, list):
+            self._items = list(self._items)
+        items = self._items
+        key = self._sort_key
+
+        for item in new_items:
+            items.append(item)
+            index = len(items) - 1
+
+            if self._filter is not None and not self._filter(item):
+                continue
+
+            if key is None:
+                self._view.append(index)
+            else:
+                bisect.insort_right(self._view, index, key=lambda i: key(items[i]))
+
+        self._render()
+
+    def append(self, item: T) -> None:
+        """
+        Add one item - see extend().
+        """
+        self.extend((item,))
+
+    def __len__(self) -> int:
+        """Number of rows shown (after filtering)."""
+        return len(self._view)
+
+    @property
+    def items(self) -> Sequence[T]:
+        return self._items
+
+    # --- Sorting / filtering ---
+
+    def sort_by(
+        self,
+        value_of: Optional[Callable[[T], Optional[float]]],
+        reverse: bool = False,
+    ) -> None:
+        """
+        Sort the rows by value_of(item) (items giving None go last);
+        None restores the order of the item sequence.
+        """
+        self._sort_key = _sort_key(value_of, reverse) if value_of is not None else None
+        self._rebuild_view()
+
+    def filter_by(self, predicate: Optional[Callable[[T], bool]]) -> None:
+        """
+        Show only items for which predicate(item) is true (None = all).
+        Hidden items are also dropped from the selection.
+        """
+        self._filter = predicate
+        self._rebuild_view()
+        if predicate is not None:
+            self._selected.intersection_update(self._view)
+
+    def _rebuild_view(self) -> None:
+        items = self._items
+        view = range(len(items))
+
+        if self._filter is not None:
+            predicate = self._filter
+            view = [i for i in view if predicate(items[i])]
+
+        if self._sort_key is not None:
+            key = self._sort_key
+            # Stable sort: equal values keep the order of the item sequence
+            view = sorted(view, key=lambda i: key(items[i]))
+
+        self._view = list(view)
+        self._scroll_to(self._first)
+
+    # --- Selection ---
+
+    def selected_items(self) -> List[T]:
+        """
+        Selected items, in the current display order.
+        """
+        return [self._items[i] for i in self._view if i in self._selected]
+
+    def _on_select(self, _event: tk.Event) -> None:
+        visible = self._view[self._first:self._first + self._visible_rows + 1]
+        self._selected.difference_update(visible)
+        for row in self._listbox.curselection():
+            if row < len(visible):
+                self._selected.add(visible[row])
+
+        if self.on_select is not None:
+            self.on_select(self.selected_items())
+
+    # --- Scrolling / rendering ---
+
+    def _max_first(self) -> int:
+        return max(0, len(self._view) - self._visible_rows)
+
+    def _scroll_to(self, first: int) -> None:
+        self._first = min(max(0, first), self._max_first())
+        self._render()
+
+    def _scroll_by(self, rows: int) -> str:
+        self._scroll_to(self._first + rows)
+        return "break"
+
+    def _on_mouse_wheel(self, event: tk.Event) -> str:
+        # Windows reports multiples of 120, macOS small deltas
+        step = event.delta // 120 if abs(event.delta) >= 120 else event.delta
+        return self._scroll_by(-3 * step)
+
+    def _on_scrollbar(self, *args: str) -> None:
+        if args[0] == "moveto":
+            self._scroll_to(round(float(args[1]) * len(self._view)))
+        elif args[0] == "scroll":
+            amount = int(args[1])
+            if args[2] == "pages":
+                amount *= self._visible_rows
+            self._scroll_by(amount)
+
+    def _on_resize(self, event: tk.Event) -> None:
+        rows = max(1, event.height // self._row_height)
+        if rows != self._visible_rows:
+            self._visible_rows = rows
+            self._scroll_to(self._first)
+
+    def _render(self) -> None:
+        """
+        Fill the Listbox with the visible rows only.
+        """
+        visible = self._view[self._first:self._first + self._visible_rows + 1]
+
+        self._listbox.delete(0, tk.END)
+        if visible:
+            self._listbox.insert(tk.END, *(self.format_item(self._items[i]) for i in visible))
+
+        for row, index in enumerate(visible):
+            if index in self._selected:
+                self._listbox.selection_set(row)
+
+        if self.on_visible is not None:
+            self.on_visible([self._items[i] for i in visible])
+
+        total = len(self._view)
+        if total:
+            self._scrollbar.set(self._first / total, min(1.0, (self._first + self._visible_rows) / total))
+        else:
+            self._scrollbar.set(0.0, 1.0)
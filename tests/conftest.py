@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# The package lives in src/ and is run from there (python -m photo_sorter)
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
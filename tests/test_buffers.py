@@ -0,0 +1,74 @@
+import mmap
+from pathlib import Path
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from photo_sorter.deduplication.hashing import (
+    compute_file_hash,
+    compute_file_hash_for_buffer,
+    compute_perceptual_hash,
+    compute_perceptual_hash_for_buffer,
+)
+from photo_sorter.quality.analysis import (
+    compute_blur_score_for_buffer,
+    compute_blur_score_for_path,
+    compute_brightness_score_for_buffer,
+    compute_brightness_score_for_path,
+)
+
+
+def _analyze_path(path, decode_scale):
+    return (
+        compute_file_hash(path),
+        compute_perceptual_hash(path, decode_scale),
+        compute_blur_score_for_path(path, decode_scale),
+        compute_brightness_score_for_path(path, decode_scale),
+    )
+
+
+def _analyze_buffer(data, decode_scale):
+    return (
+        compute_file_hash_for_buffer(data),
+        compute_perceptual_hash_for_buffer(data, decode_scale),
+        compute_blur_score_for_buffer(data, decode_scale),
+        compute_brightness_score_for_buffer(data, decode_scale),
+    )
+
+
+def _with_bytes(path, decode_scale):
+    return _analyze_buffer(path.read_bytes(), decode_scale)
+
+
+def _with_memoryview(path, decode_scale):
+    # A slice of a larger buffer, as a batch reader hands them out
+    data = path.read_bytes()
+    padded = bytearray(b"\0" * 16 + data + b"\0" * 16)
+    with memoryview(padded)[16:16 + len(data)] as view:
+        return _analyze_buffer(view, decode_scale)
+
+
+def _with_mmap(path, decode_scale):
+    with path.open("rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        return _analyze_buffer(mapped, decode_scale)
+
+
+@pytest.fixture(params=["jpg", "png"])
+def image_path(request, tmp_path: Path) -> Path:
+    rng = np.random.default_rng(0)
+    # Gradient plus noise, so blur and pHash are not trivial
+    gradient = np.linspace(0, 200, 320, dtype=np.float64)[None, :, None]
+    pixels = np.clip(gradient + rng.normal(0, 20, (240, 320, 3)), 0, 255).astype(np.uint8)
+    path = tmp_path / f"photo.{request.param}"
+    Image.fromarray(pixels).save(path)
+    return path
+
+
+@pytest.mark.parametrize("variant", [_with_bytes, _with_memoryview, _with_mmap])
+@pytest.mark.parametrize("decode_scale", [1, 2])
+def test_buffer_functions_match_path_functions(image_path, variant, decode_scale):
+    expected = _analyze_path(image_path, decode_scale)
+
+    assert None not in expected
+    assert variant(image_path, decode_scale) == expected